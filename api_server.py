@@ -0,0 +1,396 @@
+"""Local JSON HTTP API for the calculator and the SDLC graph rollups.
+
+A small asyncio HTTP/1.1 server built only on the standard library:
+
+    python api_server.py --port 8000
+
+Endpoints:
+    POST /calculate  {"inputs": {...}} or {"scenarios": [{...}, ...]}
+    GET  /graph      the default SDLC graph as nodes and links
+    POST /rollup     {"graph": {"nodes": [...], "links": [...]}, "ai_percentage": {node: value}}
+    GET  /metrics    per-endpoint latency histograms and cache statistics
+    GET  /health
+
+Responses are cached in an LRU keyed on a hash of the canonicalized request,
+bounded by entry count and total bytes; very large responses are not cached.
+Parsing, validation, the numerical work and the JSON encoding all run in a
+thread pool, and large responses are encoded in chunks, so a slow batch
+request does not block the event loop or other requests.
+"""
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from http import HTTPStatus
+
+import numpy as np
+
+from graph_state import GraphState
+from impact_engine import INPUT_DEFAULTS, compute_impact, compute_scenario
+from sdlc_graph import create_sdlc_graph, deserialize_graph, update_parent_ai_percentages
+
+# Responses kept in the LRU cache
+CACHE_SIZE = 1024
+# Total size of the cached responses; the least recently used are evicted beyond it
+CACHE_BYTES = 256 * 1024 * 1024
+# Responses larger than this are never cached, so one batch cannot flush the cache
+MAX_CACHED_RESPONSE_BYTES = 16 * 1024 * 1024
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# Largest request body accepted
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Seconds an idle keep-alive connection stays open
+IDLE_TIMEOUT = 30
+# List items per json.dumps call when encoding a large response; each call holds the GIL
+ENCODE_CHUNK = 500
+
+
+class RequestError(Exception):
+    """A client error reported as a JSON error response"""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+class LRUCache:
+    """Thread-safe LRU mapping of keys to bytes, bounded by entry count and total size"""
+
+    def __init__(self, maxsize=CACHE_SIZE, maxbytes=CACHE_BYTES, max_item_bytes=MAX_CACHED_RESPONSE_BYTES):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.max_item_bytes = min(max_item_bytes, maxbytes)
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if len(value) > self.max_item_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= len(self._items[key])
+            self._items[key] = value
+            self._items.move_to_end(key)
+            self.nbytes += len(value)
+            while len(self._items) > self.maxsize or self.nbytes > self.maxbytes:
+                self.nbytes -= len(self._items.popitem(last=False)[1])
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._items), "maxsize": self.maxsize, "bytes": self.nbytes,
+                    "maxbytes": self.maxbytes, "hits": self.hits, "misses": self.misses}
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, ms):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def stats(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {"count": self.count,
+                "mean_ms": self.total_ms / self.count if self.count else 0.0,
+                "buckets": dict(zip(labels, self.buckets))}
+
+
+def json_safe(value):
+    """Replace NaN and infinities, which JSON cannot represent, with null"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_safe(item) for item in value]
+    return value
+
+
+def encode_json(value):
+    """JSON bytes of a response, with NaN as null; long lists are encoded a chunk at a time"""
+    if isinstance(value, list) and len(value) > ENCODE_CHUNK:
+        # Short json.dumps calls let the event loop thread take the GIL in between
+        return b"[" + b", ".join(json.dumps(json_safe(value[start:start + ENCODE_CHUNK]))[1:-1].encode()
+                                 for start in range(0, len(value), ENCODE_CHUNK)) + b"]"
+    if isinstance(value, dict) and any(isinstance(item, list) and len(item) > ENCODE_CHUNK
+                                       for item in value.values()):
+        return b"{" + b", ".join(json.dumps(str(key)).encode() + b": " + encode_json(item)
+                                 for key, item in value.items()) + b"}"
+    return json.dumps(json_safe(value)).encode()
+
+
+def canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def request_key(payload):
+    """Cache key of a request: a hash of its canonical JSON, along with the payload itself"""
+    return hashlib.sha256(canonical_json(payload).encode()).hexdigest(), payload
+
+
+def calculate_request(payload):
+    """Validate a /calculate payload once into input columns, and hash them into its cache key"""
+    if "scenarios" in payload:
+        scenarios = payload["scenarios"]
+        if not isinstance(scenarios, list):
+            raise RequestError("scenarios must be a list of JSON objects")
+        batch = True
+    else:
+        scenarios, batch = [payload.get("inputs", {})], False
+    for i, inputs in enumerate(scenarios):
+        if not isinstance(inputs, dict):
+            raise RequestError(f"scenarios[{i}] must be a JSON object" if batch
+                               else "Scenario inputs must be a JSON object")
+        if not inputs.keys() <= INPUT_DEFAULTS.keys():
+            unknown = [name for name in inputs if name not in INPUT_DEFAULTS]
+            raise RequestError(f"Unknown calculator inputs: {', '.join(unknown)}")
+    columns = {name: np.fromiter((float(inputs.get(name, default)) for inputs in scenarios), dtype=np.float64,
+                                 count=len(scenarios))
+               for name, default in INPUT_DEFAULTS.items()}
+    digest = hashlib.sha256(b"batch" if batch else b"single")
+    for column in columns.values():
+        digest.update(column.tobytes())
+    return digest.hexdigest(), (columns, batch)
+
+
+def calculate_columns(request):
+    """Evaluate the input columns of calculate_request with the impact engine"""
+    columns, batch = request
+    if not batch:
+        return {"results": compute_scenario(columns)}
+    if not len(columns["team_size"]):
+        return {"results": []}
+    results = compute_impact(columns)
+    rows = [dict(zip(results, values)) for values in zip(*(v.tolist() for v in results.values()))]
+    return {"results": rows}
+
+
+def calculate(payload):
+    """Evaluate one scenario (``inputs``) or a batch (``scenarios``) with the impact engine"""
+    return calculate_columns(calculate_request(payload)[1])
+
+
+def default_graph(payload):
+    return GraphState.from_networkx(create_sdlc_graph()).to_d3()
+
+
+def _number(value, field):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise RequestError(f"{field} must be a number")
+    return float(value)
+
+
+def rollup_graph(graph):
+    """NetworkX graph of a {"nodes", "links"} payload, checking its shape first"""
+    if not isinstance(graph, dict):
+        raise RequestError("graph must be an object with nodes and links")
+    nodes, links = graph.get("nodes"), graph.get("links", [])
+    if not isinstance(nodes, list) or not isinstance(links, list):
+        raise RequestError("graph.nodes and graph.links must be lists")
+    for i, node in enumerate(nodes):
+        if not isinstance(node, dict) or "id" not in node:
+            raise RequestError(f"graph.nodes[{i}] must be an object with an id")
+        for field in ("level", "ai_percentage"):
+            if field not in node:
+                raise RequestError(f"graph.nodes[{i}] ({node['id']}) has no {field}")
+            _number(node[field], f"graph.nodes[{i}].{field}")
+    ids = {node["id"] for node in nodes}
+    for i, link in enumerate(links):
+        if not isinstance(link, dict) or "source" not in link or "target" not in link:
+            raise RequestError(f"graph.links[{i}] must be an object with a source and a target")
+        for end in ("source", "target"):
+            if link[end] not in ids:
+                raise RequestError(f"graph.links[{i}] ({link['source']} → {link['target']}) refers to "
+                                   f"{link[end]!r}, which is not in graph.nodes")
+    return deserialize_graph(nodes + links)
+
+
+def rollup(payload):
+    """Apply AI percentage overrides and recompute every parent's percentage"""
+    graph = payload.get("graph")
+    G = rollup_graph(graph) if graph else create_sdlc_graph()
+    overrides = payload.get("ai_percentage", {})
+    if not isinstance(overrides, dict):
+        raise RequestError("ai_percentage must be an object of node name -> number")
+    for node, value in overrides.items():
+        if node not in G:
+            raise RequestError(f"Unknown node: {node}")
+        G.nodes[node]["ai_percentage"] = _number(value, f"ai_percentage[{node!r}]")
+    update_parent_ai_percentages(G)
+    return {"ai_percentage": {node: attrs["ai_percentage"] for node, attrs in G.nodes(data=True)}}
+
+
+# path -> (method, function of the payload giving (cache key, handler argument), handler)
+ROUTES = {
+    "/calculate": ("POST", calculate_request, calculate_columns),
+    "/graph": ("GET", lambda payload: ("", payload), default_graph),
+    "/rollup": ("POST", request_key, rollup),
+}
+
+
+class APIServer:
+    def __init__(self, cache_size=CACHE_SIZE, cache_bytes=CACHE_BYTES):
+        self.cache = LRUCache(cache_size, cache_bytes)
+        self.latency = defaultdict(LatencyHistogram)
+
+    def metrics(self):
+        return {"endpoints": {path: histogram.stats() for path, histogram in self.latency.items()},
+                "cache": self.cache.stats()}
+
+    async def dispatch(self, method, path, body):
+        """Return (status, JSON bytes) for one request; unexpected errors become a 500 JSON error"""
+        try:
+            return await self._dispatch(method, path, body)
+        except RequestError:
+            raise
+        except Exception as e:
+            # Never end a request without a response
+            raise RequestError(f"Internal server error: {type(e).__name__}: {e}", HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    async def _dispatch(self, method, path, body):
+        if path == "/health":
+            return HTTPStatus.OK, b'{"status":"ok"}'
+        if path == "/metrics":
+            return HTTPStatus.OK, json.dumps(self.metrics()).encode()
+        if path not in ROUTES:
+            raise RequestError(f"Unknown endpoint: {path}", HTTPStatus.NOT_FOUND)
+        expected = ROUTES[path][0]
+        if method != expected:
+            raise RequestError(f"{path} expects {expected}", HTTPStatus.METHOD_NOT_ALLOWED)
+        loop = asyncio.get_running_loop()
+        return HTTPStatus.OK, await loop.run_in_executor(None, self.respond, path, body)
+
+    def respond(self, path, body):
+        """Parse, validate, compute and encode one routed request; runs in the thread pool"""
+        _, prepare, handler = ROUTES[path]
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError as e:
+            raise RequestError(f"Invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise RequestError("Request body must be a JSON object")
+
+        try:
+            key, request = prepare(payload)
+        except (TypeError, ValueError, AttributeError) as e:
+            raise RequestError(str(e))
+        key = (path, key)
+        response = self.cache.get(key)
+        if response is None:
+            try:
+                result = handler(request)
+            except (KeyError, TypeError, ValueError) as e:
+                raise RequestError(str(e))
+            response = encode_json(result)
+            self.cache.put(key, response)
+        return response
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    # Without a request line the rest of the stream cannot be trusted: answer and close
+                    self.send(writer, HTTPStatus.BAD_REQUEST,
+                              json.dumps({"error": "Malformed request line"}).encode(), False)
+                    await writer.drain()
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                path = target.split("?", 1)[0]
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                try:
+                    if length < 0:
+                        raise RequestError("Content-Length must be a non-negative integer")
+                    if length > MAX_BODY_BYTES:
+                        raise RequestError("Request body too large", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = await self.dispatch(method, path, body)
+                except RequestError as e:
+                    status, response = e.status, json.dumps({"error": str(e)}).encode()
+
+                # An unread or unreadable body leaves the stream out of sync, so such requests close it
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and not (version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive")
+                              and 0 <= length <= MAX_BODY_BYTES)
+                self.send(writer, status, response, keep_alive)
+                await writer.drain()
+                self.latency[path if path in ROUTES or path in ("/health", "/metrics") else "other"].record(
+                    (time.perf_counter() - start) * 1000)
+                if not keep_alive:
+                    break
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def send(writer, status, response, keep_alive):
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(response)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1"))
+        writer.write(response)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON HTTP API for the AI impact calculator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="Responses kept in the LRU cache")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_BYTES / 2 ** 20,
+                        help="Total size of the cached responses in MiB")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(APIServer(args.cache_size, int(args.cache_mb * 2 ** 20)).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,26 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import networkx as nx
+import numpy as np
 import pandas as pd
-import pickle
-import base64
-from copy import deepcopy
-import plotly.express as px
-import sqlite3
-from datetime import datetime
-import os
+from datetime import timedelta
+from graph_state import GraphState
+from graph_history import GraphHistory, add_edge_op, add_node_op
+from graph_batch import COMMAND_FILE_TYPES, COMMANDS, describe, load_commands, parse_commands
+from graph_io import GRAPH_FORMATS, export_bytes, graph_format, read_graph
+from graph_view import render_graph
+from graph_rollup import SAVINGS_DRIVERS, RollupMatrix, driver_weights, graph_driven_inputs
+from sdlc_graph import create_sdlc_graph
+from notes_store import NotesRepository
+from scenario_store import ScenarioStore
+from monte_carlo import DISTRIBUTIONS, histogram, run_simulation, summarize
+from sensitivity import SENSITIVITY_METRICS, sensitivity_analysis, tornado_data
+from cash_flow_model import PERIODS_PER_YEAR, compute_phased_impact, yearly_totals
+from portfolio import (TEAM_METRICS, Portfolio, example_teams, group_summary, payback_distribution,
+                       portfolio_totals)
+from profiling import PhaseTimer, TimingHistory, profile_report, session_state_sizes, start_profile
 
-# Set page config to use full width
-st.set_page_config(
-    page_title="R&D AI Improvements",
-    layout="wide"
-)
-
-# Add custom CSS for DM Sans font
-st.markdown("""
+# Custom CSS for the DM Sans font, injected when the page is rendered
+PAGE_CSS = """
     <style>
         @import url('https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;700&display=swap');
         
@@ -38,160 +41,7 @@ st.markdown("""
             font-weight: 400 !important;
         }
     </style>
-""", unsafe_allow_html=True)
-
-def create_sdlc_graph():
-    # Create a directed graph
-    G = nx.DiGraph()
-    
-    # Add nodes with their levels
-    nodes = [
-        ("SDLC Process", 0),
-        ("Planning", 1),
-        ("Requirements Gathering", 2),
-        ("Stakeholder Analysis", 3),
-        ("Identify Key Stakeholders", 4),
-        ("Internal Stakeholders", 5),
-        ("External Stakeholders", 5),
-        ("Requirements Documentation", 4),
-        ("Functional Requirements", 5),
-        ("Non-Functional Requirements", 5),
-        ("Feasibility Study", 3),
-        ("Technical Feasibility", 4),
-        ("Technology Assessment", 5),
-        ("Resource Evaluation", 5),
-        ("Design", 1),
-        ("System Architecture", 2),
-        ("High-Level Design", 3),
-        ("Component Design", 4),
-        ("Module Specification", 5),
-        ("Interface Design", 5),
-        ("Implementation", 1),
-        ("Coding", 2),
-        ("Development", 3),
-        ("Code Implementation", 4),
-        ("Unit Testing", 5),
-        ("Code Review", 5),
-        ("Testing", 1),
-        ("Quality Assurance", 2),
-        ("Testing Phases", 3),
-        ("Test Planning", 4),
-        ("Test Cases", 5),
-        ("Test Environment", 5),
-        ("Deployment", 1),
-        ("Release Management", 2),
-        ("Deployment Planning", 3),
-        ("Release Strategy", 4),
-        ("Rollout Plan", 5),
-        ("Rollback Plan", 5),
-        ("Maintenance", 1),
-        ("Operations", 2),
-        ("Support", 3),
-        ("Monitoring", 4),
-        ("Performance Tracking", 5),
-        ("Issue Resolution", 5)
-    ]
-    
-    # Add nodes to graph
-    for node, level in nodes:
-        G.add_node(node, level=level, ai_percentage=0)  # Initialize with 0
-    
-    # Add edges
-    edges = [
-        ("SDLC Process", "Planning"),
-        ("Planning", "Requirements Gathering"),
-        ("Requirements Gathering", "Stakeholder Analysis"),
-        ("Stakeholder Analysis", "Identify Key Stakeholders"),
-        ("Identify Key Stakeholders", "Internal Stakeholders"),
-        ("Identify Key Stakeholders", "External Stakeholders"),
-        ("Stakeholder Analysis", "Requirements Documentation"),
-        ("Requirements Documentation", "Functional Requirements"),
-        ("Requirements Documentation", "Non-Functional Requirements"),
-        ("Requirements Gathering", "Feasibility Study"),
-        ("Feasibility Study", "Technical Feasibility"),
-        ("Technical Feasibility", "Technology Assessment"),
-        ("Technical Feasibility", "Resource Evaluation"),
-        ("SDLC Process", "Design"),
-        ("Design", "System Architecture"),
-        ("System Architecture", "High-Level Design"),
-        ("High-Level Design", "Component Design"),
-        ("Component Design", "Module Specification"),
-        ("Component Design", "Interface Design"),
-        ("SDLC Process", "Implementation"),
-        ("Implementation", "Coding"),
-        ("Coding", "Development"),
-        ("Development", "Code Implementation"),
-        ("Code Implementation", "Unit Testing"),
-        ("Code Implementation", "Code Review"),
-        ("SDLC Process", "Testing"),
-        ("Testing", "Quality Assurance"),
-        ("Quality Assurance", "Testing Phases"),
-        ("Testing Phases", "Test Planning"),
-        ("Test Planning", "Test Cases"),
-        ("Test Planning", "Test Environment"),
-        ("SDLC Process", "Deployment"),
-        ("Deployment", "Release Management"),
-        ("Release Management", "Deployment Planning"),
-        ("Deployment Planning", "Release Strategy"),
-        ("Release Strategy", "Rollout Plan"),
-        ("Release Strategy", "Rollback Plan"),
-        ("SDLC Process", "Maintenance"),
-        ("Maintenance", "Operations"),
-        ("Operations", "Support"),
-        ("Support", "Monitoring"),
-        ("Monitoring", "Performance Tracking"),
-        ("Monitoring", "Issue Resolution")
-    ]
-    
-    G.add_edges_from(edges)
-    
-    return G
-
-def calculate_parent_ai_percentage(G, node):
-    children = list(G.successors(node))
-    if not children:
-        return G.nodes[node]['ai_percentage']
-    
-    total_percentage = sum(G.nodes[child]['ai_percentage'] for child in children)
-    return total_percentage / len(children)
-
-def update_parent_ai_percentages(G):
-    # Get all nodes in reverse level order (from bottom to top)
-    nodes_by_level = sorted(G.nodes(), key=lambda x: G.nodes[x]['level'], reverse=True)
-    
-    for node in nodes_by_level:
-        if G.nodes[node]['level'] < 5:  # Only update non-leaf nodes
-            G.nodes[node]['ai_percentage'] = calculate_parent_ai_percentage(G, node)
-
-def serialize_graph(G):
-    """Serialize a NetworkX graph to a base64 string"""
-    return base64.b64encode(pickle.dumps(G)).decode('utf-8')
-
-def deserialize_graph(graph_str):
-    """Deserialize a base64 string back to a NetworkX graph"""
-    if isinstance(graph_str, str):
-        return pickle.loads(base64.b64decode(graph_str.encode('utf-8')))
-    elif isinstance(graph_str, dict):
-        # If it's already a dict, convert it back to a NetworkX graph
-        G = nx.DiGraph()
-        for node, attrs in graph_str.get('nodes', {}).items():
-            G.add_node(node, **attrs)
-        for source, targets in graph_str.get('edges', {}).items():
-            for target in targets:
-                G.add_edge(source, target)
-        return G
-    elif isinstance(graph_str, list):
-        # If it's a list, try to reconstruct the graph from the list data
-        G = nx.DiGraph()
-        for item in graph_str:
-            if isinstance(item, dict):
-                if 'id' in item:  # Node data
-                    G.add_node(item['id'], **{k: v for k, v in item.items() if k != 'id'})
-                elif 'source' in item and 'target' in item:  # Edge data
-                    G.add_edge(item['source'], item['target'])
-        return G
-    else:
-        raise ValueError("Invalid graph data format")
+"""
 
 def format_number(num):
     if num >= 1_000_000_000:
@@ -203,57 +53,205 @@ def format_number(num):
     else:
         return f"${num:,.2f}"
 
-# Initialize SQLite database
-def init_db():
-    conn = sqlite3.connect('notes.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS notes
-        (id INTEGER PRIMARY KEY AUTOINCREMENT,
-         email TEXT,
-         notes TEXT,
-         timestamp DATETIME)
-    ''')
-    conn.commit()
-    conn.close()
+# Number of notes loaded per page of the Notes History
+NOTES_PAGE_SIZE = 20
+# Upload types of the graph import
+GRAPH_FILE_TYPES = [extension[1:] for extensions in GRAPH_FORMATS.values() for extension in extensions]
+
+@st.cache_resource
+def get_notes_repository():
+    """Notes repository shared by every session of this server process"""
+    return NotesRepository('notes.db')
+
+@st.cache_resource
+def get_scenario_store():
+    """Scenario store shared by every session of this server process"""
+    return ScenarioStore('notes.db')
 
-# Function to get all notes
-def get_all_notes():
-    conn = sqlite3.connect('notes.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM notes ORDER BY timestamp DESC')
-    notes = c.fetchall()
-    conn.close()
-    return notes
+def loaded_input(name, default):
+    """Default value of a calculator input, taken from a reloaded scenario if there is one"""
+    return type(default)(st.session_state.get('loaded_inputs', {}).get(name, default))
 
-# Function to add a new note
-def add_note(email, notes):
-    conn = sqlite3.connect('notes.db')
-    c = conn.cursor()
-    c.execute('INSERT INTO notes (email, notes, timestamp) VALUES (?, ?, ?)',
-              (email, notes, datetime.now()))
-    conn.commit()
-    conn.close()
+def input_key(name):
+    """Widget key of a calculator input; it changes on every reload so the widget takes the loaded value"""
+    return f"{name}_{st.session_state.get('loaded_generation', 0)}"
 
-# Initialize database
-if not os.path.exists('notes.db'):
-    init_db()
+def get_graph_rollup(graph):
+    """Rollup matrix and savings driver weights of the graph, rebuilt when its structure or effort shares change"""
+    key = (graph.fingerprint(include_percentages=False), graph.effort_share.tobytes())
+    cached = st.session_state.get('graph_rollup')
+    if cached is None or cached[0] != key:
+        rollup = RollupMatrix(graph)
+        cached = (key, rollup, driver_weights(rollup, graph))
+        st.session_state.graph_rollup = cached
+    return cached[1], cached[2]
+
+def get_graph_export(graph, fmt):
+    """Exported graph file, rebuilt only when the graph or the format changes"""
+    key = (graph.fingerprint(), fmt)
+    cached = st.session_state.get('graph_export')
+    if cached is None or cached[0] != key:
+        cached = (key, export_bytes(graph, fmt))
+        st.session_state.graph_export = cached
+    return cached[1]
+
+def edit_graph(make_op, label):
+    """Apply a graph edit through the undo history and rerun; invalid edits are shown as errors"""
+    try:
+        st.session_state.graph_state = st.session_state.graph_history.apply(
+            st.session_state.graph_state, make_op(), label)
+    except ValueError as error:
+        st.error(str(error))
+        return
+    st.experimental_rerun()
+
+def get_portfolio():
+    """Portfolio of teams of this session"""
+    if 'portfolio' not in st.session_state:
+        st.session_state.portfolio = Portfolio()
+    return st.session_state.portfolio
 
 def main():
+    # Set page config to use full width; done here so importing the module has no side effects
+    st.set_page_config(
+        page_title="R&D AI Improvements",
+        layout="wide"
+    )
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+    
+    # Phase timing is off unless enabled in the Performance panel; profiling covers a single rerun
+    profiler = start_profile() if st.session_state.pop('profile_next_rerun', False) else None
+    timer = PhaseTimer(enabled=st.session_state.get('debug_timing', False) or profiler is not None)
+    mode = st.sidebar.radio("Mode", ["Single Team", "Portfolio"], horizontal=True)
+    try:
+        if mode == "Portfolio":
+            render_portfolio_page(timer)
+        else:
+            render_page(timer)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            st.session_state.profile_report = profile_report(profiler)
+        if timer.enabled:
+            if 'timing_history' not in st.session_state:
+                st.session_state.timing_history = TimingHistory()
+            st.session_state.timing_history.record(timer)
+    render_performance_panel(timer)
+
+def render_performance_panel(timer):
+    """Sidebar panel with per-phase timings, session state size and profile downloads"""
+    with st.sidebar.expander("Performance", expanded=False):
+        st.checkbox("Time Page Phases", key="debug_timing",
+                    help="Measure how long each part of the page takes on every rerun")
+        if timer.enabled and 'timing_history' in st.session_state:
+            history = st.session_state.timing_history
+            st.caption(f"Last rerun: {timer.total() * 1000:.0f} ms, percentiles over {len(history.reruns)} reruns")
+            st.dataframe(pd.DataFrame(history.summary()).style.format(precision=1), hide_index=True)
+            
+            sizes = session_state_sizes(st.session_state)
+            st.caption(f"Session state: {sum(size or 0 for size in sizes.values()) / 1024:,.0f} KiB pickled")
+            st.dataframe(pd.DataFrame({"Key": list(sizes), "Bytes": list(sizes.values())}), hide_index=True)
+            
+            # Recent latencies of the shared notes store, across every session of this server
+            latency = get_notes_repository().latency_stats()
+            if latency:
+                latency_df = pd.DataFrame(latency).T.rename_axis("Operation")
+                latency_df["count"] = latency_df["count"].astype(int)
+                st.caption("Notes store latency (ms)")
+                st.dataframe(latency_df.style.format(precision=1))
+        
+        if st.button("Profile Next Rerun"):
+            st.session_state.profile_next_rerun = True
+            st.experimental_rerun()
+        if 'profile_report' in st.session_state:
+            text, binary = st.session_state.profile_report
+            st.download_button("Download Profile (.prof)", binary, file_name="rerun.prof",
+                               mime="application/octet-stream")
+            st.download_button("Download Profile Summary", text, file_name="rerun_profile.txt", mime="text/plain")
+
+def render_portfolio_page(timer):
+    """Inputs and aggregated results of every team in the portfolio"""
+    st.title("R&D AI Improvements: Portfolio")
+    portfolio = get_portfolio()
+    
+    with st.sidebar:
+        st.title("Portfolio Teams")
+        teams_file = st.file_uploader("Teams CSV", type=["csv"],
+                                      help="One row per team with Team, Group and calculator input columns")
+        if st.button("Import Teams") and teams_file is not None:
+            # Imported rows add to or update the current teams
+            imported = pd.read_csv(teams_file)
+            portfolio.update_from_frame(pd.concat([portfolio.inputs_frame(), imported])
+                                        .drop_duplicates("Team", keep="last"))
+            st.experimental_rerun()
+        if st.button("Add Example Teams"):
+            example_teams(portfolio)
+            st.experimental_rerun()
+        if st.button("Clear Portfolio"):
+            st.session_state.portfolio = Portfolio()
+            st.experimental_rerun()
+    
+    st.markdown("### Team Inputs")
+    st.caption("Edit cells to change a team's inputs, or add and delete rows. Teams can also be added "
+               "from the calculator in Single Team mode.")
+    edited = st.data_editor(portfolio.inputs_frame(), num_rows="dynamic", hide_index=True,
+                            use_container_width=True)
+    portfolio.update_from_frame(edited)
+    timer.lap("Portfolio inputs")
+    
+    if not len(portfolio):
+        st.info("The portfolio has no teams yet.")
+        return
+    
+    results = portfolio.results()
+    st.caption(f"Recomputed {portfolio.last_recomputed} of {len(portfolio)} teams")
+    
+    totals = portfolio_totals(results)
+    st.markdown("### Portfolio Totals")
+    totals_col1, totals_col2, totals_col3, totals_col4 = st.columns(4)
+    with totals_col1:
+        st.metric("Teams", totals["Teams"])
+        st.metric("Total AI Cost", format_number(totals["Total AI Cost"]))
+    with totals_col2:
+        st.metric("Total Savings", format_number(totals["Total Savings"]))
+        st.metric("Net Savings", format_number(totals["Net Savings"]))
+    with totals_col3:
+        st.metric("NPV", format_number(totals["NPV"]))
+    with totals_col4:
+        weighted_irr = totals["Weighted IRR"]
+        st.metric("Weighted IRR", "n/a" if np.isnan(weighted_irr) else f"{weighted_irr:.1f}%",
+                  help="IRR of each team weighted by its initial investment")
+        st.metric("Median Discounted Payback", f"{totals['Median Discounted Payback']:.1f} years")
+    
+    st.markdown("### By Group")
+    st.dataframe(group_summary(results).style.format(precision=1), use_container_width=True)
+    
+    st.markdown("### Discounted Payback Distribution")
+    payback_col1, payback_col2 = st.columns(2)
+    with payback_col1:
+        st.dataframe(payback_distribution(results).style.format(precision=1), use_container_width=True)
+    with payback_col2:
+        payback_counts = results["Discounted Payback Period"].round(1).value_counts().sort_index()
+        st.bar_chart(payback_counts.rename_axis("Discounted Payback (years)").rename("Teams"))
+    
+    st.markdown("### Team Results")
+    st.dataframe(results[["Group"] + TEAM_METRICS].style.format(precision=1), use_container_width=True)
+    st.download_button("Download Portfolio Results as CSV", results.to_csv(),
+                       file_name="ai_impact_portfolio_results.csv", mime="text/csv")
+    timer.lap("Portfolio results")
+
+def render_page(timer):
     st.title("R&D AI Improvements")
     
     # Initialize session state for graph data if not exists
-    if 'graph_data' not in st.session_state:
-        G = create_sdlc_graph()
-        st.session_state.graph_data = serialize_graph(G)
+    if 'graph_state' not in st.session_state:
+        st.session_state.graph_state = GraphState.from_networkx(create_sdlc_graph())
     
-    # Get the graph data from session state
-    try:
-        G = deserialize_graph(st.session_state.graph_data)
-    except Exception as e:
-        st.error(f"Error loading graph data: {str(e)}")
-        G = create_sdlc_graph()
-        st.session_state.graph_data = serialize_graph(G)
+    if 'graph_history' not in st.session_state:
+        st.session_state.graph_history = GraphHistory(st.session_state.graph_state)
+    
+    # The compact graph state is used directly; edits go through the undo history
+    graph = st.session_state.graph_state
     
     # Add controls for graph modification
     with st.sidebar:
@@ -261,415 +259,164 @@ def main():
         
         # Node controls in expander
         with st.expander("Node Controls", expanded=True):
-            node_action = st.radio("Node Action", ["Add", "Delete", "Rename", "Set AI Percentage"])
+            node_action = st.radio("Node Action", ["Add", "Delete", "Rename", "Set AI Percentage", "Set Effort Share"])
             
             if node_action == "Add":
                 new_node_name = st.text_input("New Node Name")
-                parent_node = st.selectbox("Connect to Node", [""] + list(G.nodes()))
+                parent_node = st.selectbox("Connect to Node", [""] + graph.names)
                 if st.button("Add Node"):
                     if new_node_name and parent_node:
-                        # Add new node
-                        new_level = G.nodes[parent_node]['level'] + 1
-                        G.add_node(new_node_name, level=new_level, ai_percentage=0)
-                        # Add new edge
-                        G.add_edge(parent_node, new_node_name)
-                        st.session_state.graph_data = serialize_graph(G)
-                        st.experimental_rerun()
+                        # Add the node one level below its parent, which then averages over one more child
+                        edit_graph(lambda: add_node_op(graph, new_node_name, parent_node),
+                                   f"Add {new_node_name} under {parent_node}")
             
             elif node_action == "Delete":
-                node_to_delete = st.selectbox("Select Node to Delete", [""] + list(G.nodes()))
+                node_to_delete = st.selectbox("Select Node to Delete", [""] + graph.names)
                 if st.button("Delete Node"):
                     if node_to_delete:
                         # Remove node and its edges
-                        G.remove_node(node_to_delete)
-                        st.session_state.graph_data = serialize_graph(G)
-                        st.experimental_rerun()
+                        edit_graph(lambda: ("remove", [node_to_delete], []), f"Delete {node_to_delete}")
             
             elif node_action == "Rename":
-                node_to_rename = st.selectbox("Select Node to Rename", [""] + list(G.nodes()))
+                node_to_rename = st.selectbox("Select Node to Rename", [""] + graph.names)
                 new_name = st.text_input("New Name")
                 if st.button("Rename Node"):
                     if node_to_rename and new_name:
                         # Update node name
-                        G = nx.relabel_nodes(G, {node_to_rename: new_name})
-                        st.session_state.graph_data = serialize_graph(G)
-                        st.experimental_rerun()
+                        edit_graph(lambda: ("rename", node_to_rename, new_name),
+                                   f"Rename {node_to_rename} to {new_name}")
             
             elif node_action == "Set AI Percentage":
-                # Get only leaf nodes (level 5)
-                leaf_nodes = [node for node in G.nodes() if G.nodes[node]['level'] == 5]
+                # Get only leaf nodes (no children)
+                leaf_nodes = graph.leaves()
                 node_to_update = st.selectbox("Select Leaf Node", [""] + leaf_nodes)
                 if node_to_update:
                     ai_percentage = st.slider("AI Augmentation Percentage", 0, 100, 
-                                            G.nodes[node_to_update]['ai_percentage'])
+                                            int(round(graph.ai_percentage[graph.index[node_to_update]])))
                     if st.button("Update AI Percentage"):
-                        # Update AI percentage
-                        G.nodes[node_to_update]['ai_percentage'] = ai_percentage
-                        # Recalculate parent percentages
-                        update_parent_ai_percentages(G)
-                        st.session_state.graph_data = serialize_graph(G)
-                        st.experimental_rerun()
+                        # Update AI percentage and recalculate its ancestors in place
+                        edit_graph(lambda: ("set_ai_percentage", node_to_update, ai_percentage),
+                                   f"Set AI percentage of {node_to_update} to {ai_percentage}%")
+            
+            elif node_action == "Set Effort Share":
+                node_to_weight = st.selectbox("Select Node", [""] + graph.names)
+                if node_to_weight:
+                    effort_share = st.number_input("Effort Share", min_value=0.0, step=0.5,
+                                                   value=float(graph.effort_share[graph.index[node_to_weight]]),
+                                                   help="Relative effort of this node among its siblings")
+                    if st.button("Update Effort Share"):
+                        # Parents average their children by effort share, so the ancestors change too
+                        edit_graph(lambda: ("set_effort_share", node_to_weight, effort_share),
+                                   f"Set effort share of {node_to_weight} to {effort_share:g}")
         
         # Edge controls in expander
         with st.expander("Edge Controls", expanded=True):
             edge_action = st.radio("Edge Action", ["Add", "Delete"])
             
             if edge_action == "Add":
-                source_node = st.selectbox("Source Node", [""] + list(G.nodes()))
-                target_node = st.selectbox("Target Node", [""] + list(G.nodes()))
+                source_node = st.selectbox("Source Node", [""] + graph.names)
+                target_node = st.selectbox("Target Node", [""] + graph.names)
                 if st.button("Add Edge"):
                     if source_node and target_node:
                         # Add new edge
-                        G.add_edge(source_node, target_node)
-                        st.session_state.graph_data = serialize_graph(G)
-                        st.experimental_rerun()
+                        edit_graph(lambda: add_edge_op(graph, source_node, target_node),
+                                   f"Add edge {source_node} → {target_node}")
             
             elif edge_action == "Delete":
-                edges = list(G.edges())
+                edges = graph.edges()
                 edge_to_delete = st.selectbox("Select Edge to Delete", 
                                             [""] + [f"{source} → {target}" for source, target in edges])
                 if st.button("Delete Edge"):
                     if edge_to_delete:
                         source, target = edge_to_delete.split(" → ")
                         # Remove edge
-                        G.remove_edge(source, target)
-                        st.session_state.graph_data = serialize_graph(G)
+                        edit_graph(lambda: ("remove", [], [(source, target)]), f"Delete edge {edge_to_delete}")
+        
+        # Batch edits: many commands applied atomically as one undoable step with a single rerun
+        with st.expander("Batch Edit", expanded=False):
+            if 'batch_queue' not in st.session_state:
+                st.session_state.batch_queue = []
+            queue = st.session_state.batch_queue
+            commands = st.text_area("Edit Commands", placeholder="add, Prompt Review, Code Implementation\n"
+                                                                 "reparent, Test Planning, Quality Assurance\n"
+                                                                 "set_ai_percentage, Unit Testing, 60",
+                                    help="One command per line: " + ", ".join(COMMANDS))
+            commands_file = st.file_uploader("Commands File", type=COMMAND_FILE_TYPES)
+            if st.button("Queue Commands"):
+                try:
+                    queued = parse_commands(commands)
+                    if commands_file is not None:
+                        queued += load_commands(commands_file.getvalue(), commands_file.name)
+                    queue.extend(queued)
+                except ValueError as error:
+                    st.error(str(error))
+            if queue:
+                st.caption(f"{len(queue)} queued edits")
+                st.dataframe(pd.DataFrame({"Edit": [describe(op) for op in queue]}), hide_index=True)
+                apply_col, clear_col = st.columns(2)
+                with apply_col:
+                    if st.button("Apply Batch"):
+                        try:
+                            st.session_state.graph_state = st.session_state.graph_history.apply(
+                                graph, ("batch", list(queue)), f"Batch of {len(queue)} edits")
+                        except ValueError as error:
+                            # Nothing was applied; the queue is kept so it can be fixed
+                            st.error(str(error))
+                        else:
+                            queue.clear()
+                            st.experimental_rerun()
+                with clear_col:
+                    if st.button("Clear Queue"):
+                        queue.clear()
                         st.experimental_rerun()
+
+        # Load and save the graph in interchange formats; an import is one undoable step
+        with st.expander("Import / Export", expanded=False):
+            graph_file = st.file_uploader("Graph File", type=GRAPH_FILE_TYPES,
+                                          help="Node-link JSON, GraphML, CSV edge list, Parquet or Arrow")
+            if st.button("Import Graph", disabled=graph_file is None):
+                try:
+                    imported = read_graph(graph_file, graph_format(graph_file.name))
+                except ValueError as error:
+                    st.error(str(error))
+                else:
+                    edit_graph(lambda: ("replace", imported), f"Import {graph_file.name}")
+            export_format = st.selectbox("Export Format", list(GRAPH_FORMATS))
+            st.download_button("Download Graph", get_graph_export(graph, export_format),
+                               file_name=f"sdlc_graph{GRAPH_FORMATS[export_format][0]}")
+
+        # Undo/redo history of the edits above
+        with st.expander("History", expanded=False):
+            history = st.session_state.graph_history
+            undo_col, redo_col = st.columns(2)
+            with undo_col:
+                if st.button("Undo", disabled=not history.can_undo()):
+                    st.session_state.graph_state = history.undo(graph)
+                    st.experimental_rerun()
+            with redo_col:
+                if st.button("Redo", disabled=not history.can_redo()):
+                    st.session_state.graph_state = history.redo(graph)
+                    st.experimental_rerun()
+            st.caption(f"Step {history.position} of {len(history)}, {len(history.checkpoints)} checkpoints")
+            if len(history):
+                steps = ["0: Initial graph"] + [f"{i}: {label}" for i, label in enumerate(history.labels(), 1)]
+                step = st.selectbox("Jump to Step", steps, index=history.position)
+                if st.button("Jump") and steps.index(step) != history.position:
+                    st.session_state.graph_state = history.goto(graph, steps.index(step))
+                    st.experimental_rerun()
     
-    # Convert graph to JSON format for D3.js
-    nodes_data = [{
-        "id": node, 
-        "level": G.nodes[node]["level"],
-        "ai_percentage": G.nodes[node]["ai_percentage"]
-    } for node in G.nodes()]
-    
-    links_data = [{"source": source, "target": target} 
-                 for source, target in G.edges()]
-    
-    graph_data = {"nodes": nodes_data, "links": links_data}
+    timer.lap("Graph controls")
     
-    # Create the D3.js visualization HTML
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <script src="https://d3js.org/d3.v7.min.js"></script>
-        <link href="https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
-        <style>
-            body {{ 
-                margin: 0; 
-                padding: 0; 
-                background-color: transparent; 
-                width: 100%;
-                height: 100%;
-                font-family: 'DM Sans', sans-serif;
-            }}
-            #visualization {{
-                width: 100%;
-                height: 800px;
-                margin: 0;
-                padding: 0;
-                background-color: transparent;
-            }}
-            svg {{
-                width: 100%;
-                height: 100%;
-                background-color: transparent;
-            }}
-            .node {{ cursor: pointer; }}
-            .node text {{
-                pointer-events: none;
-                font-family: 'DM Sans', sans-serif;
-                font-size: 12px;
-                text-anchor: middle;
-                dominant-baseline: middle;
-                fill: white;
-                font-weight: 600;
-            }}
-            .link {{ 
-                stroke: #999; 
-                stroke-opacity: 0.6;
-                stroke-width: 2;
-            }}
-            .node circle {{ 
-                transition: r 0.2s, fill 0.2s, stroke 0.2s;
-                stroke-width: 2px;
-                stroke: white;
-            }}
-            .node text {{ transition: font-size 0.2s; }}
-            .link {{ transition: stroke-opacity 0.2s; }}
-            .controls {{
-                position: absolute;
-                top: 10px;
-                right: 10px;
-                background: rgba(255, 255, 255, 0.9);
-                padding: 10px;
-                border-radius: 5px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-            .tooltip {{
-                position: absolute;
-                background: rgba(255, 255, 255, 0.9);
-                padding: 5px 10px;
-                border-radius: 3px;
-                font-size: 12px;
-                pointer-events: none;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-        </style>
-    </head>
-    <body>
-        <div id="visualization"></div>
-        <div class="tooltip"></div>
-        <script>
-            // Wait for the DOM to be fully loaded
-            document.addEventListener('DOMContentLoaded', function() {{
-                const data = {graph_data};
-                
-                // Get container dimensions
-                const container = document.getElementById('visualization');
-                const width = container.clientWidth;
-                const height = 800;
-                
-                // Create SVG
-                const svg = d3.select("#visualization")
-                    .append("svg")
-                    .attr("width", width)
-                    .attr("height", height)
-                    .attr("viewBox", "0 0 " + width + " " + height)
-                    .attr("preserveAspectRatio", "xMidYMid meet")
-                    .style("background-color", "transparent");
-                
-                const g = svg.append("g");
-                
-                // Create a map of connected nodes for quick lookup
-                const connectedNodes = {{}};
-                data.links.forEach(link => {{
-                    if (!connectedNodes[link.source]) connectedNodes[link.source] = new Set();
-                    if (!connectedNodes[link.target]) connectedNodes[link.target] = new Set();
-                    connectedNodes[link.source].add(link.target);
-                    connectedNodes[link.target].add(link.source);
-                }});
-                
-                // Initialize positions based on level
-                data.nodes.forEach(node => {{
-                    node.x = width / 2 + (node.level - 2) * 150;
-                    node.y = height / 2 + (node.level % 2 ? 80 : -80);
-                }});
-                
-                const simulation = d3.forceSimulation(data.nodes)
-                    .force("link", d3.forceLink(data.links)
-                        .id(function(d) {{ return d.id; }})
-                        .distance(function(d) {{
-                            // Increase distance based on level difference
-                            return 400 + (Math.abs(d.source.level - d.target.level) * 150);
-                        }}))
-                    .force("charge", d3.forceManyBody().strength(function(d) {{
-                        // Stronger repulsion for better spacing
-                        return d.id === "SDLC Process" ? -10000 : -3000;
-                    }}))
-                    .force("center", d3.forceCenter(width / 2, height / 2))
-                    .force("collision", d3.forceCollide().radius(function(d) {{
-                        // Larger collision radius to prevent node overlap
-                        return 150 + (d.level * 25);
-                    }}))
-                    .force("x", d3.forceX().strength(0.3).x(function(d) {{
-                        // Strong horizontal force to maintain clear hierarchy
-                        return (d.level * 250) + (width / 4);
-                    }}))
-                    .force("y", d3.forceY().strength(0.2).y(function(d) {{
-                        // Vertical force to spread nodes
-                        return height / 2 + (d.level % 2 ? 150 : -150);
-                    }}))
-                    .force("radial", d3.forceRadial(function(d) {{
-                        // Radial force to maintain circular layout
-                        return d.level * 250;
-                    }}, width/2, height/2).strength(0.4))
-                    .alphaDecay(0.03)  // Slower decay for more stable layout
-                    .velocityDecay(0.8);  // Higher velocity decay for smoother movement
-                
-                // Create links with initial opacity 0
-                const link = g.append("g")
-                    .selectAll("line")
-                    .data(data.links)
-                    .enter().append("line")
-                    .attr("class", "link")
-                    .attr("stroke-width", 2)
-                    .style("opacity", 0)
-                    .attr("marker-end", "url(#arrowhead)");  // Add arrowhead to links
-                
-                // Add arrowhead definition
-                svg.append("defs").append("marker")
-                    .attr("id", "arrowhead")
-                    .attr("viewBox", "0 -5 10 10")
-                    .attr("refX", 15)
-                    .attr("refY", 0)
-                    .attr("orient", "auto")
-                    .attr("markerWidth", 6)
-                    .attr("markerHeight", 6)
-                    .append("path")
-                    .attr("d", "M0,-5L10,0L0,5")
-                    .attr("fill", "#999");
-                
-                // Create nodes with initial opacity 0
-                const node = g.append("g")
-                    .selectAll("g")
-                    .data(data.nodes)
-                    .enter().append("g")
-                    .attr("class", "node")
-                    .style("opacity", 0)
-                    .call(d3.drag()
-                        .on("start", dragstarted)
-                        .on("drag", dragged)
-                        .on("end", dragended));
-                
-                node.append("circle")
-                    .attr("r", function(d) {{ 
-                        const textLength = d.id.length;
-                        const textSize = textLength * 0.8;
-                        const levelSize = (5 - d.level) * 10;
-                        return Math.max(30 + textSize, 40 + levelSize);
-                    }})
-                    .attr("fill", function(d) {{
-                        if (d.ai_percentage > 0) {{
-                            return "black";
-                        }} else {{
-                            return d3.schemeCategory10[d.level % 10];
-                        }}
-                    }})
-                    .attr("stroke", "white")
-                    .attr("stroke-width", 2)
-                    .on("mouseover", function(event, d) {{
-                        const connected = connectedNodes[d.id] || new Set();
-                        node.selectAll("circle")
-                            .style("opacity", function(node) {{
-                                return connected.has(node.id) || node.id === d.id ? 1 : 0.3;
-                            }});
-                        node.selectAll("text")
-                            .style("opacity", function(node) {{
-                                return connected.has(node.id) || node.id === d.id ? 1 : 0.3;
-                            }});
-                        link.style("opacity", function(l) {{
-                            return l.source.id === d.id || l.target.id === d.id ? 1 : 0.3;
-                        }});
-                        
-                        // Show tooltip with AI percentage
-                        const tooltip = d3.select(".tooltip");
-                        tooltip
-                            .style("left", (event.pageX + 10) + "px")
-                            .style("top", (event.pageY - 10) + "px")
-                            .style("opacity", 1)
-                            .html(`<strong>${{d.id}}</strong><br>AI Augmentation: ${{d.ai_percentage.toFixed(1)}}%`);
-                    }})
-                    .on("mousemove", function(event) {{
-                        const tooltip = d3.select(".tooltip");
-                        tooltip
-                            .style("left", (event.pageX + 10) + "px")
-                            .style("top", (event.pageY - 10) + "px");
-                    }})
-                    .on("mouseout", function() {{
-                        node.selectAll("circle").style("opacity", 1);
-                        node.selectAll("text").style("opacity", 1);
-                        link.style("opacity", 1);
-                        
-                        // Hide tooltip
-                        d3.select(".tooltip").style("opacity", 0);
-                    }});
-                
-                node.append("text")
-                    .attr("dy", 0)
-                    .attr("text-anchor", "middle")
-                    .attr("font-size", function(d) {{
-                        return 12 + (5 - d.level) * 2;
-                    }})
-                    .text(function(d) {{ return d.id; }});
-                
-                simulation.on("tick", function() {{
-                    link
-                        .attr("x1", function(d) {{ return d.source.x; }})
-                        .attr("y1", function(d) {{ return d.source.y; }})
-                        .attr("x2", function(d) {{ return d.target.x; }})
-                        .attr("y2", function(d) {{ return d.target.y; }});
-                    
-                    node.filter(function(d) {{ return d3.select(this).style("opacity") === "1" }})
-                        .attr("transform", function(d) {{ return "translate(" + d.x + "," + d.y + ")"; }});
-                }});
-                
-                // Function to reveal nodes level by level
-                function revealLevel(level) {{
-                    node.filter(d => d.level === level)
-                        .attr("transform", function(d) {{ 
-                            return "translate(" + d.x + "," + d.y + ") scale(0)"; 
-                        }})
-                        .transition()
-                        .duration(800)
-                        .style("opacity", 1)
-                        .attr("transform", function(d) {{ 
-                            return "translate(" + d.x + "," + d.y + ") scale(1)"; 
-                        }});
-                    
-                    link.filter(d => d.source.level === level || d.target.level === level)
-                        .transition()
-                        .duration(800)
-                        .style("opacity", 1);
-                    
-                    if (level < 5) {{
-                        setTimeout(() => revealLevel(level + 1), 1000);
-                    }}
-                }}
-                
-                // Start revealing from level 0
-                setTimeout(() => revealLevel(0), 500);
-                
-                function dragstarted(event, d) {{
-                    if (!event.active) simulation.alphaTarget(0.3).restart();
-                    d.fx = d.x;
-                    d.fy = d.y;
-                }}
-                
-                function dragged(event, d) {{
-                    d.fx = event.x;
-                    d.fy = event.y;
-                }}
-                
-                function dragended(event, d) {{
-                    if (!event.active) simulation.alphaTarget(0);
-                    d.fx = null;
-                    d.fy = null;
-                }}
-                
-                // Add zoom behavior
-                const zoom = d3.zoom()
-                    .scaleExtent([0.1, 4])
-                    .on("zoom", function(event) {{
-                        g.attr("transform", event.transform);
-                    }});
-                
-                svg.call(zoom);
-                
-                // Initial zoom to fit all nodes
-                setTimeout(function() {{
-                    const bounds = g.node().getBBox();
-                    const fullWidth = bounds.width;
-                    const fullHeight = bounds.height;
-                    const midX = bounds.x + fullWidth / 2;
-                    const midY = bounds.y + fullHeight / 2;
-                    
-                    const scale = 0.8 / Math.max(fullWidth / width, fullHeight / height);
-                    const translate = [width / 2 - scale * midX, height / 2 - scale * midY];
-                    
-                    svg.call(zoom.transform, d3.zoomIdentity
-                        .translate(translate[0], translate[1])
-                        .scale(scale));
-                }}, 1000);
-            }});
-        </script>
-    </body>
-    </html>
-    """
+    # Build the D3.js visualization HTML, reusing the last render if the graph is unchanged
+    if 'graph_view' not in st.session_state:
+        st.session_state.graph_view = {}
+    relax_layout = st.sidebar.checkbox("Relax Layout", value=False,
+                                       help="Briefly relax the precomputed layout in the browser to resolve overlaps")
+    html = render_graph(graph, st.session_state.graph_view, relax=relax_layout)
     
     # Display the visualization with full width
     components.html(html, height=800, width=None, scrolling=True)
+    timer.lap("Graph render")
 
     # Add calculator section
     st.markdown("---")
@@ -681,41 +428,44 @@ def main():
     with col1:
         # Team and Project Metrics Section
         st.markdown("### Team & Project Metrics")
-        team_size = st.number_input("Team Size", min_value=1, value=10, help="Number of team members")
-        avg_salary = st.number_input("Average Developer Salary (USD/year)", min_value=0, value=120000, help="Average annual salary of team members")
+        team_size = st.number_input("Team Size", min_value=1, value=loaded_input("team_size", 10), key=input_key("team_size"), help="Number of team members")
+        avg_salary = st.number_input("Average Developer Salary (USD/year)", min_value=0, value=loaded_input("avg_salary", 120000), key=input_key("avg_salary"), help="Average annual salary of team members")
         
         # Project Performance Metrics
         st.markdown("#### Project Performance")
-        current_cycle_time = st.number_input("Current Cycle Time (days)", min_value=1, value=14, help="Average time to complete a feature from start to finish")
-        current_velocity = st.number_input("Current Velocity (story points/sprint)", min_value=1, value=20, help="Current team velocity in story points per sprint")
-        sprint_duration = st.number_input("Sprint Duration (weeks)", min_value=1, value=2, help="Duration of each sprint in weeks")
-        features_per_sprint = st.number_input("Features per Sprint", min_value=1, value=3, help="Average number of features completed per sprint")
+        current_cycle_time = st.number_input("Current Cycle Time (days)", min_value=1, value=loaded_input("current_cycle_time", 14), key=input_key("current_cycle_time"), help="Average time to complete a feature from start to finish")
+        current_velocity = st.number_input("Current Velocity (story points/sprint)", min_value=1, value=loaded_input("current_velocity", 20), key=input_key("current_velocity"), help="Current team velocity in story points per sprint")
+        sprint_duration = st.number_input("Sprint Duration (weeks)", min_value=1, value=loaded_input("sprint_duration", 2), key=input_key("sprint_duration"), help="Duration of each sprint in weeks")
+        features_per_sprint = st.number_input("Features per Sprint", min_value=1, value=loaded_input("features_per_sprint", 3), key=input_key("features_per_sprint"), help="Average number of features completed per sprint")
         
         # Financial Parameters
         st.markdown("#### Financial Parameters")
-        discount_rate = st.slider("Discount Rate (%)", min_value=0.0, max_value=20.0, value=8.0, step=0.1,
+        discount_rate = st.slider("Discount Rate (%)", min_value=0.0, max_value=20.0, value=loaded_input("discount_rate", 8.0), key=input_key("discount_rate"), step=0.1,
                                 help="Annual discount rate for NPV calculation")
-        project_duration = st.slider("Project Duration (years)", min_value=1, max_value=10, value=5,
+        project_duration = st.slider("Project Duration (years)", min_value=1, max_value=10, value=loaded_input("project_duration", 5), key=input_key("project_duration"),
                                    help="Duration of the project for NPV and IRR calculations")
         
     with col2:
         # AI Impact Metrics Section
         st.markdown("### AI Impact Metrics")
-        ai_percentage = st.slider("AI Augmentation Percentage", min_value=0, max_value=100, value=30, 
+        graph_driven = st.checkbox("Derive Savings from SDLC Graph", key="graph_driven",
+                                   help="Treat the gains below as the gains at full AI adoption and scale them by "
+                                        "the AI percentages of the SDLC phases that drive them")
+        ai_percentage = st.slider("AI Augmentation Percentage", min_value=0, max_value=100, value=loaded_input("ai_percentage", 30), key=input_key("ai_percentage"), 
                                 help="Overall AI augmentation percentage across the SDLC process")
         
         # Efficiency Metrics
         st.markdown("#### Efficiency Metrics")
         col2_1, col2_2 = st.columns(2)
         with col2_1:
-            efficiency_gain = st.slider("Efficiency Gain (%)", min_value=0, max_value=100, value=25, 
+            efficiency_gain = st.slider("Efficiency Gain (%)", min_value=0, max_value=100, value=loaded_input("efficiency_gain", 25), key=input_key("efficiency_gain"), 
                                       help="Expected efficiency gain from AI tools")
-            error_reduction = st.slider("Error Reduction (%)", min_value=0, max_value=100, value=30, 
+            error_reduction = st.slider("Error Reduction (%)", min_value=0, max_value=100, value=loaded_input("error_reduction", 30), key=input_key("error_reduction"), 
                                       help="Expected reduction in errors/bugs")
         with col2_2:
-            time_savings = st.slider("Time Savings (%)", min_value=0, max_value=100, value=20, 
+            time_savings = st.slider("Time Savings (%)", min_value=0, max_value=100, value=loaded_input("time_savings", 20), key=input_key("time_savings"), 
                                    help="Expected time savings in development tasks")
-            maintenance_reduction = st.slider("Maintenance Reduction (%)", min_value=0, max_value=100, value=15,
+            maintenance_reduction = st.slider("Maintenance Reduction (%)", min_value=0, max_value=100, value=loaded_input("maintenance_reduction", 15), key=input_key("maintenance_reduction"),
                                             help="Expected reduction in maintenance efforts")
         
         # AI Implementation Costs
@@ -725,202 +475,166 @@ def main():
         with st.expander("Initial Setup Costs", expanded=True):
             col2_3, col2_4 = st.columns(2)
             with col2_3:
-                initial_ai_cost = st.number_input("AI Tool License Cost (USD)", min_value=0, value=50000, 
+                initial_ai_cost = st.number_input("AI Tool License Cost (USD)", min_value=0, value=loaded_input("initial_ai_cost", 50000), key=input_key("initial_ai_cost"), 
                                                 help="One-time cost for AI tool licenses")
-                infrastructure_cost = st.number_input("Infrastructure Setup Cost (USD)", min_value=0, value=20000,
+                infrastructure_cost = st.number_input("Infrastructure Setup Cost (USD)", min_value=0, value=loaded_input("infrastructure_cost", 20000), key=input_key("infrastructure_cost"),
                                                     help="Cost for setting up required infrastructure")
             with col2_4:
-                integration_cost = st.number_input("Integration Cost (USD)", min_value=0, value=15000,
+                integration_cost = st.number_input("Integration Cost (USD)", min_value=0, value=loaded_input("integration_cost", 15000), key=input_key("integration_cost"),
                                                 help="Cost for integrating AI tools with existing systems")
-                data_migration_cost = st.number_input("Data Migration Cost (USD)", min_value=0, value=10000,
+                data_migration_cost = st.number_input("Data Migration Cost (USD)", min_value=0, value=loaded_input("data_migration_cost", 10000), key=input_key("data_migration_cost"),
                                                     help="Cost for migrating and preparing data for AI tools")
         
         # Training & Development Costs
         with st.expander("Training & Development Costs", expanded=True):
             col2_5, col2_6 = st.columns(2)
             with col2_5:
-                ai_training_cost = st.number_input("AI Training Cost (USD)", min_value=0, value=10000, 
+                ai_training_cost = st.number_input("AI Training Cost (USD)", min_value=0, value=loaded_input("ai_training_cost", 10000), key=input_key("ai_training_cost"), 
                                                  help="Cost for team training on AI tools")
-                developer_training = st.number_input("Developer Training Hours", min_value=0, value=40,
+                developer_training = st.number_input("Developer Training Hours", min_value=0, value=loaded_input("developer_training", 40), key=input_key("developer_training"),
                                                    help="Number of training hours per developer")
             with col2_6:
-                training_rate = st.number_input("Training Rate (USD/hour)", min_value=0, value=100,
+                training_rate = st.number_input("Training Rate (USD/hour)", min_value=0, value=loaded_input("training_rate", 100), key=input_key("training_rate"),
                                               help="Cost per hour for training")
-                documentation_cost = st.number_input("Documentation Cost (USD)", min_value=0, value=5000,
+                documentation_cost = st.number_input("Documentation Cost (USD)", min_value=0, value=loaded_input("documentation_cost", 5000), key=input_key("documentation_cost"),
                                                   help="Cost for creating documentation and guidelines")
         
         # Ongoing Operational Costs
         with st.expander("Ongoing Operational Costs", expanded=True):
             col2_7, col2_8 = st.columns(2)
             with col2_7:
-                annual_ai_maintenance = st.number_input("Annual AI Maintenance Cost (USD)", min_value=0, value=20000, 
+                annual_ai_maintenance = st.number_input("Annual AI Maintenance Cost (USD)", min_value=0, value=loaded_input("annual_ai_maintenance", 20000), key=input_key("annual_ai_maintenance"), 
                                                      help="Annual cost for AI tool maintenance and updates")
-                cloud_service_cost = st.number_input("Cloud Service Cost (USD/month)", min_value=0, value=1000,
+                cloud_service_cost = st.number_input("Cloud Service Cost (USD/month)", min_value=0, value=loaded_input("cloud_service_cost", 1000), key=input_key("cloud_service_cost"),
                                                    help="Monthly cost for cloud services")
             with col2_8:
-                api_usage_cost = st.number_input("API Usage Cost (USD/month)", min_value=0, value=500,
+                api_usage_cost = st.number_input("API Usage Cost (USD/month)", min_value=0, value=loaded_input("api_usage_cost", 500), key=input_key("api_usage_cost"),
                                               help="Monthly cost for API usage")
-                support_contract = st.number_input("Support Contract Cost (USD/year)", min_value=0, value=15000,
+                support_contract = st.number_input("Support Contract Cost (USD/year)", min_value=0, value=loaded_input("support_contract", 15000), key=input_key("support_contract"),
                                                 help="Annual cost for technical support")
         
         # Additional Costs
         with st.expander("Additional Costs", expanded=True):
             col2_9, col2_10 = st.columns(2)
             with col2_9:
-                model_retraining = st.number_input("Model Retraining Cost (USD/year)", min_value=0, value=10000,
+                model_retraining = st.number_input("Model Retraining Cost (USD/year)", min_value=0, value=loaded_input("model_retraining", 10000), key=input_key("model_retraining"),
                                                 help="Annual cost for model retraining and updates")
-                productivity_loss = st.number_input("Productivity Loss During Transition (days)", min_value=0, value=5,
+                productivity_loss = st.number_input("Productivity Loss During Transition (days)", min_value=0, value=loaded_input("productivity_loss", 5), key=input_key("productivity_loss"),
                                                  help="Estimated days of productivity loss during transition")
             with col2_10:
-                transition_support = st.number_input("Transition Support Cost (USD)", min_value=0, value=8000,
+                transition_support = st.number_input("Transition Support Cost (USD)", min_value=0, value=loaded_input("transition_support", 8000), key=input_key("transition_support"),
                                                   help="Cost for additional support during transition period")
-                risk_mitigation = st.number_input("Risk Mitigation Cost (USD)", min_value=0, value=5000,
+                risk_mitigation = st.number_input("Risk Mitigation Cost (USD)", min_value=0, value=loaded_input("risk_mitigation", 5000), key=input_key("risk_mitigation"),
                                                help="Cost for risk mitigation measures")
         
         # Compliance & Security Costs
         with st.expander("Compliance & Security Costs", expanded=True):
             col2_11, col2_12 = st.columns(2)
             with col2_11:
-                security_audit = st.number_input("Security Audit Cost (USD)", min_value=0, value=12000,
+                security_audit = st.number_input("Security Audit Cost (USD)", min_value=0, value=loaded_input("security_audit", 12000), key=input_key("security_audit"),
                                               help="Cost for security audit and compliance checks")
-                data_privacy = st.number_input("Data Privacy Implementation Cost (USD)", min_value=0, value=8000,
+                data_privacy = st.number_input("Data Privacy Implementation Cost (USD)", min_value=0, value=loaded_input("data_privacy", 8000), key=input_key("data_privacy"),
                                             help="Cost for implementing data privacy measures")
             with col2_12:
-                compliance_certification = st.number_input("Compliance Certification Cost (USD)", min_value=0, value=10000,
+                compliance_certification = st.number_input("Compliance Certification Cost (USD)", min_value=0, value=loaded_input("compliance_certification", 10000), key=input_key("compliance_certification"),
                                                         help="Cost for obtaining necessary certifications")
 
+    # Collect calculator inputs for the impact engine
+    inputs = {
+        "team_size": team_size,
+        "avg_salary": avg_salary,
+        "current_cycle_time": current_cycle_time,
+        "current_velocity": current_velocity,
+        "sprint_duration": sprint_duration,
+        "features_per_sprint": features_per_sprint,
+        "discount_rate": discount_rate,
+        "project_duration": project_duration,
+        "ai_percentage": ai_percentage,
+        "efficiency_gain": efficiency_gain,
+        "error_reduction": error_reduction,
+        "time_savings": time_savings,
+        "maintenance_reduction": maintenance_reduction,
+        "initial_ai_cost": initial_ai_cost,
+        "infrastructure_cost": infrastructure_cost,
+        "integration_cost": integration_cost,
+        "data_migration_cost": data_migration_cost,
+        "ai_training_cost": ai_training_cost,
+        "developer_training": developer_training,
+        "training_rate": training_rate,
+        "documentation_cost": documentation_cost,
+        "annual_ai_maintenance": annual_ai_maintenance,
+        "cloud_service_cost": cloud_service_cost,
+        "api_usage_cost": api_usage_cost,
+        "support_contract": support_contract,
+        "model_retraining": model_retraining,
+        "productivity_loss": productivity_loss,
+        "transition_support": transition_support,
+        "risk_mitigation": risk_mitigation,
+        "security_audit": security_audit,
+        "data_privacy": data_privacy,
+        "compliance_certification": compliance_certification,
+    }
+    
+    # A portfolio team keeps the gains at full adoption and derives the rest from its own graph copy
+    team_inputs = dict(inputs)
+    if graph_driven:
+        # The AI percentage and the savings inputs follow the leaf AI percentages of the graph
+        rollup, weights = get_graph_rollup(graph)
+        derived = graph_driven_inputs(inputs, weights, rollup.leaf_values(graph))
+        inputs.update({name: float(derived[name]) for name in SAVINGS_DRIVERS})
+        st.info(f"From the SDLC graph: AI augmentation {inputs['ai_percentage']:.1f}%, "
+                f"efficiency gain {inputs['efficiency_gain']:.1f}%, time savings {inputs['time_savings']:.1f}%, "
+                f"maintenance reduction {inputs['maintenance_reduction']:.1f}%")
+    
+    timer.lap("Calculator inputs")
+    
     # Calculate metrics
+    impact = None
     if st.button("Calculate Impact") or st.session_state.get('show_results', False):
-        # Calculate total costs
-        total_initial_cost = (initial_ai_cost + infrastructure_cost + integration_cost + 
-                            data_migration_cost + security_audit + data_privacy + 
-                            compliance_certification)
-        
-        total_training_cost = (ai_training_cost + (developer_training * training_rate * team_size) + 
-                             documentation_cost)
-        
-        total_annual_cost = (annual_ai_maintenance + (cloud_service_cost * 12) + 
-                           (api_usage_cost * 12) + support_contract + model_retraining)
-        
-        total_indirect_cost = ((productivity_loss * team_size * (avg_salary/260)) + 
-                             transition_support + risk_mitigation)
-        
-        total_ai_cost = total_initial_cost + total_training_cost + total_annual_cost + total_indirect_cost
-        
-        # Calculate costs and time metrics
-        annual_team_cost = team_size * avg_salary
-        sprints_per_month = 4 / sprint_duration
-        features_per_month = features_per_sprint * sprints_per_month
-        
-        # Calculate new cycle time with AI impact
-        new_cycle_time = current_cycle_time * (1 - (efficiency_gain / 100))
-        cycle_time_reduction = current_cycle_time - new_cycle_time
-        
-        # Calculate savings
-        efficiency_savings = annual_team_cost * (efficiency_gain / 100)
-        error_reduction_savings = annual_team_cost * (error_reduction / 100) * 0.3  # Assuming 30% of time spent on fixing errors
-        time_savings_amount = annual_team_cost * (time_savings / 100)
-        maintenance_savings = annual_team_cost * (maintenance_reduction / 100) * 0.2  # Assuming 20% of time spent on maintenance
-        
-        total_savings = efficiency_savings + error_reduction_savings + time_savings_amount + maintenance_savings
-        net_savings = total_savings - total_annual_cost  # Subtract annual AI costs
+        # Reuse stored results for known inputs, otherwise evaluate and save them
+        scenario_id, impact, cached = get_scenario_store().get_or_compute(inputs)
+        # Only a scenario saved before this session's last calculation counts as recalled
+        recalled = cached and st.session_state.get('scenario_id') != scenario_id
+        st.session_state.scenario_id = scenario_id
         
-        # Calculate productivity metrics
-        new_velocity = current_velocity * (1 + (efficiency_gain / 100))
-        productivity_gain = (new_velocity - current_velocity) / current_velocity * 100
-        additional_features_per_month = features_per_month * (efficiency_gain / 100)
-        
-        # Calculate ROI and payback period
-        roi = ((net_savings - total_ai_cost) / total_ai_cost) * 100
-        payback_period = total_ai_cost / net_savings  # in years
-
-        # Calculate NPV and IRR
+        annual_team_cost = impact["Annual Team Cost"]
+        total_initial_cost = impact["Total Initial Cost"]
+        total_training_cost = impact["Total Training Cost"]
+        total_annual_cost = impact["Total Annual Cost"]
+        total_indirect_cost = impact["Total Indirect Cost"]
+        total_ai_cost = impact["Total AI Cost"]
+        new_cycle_time = impact["New Cycle Time"]
+        efficiency_savings = impact["Efficiency Savings"]
+        error_reduction_savings = impact["Error Reduction Savings"]
+        time_savings_amount = impact["Time Savings"]
+        maintenance_savings = impact["Maintenance Savings"]
+        total_savings = impact["Total Savings"]
+        net_savings = impact["Net Savings"]
+        roi = impact["ROI"]
+        payback_period = impact["Payback Period"]
+        npv = impact["NPV"]
+        irr = impact["IRR"]
+        profitability_index = impact["Profitability Index"]
+        discounted_payback_period = impact["Discounted Payback Period"]
+        free_cash_flow = impact["Free Cash Flow"]
+        roi_per_employee = impact["ROI per Employee"]
+        cost_savings_ratio = impact["Cost Savings Ratio"]
+        ai_investment_efficiency = impact["AI Investment Efficiency"]
+        annual_savings_per_employee = impact["Annual Savings per Employee"]
+        feature_cost_reduction = impact["Feature Cost Reduction"]
+        ai_cost_per_feature = impact["AI Cost per Feature"]
+        break_even_features = impact["Break-even Features"]
+        new_velocity = impact["New Velocity"]
+        features_per_month = impact["Current Features per Month"]
+        additional_features_per_month = impact["Additional Features per Month"]
         initial_investment = total_initial_cost + total_training_cost + total_indirect_cost
-        annual_cash_flow = net_savings - total_annual_cost
-        
-        # Calculate NPV
-        npv = -initial_investment
-        for year in range(1, project_duration + 1):
-            npv += annual_cash_flow / ((1 + discount_rate/100) ** year)
-        
-        # Calculate IRR using trial and error method
-        def calculate_npv(rate, initial_investment, annual_cash_flow, years):
-            npv = -initial_investment
-            for year in range(1, years + 1):
-                npv += annual_cash_flow / ((1 + rate) ** year)
-            return npv
-        
-        def find_irr(initial_investment, annual_cash_flow, years):
-            # Start with a reasonable range
-            low_rate = 0.0
-            high_rate = 1.0
-            precision = 0.0001
-            
-            while high_rate - low_rate > precision:
-                mid_rate = (low_rate + high_rate) / 2
-                npv = calculate_npv(mid_rate, initial_investment, annual_cash_flow, years)
-                
-                if npv > 0:
-                    low_rate = mid_rate
-                else:
-                    high_rate = mid_rate
-            
-            return (low_rate + high_rate) / 2 * 100
-        
-        irr = find_irr(initial_investment, annual_cash_flow, project_duration)
-        
-        # Calculate Profitability Index
-        profitability_index = (npv + initial_investment) / initial_investment
-        
-        # Calculate Discounted Payback Period
-        cumulative_discounted_cash_flow = 0
-        discounted_payback_period = project_duration  # Default to project duration if not achieved
-        for year in range(1, project_duration + 1):
-            discounted_cash_flow = annual_cash_flow / ((1 + discount_rate/100) ** year)
-            cumulative_discounted_cash_flow += discounted_cash_flow
-            if cumulative_discounted_cash_flow >= initial_investment:
-                discounted_payback_period = year
-                break
-        
-        # Calculate additional financial metrics
-        # Free Cash Flow (FCF)
-        free_cash_flow = net_savings - total_annual_cost
-
-        # ROI per Employee
-        roi_per_employee = (net_savings - total_ai_cost) / team_size
-
-        # Cost Savings Ratio
-        cost_savings_ratio = total_savings / total_ai_cost
-
-        # AI Investment Efficiency Ratio
-        ai_investment_efficiency = net_savings / total_ai_cost
-
-        # Annual Savings per Employee
-        annual_savings_per_employee = net_savings / team_size
-
-        # Feature Cost Reduction
-        current_feature_cost = annual_team_cost / (features_per_month * 12)
-        new_feature_cost = annual_team_cost / ((features_per_month + additional_features_per_month) * 12)
-        feature_cost_reduction = ((current_feature_cost - new_feature_cost) / current_feature_cost) * 100
-
-        # AI Cost per Feature
-        ai_cost_per_feature = total_ai_cost / (additional_features_per_month * 12)
-
-        # Break-even Features
-        break_even_features = total_ai_cost / (current_feature_cost - new_feature_cost)
-
-        # AI Impact Score (composite metric)
-        ai_impact_score = (
-            (efficiency_gain * 0.3) +
-            (error_reduction * 0.2) +
-            (time_savings * 0.2) +
-            (maintenance_reduction * 0.1) +
-            (productivity_gain * 0.2)
-        )
+        annual_cash_flow = free_cash_flow
         
         # Display results in a more organized way
         st.markdown("---")
         st.markdown("### Results")
+        if recalled:
+            st.caption(f"Stored results of Scenario {scenario_id} (these inputs were calculated before)")
         
         # Create results columns
         results_col1, results_col2, results_col3, results_col4 = st.columns(4)
@@ -944,8 +658,14 @@ def main():
                      help="Formula: ((Net Savings - Total AI Cost) / Total AI Cost) × 100")
             st.metric("NPV", format_number(npv), 
                      help="Net Present Value of the investment")
-            st.metric("IRR", f"{irr:.1f}%", 
-                     help="Internal Rate of Return")
+            if np.isnan(irr):
+                st.metric("IRR", "n/a", help="No internal rate of return exists for these cash flows")
+            elif impact["IRR Solutions"] > 1:
+                st.metric("IRR", f"{irr:.1f}%",
+                         help="Internal Rate of Return (the cash flows have several IRRs; the one closest to 0% is shown)")
+            else:
+                st.metric("IRR", f"{irr:.1f}%", 
+                         help="Internal Rate of Return")
             st.metric("Profitability Index", f"{profitability_index:.2f}", 
                      help="Ratio of present value of future cash flows to initial investment")
         
@@ -1043,15 +763,10 @@ def main():
         # Add ROI Trend Chart
         st.markdown("#### ROI Trend Over Time")
         
-        # Calculate ROI for each year
-        years = list(range(1, project_duration + 1))
-        roi_trend = []
-        cumulative_investment = initial_investment
-        
-        for year in years:
-            annual_roi = (annual_cash_flow * year - cumulative_investment) / cumulative_investment * 100
-            roi_trend.append(annual_roi)
-            cumulative_investment += total_annual_cost
+        # Calculate ROI for every year at once; the investment grows by the annual cost each year
+        years = np.arange(1, project_duration + 1)
+        cumulative_investment = initial_investment + total_annual_cost * (years - 1)
+        roi_trend = (annual_cash_flow * years - cumulative_investment) / cumulative_investment * 100
         
         # Create ROI trend DataFrame
         roi_df = pd.DataFrame({
@@ -1065,10 +780,200 @@ def main():
         # Display ROI trend as a table with formatted values
         roi_df['ROI'] = roi_df['ROI'].apply(lambda x: f"{x:.1f}%")
         st.dataframe(roi_df, hide_index=True)
+        
+        # Time-phased cash flows: adoption ramp-up, inflation, growth and cost escalation
+        with st.expander("Multi-Year Cash Flow Model", expanded=False):
+            st.write("Spread the annual cash flow over the project with a gradual adoption and changing costs. "
+                     "With yearly periods the defaults reproduce the results above; monthly periods realize "
+                     "savings within each year, so NPV, IRR and payback come out better.")
+            phase_col1, phase_col2, phase_col3 = st.columns(3)
+            with phase_col1:
+                granularity = st.radio("Periods", list(PERIODS_PER_YEAR), horizontal=True)
+                adoption_initial = st.slider("Adoption at Launch (%)", 0, 100, 100,
+                                             help="Share of the full savings realized in the first period")
+                adoption_years_to_90 = st.slider("Years to 90% Adoption", 0.0, 5.0, 1.0, step=0.25,
+                                                 help="Length of the adoption S-curve")
+            with phase_col2:
+                salary_inflation = st.slider("Salary Inflation (%/year)", 0.0, 10.0, 0.0, step=0.5,
+                                             help="Yearly growth of salaries, and of the savings with them")
+                team_growth = st.slider("Team Growth (%/year)", -10.0, 30.0, 0.0, step=1.0,
+                                        help="Yearly growth of the team size")
+            with phase_col3:
+                cost_escalation = st.slider("Cost Escalation (%/year)", 0.0, 15.0, 0.0, step=0.5,
+                                            help="Yearly growth of the recurring AI costs")
+            
+            periods_per_year = PERIODS_PER_YEAR[granularity]
+            phased = compute_phased_impact(inputs, {
+                "adoption_initial": adoption_initial,
+                "adoption_years_to_90": adoption_years_to_90,
+                "salary_inflation": salary_inflation,
+                "team_growth": team_growth,
+                "cost_escalation": cost_escalation,
+            }, periods_per_year)
+            
+            phased_col1, phased_col2, phased_col3 = st.columns(3)
+            with phased_col1:
+                st.metric("Phased NPV", format_number(phased["NPV"][0]),
+                          delta=format_number(phased["NPV"][0] - npv))
+            with phased_col2:
+                phased_irr = phased["IRR"][0]
+                st.metric("Phased IRR", "n/a" if np.isnan(phased_irr) else f"{phased_irr:.1f}%")
+            with phased_col3:
+                st.metric("Phased Discounted Payback", f"{phased['Discounted Payback Period'][0]:.2f} years")
+            
+            yearly = yearly_totals(phased["Cash Flows"], periods_per_year)[0]
+            cash_flow_df = pd.DataFrame({
+                'Year': np.arange(1, len(yearly) + 1),
+                'Phased Cash Flow': yearly,
+                'Flat Cash Flow': annual_cash_flow,
+            })
+            st.line_chart(cash_flow_df.set_index('Year'))
+        
+        # Keep this configuration as one team of the portfolio
+        with st.expander("Add to Portfolio", expanded=False):
+            team_name = st.text_input("Team Name", placeholder="Name of this team")
+            team_group = st.text_input("Team Group", placeholder="Group or department, optional")
+            if st.button("Add Team") and team_name.strip():
+                get_portfolio().set_team(team_name.strip(), team_inputs, team_group.strip(),
+                                         graph.copy() if graph_driven else None)
+                st.success(f"Added {team_name.strip()} to the portfolio ({len(get_portfolio())} teams)")
 
         # Set show_results to True after calculation
         st.session_state.show_results = True
 
+    timer.lap("Calculator results")
+    
+    # Saved scenarios: every calculated configuration is stored by its inputs
+    scenario_store = get_scenario_store()
+    saved_scenarios = scenario_store.list_scenarios()
+    if saved_scenarios:
+        st.markdown("---")
+        st.markdown("### Saved Scenarios")
+        
+        scenario_ids = {ScenarioStore.label(scenario): scenario["id"] for scenario in saved_scenarios}
+        st.dataframe(pd.DataFrame([{
+            "Scenario": ScenarioStore.label(scenario),
+            "Saved": scenario["created_at"],
+            "NPV": format_number(scenario["results"]["NPV"]),
+            "ROI": f'{scenario["results"]["ROI"]:.1f}%',
+            "IRR": "n/a" if np.isnan(scenario["results"]["IRR"]) else f'{scenario["results"]["IRR"]:.1f}%',
+            "Discounted Payback": f'{scenario["results"]["Discounted Payback Period"]:.0f} years',
+        } for scenario in saved_scenarios]), hide_index=True)
+        
+        scenario_col1, scenario_col2 = st.columns(2)
+        with scenario_col1:
+            selected_id = scenario_ids[st.selectbox("Scenario", list(scenario_ids))]
+            scenario_name = st.text_input("Scenario Name", placeholder="Name for the selected scenario")
+            load_col, rename_col = st.columns(2)
+            with load_col:
+                if st.button("Load Scenario"):
+                    # Seed the calculator inputs with the stored ones and show its results
+                    st.session_state.loaded_inputs = scenario_store.get_scenarios([selected_id])[0]["inputs"]
+                    st.session_state.loaded_generation = st.session_state.get('loaded_generation', 0) + 1
+                    st.session_state.show_results = True
+                    st.experimental_rerun()
+            with rename_col:
+                if st.button("Rename Scenario") and scenario_name.strip():
+                    scenario_store.rename_scenario(selected_id, scenario_name.strip())
+                    st.experimental_rerun()
+        
+        with scenario_col2:
+            compared_labels = st.multiselect("Compare Scenarios", list(scenario_ids), max_selections=6)
+        
+        if compared_labels:
+            # One column per scenario, inputs above results
+            compared = scenario_store.get_scenarios(scenario_ids[label] for label in compared_labels)
+            comparison = pd.DataFrame(
+                {ScenarioStore.label(scenario): {**scenario["inputs"], **scenario["results"]}
+                 for scenario in compared})
+            st.dataframe(comparison, use_container_width=True)
+
+    timer.lap("Saved scenarios")
+    
+    # Monte Carlo uncertainty analysis
+    st.markdown("---")
+    st.markdown("### Uncertainty Analysis")
+    
+    with st.expander("Monte Carlo Simulation", expanded=False):
+        st.write("Replace point estimates with distributions and simulate the spread of outcomes.")
+        uncertain_inputs = st.multiselect(
+            "Uncertain Inputs",
+            list(inputs),
+            default=["efficiency_gain", "error_reduction", "time_savings", "maintenance_reduction"],
+            help="Inputs to sample from a distribution instead of using the value above")
+        
+        distributions = {}
+        for name in uncertain_inputs:
+            value = float(inputs[name])
+            spread = abs(value) * 0.2
+            mc_col1, mc_col2, mc_col3 = st.columns(3)
+            with mc_col1:
+                kind = st.selectbox(name, list(DISTRIBUTIONS), key=f"mc_kind_{name}")
+            if kind == "normal":
+                with mc_col2:
+                    std = st.number_input("Std Dev", min_value=0.0, value=spread / 2, key=f"mc_std_{name}")
+                with mc_col3:
+                    low = st.number_input("Lower Bound", value=0.0, key=f"mc_low_{name}")
+                distributions[name] = ("normal", value, std, low, np.inf)
+            else:
+                with mc_col2:
+                    low = st.number_input("Low", value=value - spread, key=f"mc_low_{name}")
+                with mc_col3:
+                    high = st.number_input("High", min_value=low, value=max(value + spread, low), key=f"mc_high_{name}")
+                if kind == "triangular":
+                    distributions[name] = ("triangular", low, min(max(value, low), high), high)
+                else:
+                    distributions[name] = ("uniform", low, high)
+        
+        draws = st.number_input("Number of Draws", min_value=1000, max_value=1_000_000, value=100_000, step=10_000)
+        
+        if st.button("Run Simulation"):
+            samples = run_simulation(inputs, distributions, draws=int(draws))
+            st.session_state.monte_carlo = {
+                "summary": summarize(samples),
+                "histograms": {metric: histogram(values) for metric, values in samples.items()},
+            }
+        
+        if 'monte_carlo' in st.session_state:
+            # Plotly is only needed for these charts, so it is imported on first use
+            import plotly.express as px
+            
+            simulation = st.session_state.monte_carlo
+            st.markdown("#### Percentiles")
+            st.dataframe(simulation["summary"].style.format("{:,.2f}"))
+            
+            hist_cols = st.columns(2)
+            for i, (metric, hist_df) in enumerate(simulation["histograms"].items()):
+                with hist_cols[i % 2]:
+                    fig = px.bar(hist_df, x="Value", y="Count", title=metric)
+                    fig.update_layout(bargap=0, height=300)
+                    st.plotly_chart(fig, use_container_width=True)
+    
+    with st.expander("Sensitivity Analysis", expanded=False):
+        st.write("Perturb each input one at a time and rank inputs by their impact on the selected metric.")
+        sens_col1, sens_col2 = st.columns(2)
+        with sens_col1:
+            sensitivity_metric = st.selectbox("Metric", SENSITIVITY_METRICS)
+        with sens_col2:
+            sensitivity_change = st.radio("Perturbation", ["±10%", "±20%"], index=1, horizontal=True)
+        
+        if st.button("Run Sensitivity Analysis"):
+            st.session_state.sensitivity = sensitivity_analysis(inputs)
+        
+        if 'sensitivity' in st.session_state:
+            import plotly.express as px
+            
+            change = float(sensitivity_change.strip("±%")) / 100
+            tornado_df = tornado_data(st.session_state.sensitivity, sensitivity_metric, change)
+            tornado_df = tornado_df[tornado_df.groupby("Input")["Delta"].transform(lambda d: d.abs().max()) > 0]
+            fig = px.bar(tornado_df, x="Delta", y="Input", color="Change", orientation="h",
+                         barmode="overlay", title=f"{sensitivity_metric} sensitivity ({sensitivity_change})")
+            fig.update_layout(yaxis={"categoryorder": "array", "categoryarray": tornado_df["Input"].unique()[::-1]},
+                              height=max(300, 25 * tornado_df["Input"].nunique()))
+            st.plotly_chart(fig, use_container_width=True)
+    
+    timer.lap("Uncertainty analysis")
+    
     # Add custom notes section
     st.markdown("---")
     st.markdown("### Notes")
@@ -1097,7 +1002,7 @@ def main():
         if submit_button:
             if email.strip():
                 # Add note to database
-                add_note(email, notes)
+                get_notes_repository().add_note(email, notes)
                 st.success("Notes submitted successfully!")
                 # Clear the notes after successful submission
                 st.session_state.notes = ""
@@ -1106,70 +1011,77 @@ def main():
             else:
                 st.error("Please enter your email to submit notes")
     
+    timer.lap("Notes form")
+    
     # Display notes history
     st.markdown("---")
     st.markdown("### Notes History")
     
-    # Get all notes from database
-    all_notes = get_all_notes()
+    notes_repository = get_notes_repository()
+    total_notes = notes_repository.count_notes()
+    
+    if total_notes and notes_repository.search_enabled:
+        # Full-text search replaces the chronological list while a query is entered
+        search_col, email_col, date_col = st.columns([2, 1, 1])
+        with search_col:
+            search_text = st.text_input("Search Notes", placeholder="Words to find in notes")
+        with email_col:
+            search_email = st.text_input("From Email")
+        with date_col:
+            search_dates = st.date_input("Date Range", value=())
+    else:
+        search_text = ""
     
-    if all_notes:
-        # Create a DataFrame for better display
-        notes_df = pd.DataFrame(all_notes, columns=['ID', 'Email', 'Notes', 'Timestamp'])
-        notes_df['Timestamp'] = pd.to_datetime(notes_df['Timestamp'])
+    if search_text.strip():
+        start = end = None
+        if len(search_dates) >= 1:
+            start = search_dates[0]
+        if len(search_dates) == 2:
+            # Include every note written on the last selected day
+            end = search_dates[1] + timedelta(days=1)
+        matches = notes_repository.search_notes(
+            search_text, email=search_email.strip() or None, start=start, end=end, limit=NOTES_PAGE_SIZE)
+        
+        st.caption(f"{len(matches)} best matching notes")
+        for note_id, email, note_text, timestamp, snippet in matches:
+            st.markdown(snippet)
+            with st.expander(f"Notes from {email} ({str(timestamp)[:19]})"):
+                st.write(note_text)
+    elif total_notes:
+        # Load the newest page plus any older pages the user asked for, one keyset page at a time
+        if 'notes_pages' not in st.session_state:
+            st.session_state.notes_pages = 1
+        
+        loaded_notes = []
+        cursor = None
+        for _ in range(st.session_state.notes_pages):
+            page = notes_repository.get_notes_page(NOTES_PAGE_SIZE, before=cursor)
+            loaded_notes += page
+            if len(page) < NOTES_PAGE_SIZE:
+                break
+            cursor = notes_repository.page_cursor(page)
+        
+        st.caption(f"Showing {len(loaded_notes)} of {total_notes} notes")
         
         # Display each note in a card-like format
-        for _, note in notes_df.iterrows():
-            with st.expander(f"Notes from {note['Email']} ({note['Timestamp'].strftime('%Y-%m-%d %H:%M:%S')})"):
-                st.write(note['Notes'])
+        for note_id, email, note_text, timestamp in loaded_notes:
+            with st.expander(f"Notes from {email} ({str(timestamp)[:19]})"):
+                st.write(note_text)
+        
+        if len(loaded_notes) < total_notes and st.button("Load Older Notes"):
+            st.session_state.notes_pages += 1
+            st.experimental_rerun()
     else:
         st.info("No notes have been submitted yet.")
 
+    timer.lap("Notes history")
+    
     # Add download button for results
-    if st.session_state.get('show_results', False):
-        results = {
-            "Annual Team Cost": annual_team_cost,
-            "Total Initial Cost": total_initial_cost,
-            "Total Training Cost": total_training_cost,
-            "Total Annual Cost": total_annual_cost,
-            "Total Indirect Cost": total_indirect_cost,
-            "Total AI Cost": total_ai_cost,
-            "Current Cycle Time": current_cycle_time,
-            "New Cycle Time": new_cycle_time,
-            "Cycle Time Reduction": cycle_time_reduction,
-            "Cycle Time Improvement": (cycle_time_reduction/current_cycle_time)*100,
-            "Efficiency Savings": efficiency_savings,
-            "Error Reduction Savings": error_reduction_savings,
-            "Time Savings": time_savings_amount,
-            "Maintenance Savings": maintenance_savings,
-            "Total Savings": total_savings,
-            "Net Savings": net_savings,
-            "Monthly Savings": net_savings/12,
-            "Daily Savings": net_savings/365,
-            "ROI": roi,
-            "Payback Period": payback_period,
-            "NPV": npv,
-            "IRR": irr,
-            "Profitability Index": profitability_index,
-            "Discounted Payback Period": discounted_payback_period,
-            "Free Cash Flow": free_cash_flow,
-            "ROI per Employee": roi_per_employee,
-            "Cost Savings Ratio": cost_savings_ratio,
-            "AI Investment Efficiency": ai_investment_efficiency,
-            "Annual Savings per Employee": annual_savings_per_employee,
-            "Feature Cost Reduction": feature_cost_reduction,
-            "AI Cost per Feature": ai_cost_per_feature,
-            "Break-even Features": break_even_features,
-            "AI Impact Score": ai_impact_score,
-            "Current Velocity": current_velocity,
-            "New Velocity": new_velocity,
-            "Velocity Improvement": (new_velocity - current_velocity)/current_velocity*100,
-            "Current Features per Month": features_per_month,
-            "Additional Features per Month": additional_features_per_month,
-            "Total Features per Month": features_per_month + additional_features_per_month,
-            "Cost per Feature": total_ai_cost/(additional_features_per_month*12),
-            "Notes": notes
-        }
+    if st.session_state.get('show_results', False) and impact is not None:
+        results = dict(impact)
+        results["Current Cycle Time"] = current_cycle_time
+        results["Current Velocity"] = current_velocity
+        results["Notes"] = notes
         
         # Convert results to CSV
         df = pd.DataFrame([results])
@@ -1180,6 +1092,7 @@ def main():
             file_name="ai_impact_calculator_results.csv",
             mime="text/csv"
         )
+    timer.lap("Results download")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
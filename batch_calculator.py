@@ -0,0 +1,144 @@
+"""Headless batch evaluation of the AI impact calculator.
+
+Reads a CSV or Parquet file with one team configuration per row, using the
+calculator input names of impact_engine.INPUT_DEFAULTS as columns (missing
+inputs and blank cells take the UI defaults, other columns are passed
+through), and writes every result metric next to the original columns:
+
+    python batch_calculator.py teams.csv results.csv
+    python batch_calculator.py teams.parquet results.parquet --workers 8
+
+Chunks are evaluated in a process pool with the same impact engine the
+Streamlit app uses, so both paths give identical numbers.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from impact_engine import INPUT_DEFAULTS, compute_impact_frame
+
+# Rows read, evaluated and written at a time
+CHUNK_SIZE = 50_000
+
+
+def evaluate_chunk(chunk):
+    """Append every calculator metric to a chunk of input rows; blank inputs take the UI defaults"""
+    inputs = chunk[[name for name in chunk.columns if name in INPUT_DEFAULTS]].fillna(INPUT_DEFAULTS)
+    results = compute_impact_frame(inputs)
+    results.index = chunk.index
+    return pd.concat([chunk, results], axis=1)
+
+
+def file_format(path):
+    return "parquet" if os.path.splitext(path)[1].lower() in (".parquet", ".pq") else "csv"
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of up to ``chunk_size`` rows without loading the whole file"""
+    if file_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        # Fixed dtypes keep every chunk's schema the same, even when a chunk has blanks
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=dict.fromkeys(INPUT_DEFAULTS, float))
+
+
+class ChunkWriter:
+    """Append result chunks to a CSV or Parquet file as they arrive.
+
+    Both formats go through pyarrow (installed with Streamlit), whose CSV
+    writer is several times faster than DataFrame.to_csv and still writes
+    floats that read back exactly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = file_format(path)
+        self._writer = None
+        self._schema = None
+
+    def write(self, frame):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                import pyarrow.csv as pa_csv
+
+                self._writer = pa_csv.CSVWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def run_batch(input_path, output_path, workers=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Evaluate every row of ``input_path`` and stream the results to ``output_path``.
+
+    Up to two chunks per worker are in flight at once, so memory stays
+    bounded however large the input is. Results keep the input row order.
+    ``progress`` is called with (rows_done, seconds_elapsed) after each chunk.
+    Returns (rows, seconds).
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = ChunkWriter(output_path)
+    start = time.perf_counter()
+    rows = 0
+
+    def written(frame):
+        nonlocal rows
+        writer.write(frame)
+        rows += len(frame)
+        if progress:
+            progress(rows, time.perf_counter() - start)
+
+    try:
+        if workers == 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                written(evaluate_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(evaluate_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        written(pending.popleft().result())
+                while pending:
+                    written(pending.popleft().result())
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the AI impact calculator for every row of a file")
+    parser.add_argument("input", help="CSV or Parquet file with one configuration per row")
+    parser.add_argument("output", help="CSV or Parquet file to write the results to")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    def progress(rows, seconds):
+        print(f"{rows:,} rows ({rows / max(seconds, 1e-9):,.0f} rows/sec)", file=sys.stderr)
+
+    rows, seconds = run_batch(args.input, args.output, args.workers, args.chunk_size,
+                              progress=None if args.quiet else progress)
+    print(f"Evaluated {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Cold-import benchmark for the engine modules.
+
+Each module is imported in a fresh interpreter several times and the
+fastest import is compared with its budget. The check also fails when a
+module pulls in a heavy dependency it should only load lazily, so
+scripts and worker processes stay cheap to start:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in ms, modules it must not import eagerly)
+IMPORT_BUDGETS = {
+    "finance": (200, ["pandas", "networkx", "streamlit"]),
+    "impact_engine": (200, ["pandas", "networkx", "streamlit"]),
+    "graph_state": (200, ["networkx", "pandas", "streamlit"]),
+    "graph_layout": (200, ["networkx", "pandas", "streamlit"]),
+    "graph_view": (200, ["networkx", "pandas", "streamlit"]),
+    "graph_rollup": (200, ["networkx", "pandas", "streamlit"]),
+    "graph_history": (200, ["networkx", "pandas", "streamlit"]),
+    "graph_batch": (200, ["networkx", "pandas", "streamlit"]),
+    "graph_io": (200, ["networkx", "pandas", "pyarrow", "streamlit"]),
+    "sdlc_graph": (300, ["pandas", "streamlit"]),
+    "notes_store": (100, ["numpy", "pandas", "streamlit"]),
+    "scenario_store": (200, ["pandas", "networkx", "streamlit"]),
+    "api_server": (500, ["pandas", "streamlit"]),
+    "monte_carlo": (200, ["pandas", "networkx", "streamlit"]),
+    "sensitivity": (200, ["pandas", "networkx", "streamlit"]),
+    "cash_flow_model": (200, ["pandas", "networkx", "streamlit"]),
+    # Teams and results are DataFrames, so pandas is part of the budget
+    "portfolio": (600, ["networkx", "streamlit"]),
+}
+# Fresh interpreters started per module; the fastest run is reported
+REPEATS = 5
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module, repeats=REPEATS):
+    """Fastest cold import of ``module`` in seconds, and the modules it loaded"""
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output))
+    return min(run["seconds"] for run in runs), set(runs[0]["modules"])
+
+
+def run(budgets=IMPORT_BUDGETS, repeats=REPEATS):
+    results = {}
+    for module, (budget_ms, forbidden) in budgets.items():
+        seconds, loaded = measure(module, repeats)
+        eager = [name for name in forbidden if name in loaded]
+        results[module] = {
+            "ms": round(seconds * 1000, 1),
+            "budget_ms": budget_ms,
+            "eager_imports": eager,
+            "ok": seconds * 1000 <= budget_ms and not eager,
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold import times of the engine modules")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    args = parser.parse_args(argv)
+
+    results = run(repeats=args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results.items():
+            status = "ok" if result["ok"] else "FAIL"
+            eager = f"  eagerly imports {', '.join(result['eager_imports'])}" if result["eager_imports"] else ""
+            print(f"{module:<16} {result['ms']:>7.1f} ms / {result['budget_ms']} ms  {status}{eager}")
+    sys.exit(0 if all(result["ok"] for result in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Benchmark suite for the project's hot paths.
+
+Times graph construction, (de)serialization, AI percentage rollups
+(including the sparse rollup matrix and graph-driven savings sweeps),
+edit/undo round trips through the graph history (single edits and a batch
+reorganization), streaming import and export in every interchange format,
+visualization HTML, the finance math and the notes store at a range of
+graph sizes and scenario counts, and writes the results as JSON:
+
+    python benchmarks/run.py                      # quick scales
+    python benchmarks/run.py --scale full --output results.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json --threshold 0.25
+
+With ``--baseline`` every case is compared with the stored result of the
+same name and the run fails when one is slower by more than the threshold.
+Cases are compared by their best time, and a case that looks slower is timed
+again before it counts as a regression, so one noisy run does not fail the
+suite. Cases missing from the baseline are reported but never fail the run.
+"""
+import argparse
+import atexit
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import finance  # noqa: E402
+from graph_history import GraphHistory  # noqa: E402
+from graph_io import GRAPH_FORMATS, export_bytes, read_graph  # noqa: E402
+from graph_rollup import RollupMatrix, driver_weights, sweep  # noqa: E402
+from graph_state import GraphState  # noqa: E402
+from graph_view import render_graph  # noqa: E402
+from impact_engine import compute_impact  # noqa: E402
+from notes_store import NotesRepository  # noqa: E402
+from sdlc_graph import (create_sdlc_graph, deserialize_graph, propagate_ai_percentages,  # noqa: E402
+                        serialize_graph, update_parent_ai_percentages)
+
+# Graph sizes (nodes) and scenario counts per scale; 44 is the default SDLC graph
+SCALES = {
+    "quick": {"nodes": [44, 1_000], "scenarios": [1, 1_000], "notes": [1_000]},
+    "full": {"nodes": [44, 1_000, 10_000, 100_000], "scenarios": [1, 1_000, 100_000, 1_000_000],
+             "notes": [1_000, 100_000]},
+}
+# Minimum timed runs per case; the best time is compared with the baseline
+REPEATS = 5
+# Fast cases keep repeating until their timed runs add up to this many seconds, up to MAX_REPEATS
+MIN_CASE_SECONDS = 0.25
+MAX_REPEATS = 50
+# Default allowed slowdown against the baseline (0.25 = 25%)
+THRESHOLD = 0.25
+# Slowdowns smaller than this many seconds are timer noise, never regressions
+MIN_REGRESSION_SECONDS = 0.002
+
+
+def synthetic_graph(nodes, branching=4, seed=0):
+    """The SDLC graph grown breadth-first to ``nodes`` nodes with random leaf percentages"""
+    rng = random.Random(seed)
+    G = create_sdlc_graph()
+    leaves = [node for node in G.nodes() if G.out_degree(node) == 0]
+    queue = list(leaves)
+    position = 0
+    while G.number_of_nodes() < nodes:
+        parent = queue[position]
+        position += 1
+        for _ in range(min(branching, nodes - G.number_of_nodes())):
+            child = f"Task {G.number_of_nodes()}"
+            G.add_node(child, level=G.nodes[parent]["level"] + 1, ai_percentage=0)
+            G.add_edge(parent, child)
+            queue.append(child)
+    for node in G.nodes():
+        if G.out_degree(node) == 0:
+            G.nodes[node]["ai_percentage"] = rng.uniform(0, 100)
+    update_parent_ai_percentages(G)
+    return G
+
+
+def time_case(function, repeats=REPEATS, min_seconds=MIN_CASE_SECONDS):
+    """Time ``function`` at least ``repeats`` times and return min and median wall time.
+
+    The first run of a case faster than ``min_seconds`` only warms up caches
+    and is not counted. Fast cases also get more runs, up to MAX_REPEATS, so
+    their best time is not one lucky or unlucky sample.
+    """
+    start = time.perf_counter()
+    function()
+    first = time.perf_counter() - start
+    timings = [] if first < min_seconds else [first]
+    while len(timings) < repeats or (sum(timings) < min_seconds and len(timings) < MAX_REPEATS):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {"min_s": min(timings), "median_s": statistics.median(timings), "repeats": len(timings)}
+
+
+def graph_cases(nodes):
+    G = synthetic_graph(nodes)
+    state = GraphState.from_networkx(G)
+    serialized = serialize_graph(G)
+    leaf = state.leaves()[-1]
+    rollup = RollupMatrix(state)
+    leaf_values = rollup.leaf_values(state)
+
+    def set_leaf():
+        state.set_ai_percentage(leaf, random.uniform(0, 100))
+
+    # 50 deep subtrees moved under the SDLC phases and 500 leaf percentages set in one batch
+    phases = [name for name, level in zip(state.names, state.level) if level == 1]
+    movers = [name for name, level in zip(state.names, state.level) if level >= 2][-50:]
+    reorganization = ("batch", [("reparent", node, phases[i % len(phases)]) for i, node in enumerate(movers)] +
+                      [("set_ai_percentage", name, 50.0) for name in state.leaves()[:500]])
+    history = GraphHistory(state.copy())
+    edited = {"graph": history.checkpoints[0].copy()}
+    exported = {fmt: export_bytes(state, fmt) for fmt in GRAPH_FORMATS}
+
+    def edit_and_undo(op):
+        def case():
+            edited["graph"] = history.undo(history.apply(edited["graph"], op, "benchmark"))
+        return case
+
+    cases = {
+        "create_sdlc_graph": (lambda: create_sdlc_graph()) if nodes == 44 else None,
+        "serialize_graph": lambda: serialize_graph(G),
+        "deserialize_graph": lambda: deserialize_graph(serialized),
+        "graph_state_from_networkx": lambda: GraphState.from_networkx(G),
+        "update_parent_ai_percentages": lambda: update_parent_ai_percentages(G),
+        "propagate_ai_percentages": lambda: propagate_ai_percentages(G, [leaf]),
+        "set_ai_percentage": set_leaf,
+        "render_graph_html": lambda: render_graph(state, {}),
+        "rollup_matrix_build": lambda: RollupMatrix(state),
+        "rollup_matvec": lambda: rollup.matvec(leaf_values),
+        "history_set_undo": edit_and_undo(("set_ai_percentage", leaf, 50.0)),
+        "history_delete_undo": edit_and_undo(("remove", [state.names[1]], [])),
+        "batch_reorganize_undo": edit_and_undo(reorganization),
+    }
+    for fmt, data in exported.items():
+        cases[f"graph_export_{fmt}"] = lambda fmt=fmt: export_bytes(state, fmt)
+        cases[f"graph_import_{fmt}"] = lambda data=data, fmt=fmt: read_graph(io.BytesIO(data), fmt)
+    return cases
+
+
+def scenario_cases(scenarios):
+    rng = np.random.default_rng(0)
+    inputs = {
+        "team_size": rng.integers(3, 50, scenarios),
+        "avg_salary": rng.uniform(80_000, 200_000, scenarios),
+        "efficiency_gain": rng.uniform(0, 60, scenarios),
+        "annual_ai_maintenance": rng.uniform(0, 1_000_000, scenarios),
+        "project_duration": rng.integers(1, 11, scenarios),
+    }
+    schedules = finance.annuity_schedules(rng.uniform(1e4, 1e6, scenarios), rng.uniform(-1e5, 1e6, scenarios),
+                                          inputs["project_duration"])
+    state = GraphState.from_networkx(create_sdlc_graph())
+    rollup = RollupMatrix(state)
+    weights = driver_weights(rollup, state)
+    adoption = rng.uniform(0, 100, (scenarios, rollup.shape[1]))
+    return {
+        "npv": lambda: finance.npv(0.08, schedules),
+        "irr": lambda: finance.irr(schedules),
+        "compute_impact": lambda: compute_impact(inputs),
+        "graph_savings_sweep": lambda: sweep({}, weights, adoption),
+    }
+
+
+def notes_cases(notes):
+    """Insert throughput into a fresh database, then paging and search over it"""
+    directory = tempfile.mkdtemp(prefix="notes-bench-")
+    # Registered first, so it runs after the repositories close at exit
+    atexit.register(shutil.rmtree, directory, True)
+    words = "roi npv irr payback team velocity cloud license sprint cost savings review".split()
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(words) for _ in range(20)) for _ in range(notes)]
+    runs = {"count": 0}
+
+    def insert():
+        runs["count"] += 1
+        repository = NotesRepository(os.path.join(directory, f"insert-{runs['count']}.db"))
+        futures = [repository.add_note(f"user{i % 100}@example.com", text, wait=False)
+                   for i, text in enumerate(texts)]
+        for future in futures:
+            future.result()
+        repository.close()
+
+    insert()
+    repository = NotesRepository(os.path.join(directory, "insert-1.db"))
+    middle = repository.get_notes_page(notes // 2)
+    cursor = repository.page_cursor(middle)
+    return {
+        "notes_insert": insert,
+        "notes_first_page": lambda: repository.get_notes_page(20),
+        "notes_deep_page": lambda: repository.get_notes_page(20, before=cursor),
+        "notes_search": lambda: repository.search_notes("team veloc"),
+        # Every benchmark word is in most notes, so this ranks nearly the whole store
+        "notes_search_common": lambda: repository.search_notes("cost"),
+    }
+
+
+def run(scale="quick", repeats=REPEATS, only=None, log=print):
+    sizes = SCALES[scale]
+    groups = [("nodes", nodes, graph_cases) for nodes in sizes["nodes"]]
+    groups += [("scenarios", scenarios, scenario_cases) for scenarios in sizes["scenarios"]]
+    groups += [("notes", notes, notes_cases) for notes in sizes["notes"]]
+
+    results = {}
+    for unit, size, make_cases in groups:
+        for case, function in make_cases(size).items():
+            name = f"{case}[{unit}={size}]"
+            if function is None or (only and not any(pattern in name for pattern in only)):
+                continue
+            results[name] = time_case(function, repeats)
+            results[name]["items_per_s"] = size / results[name]["min_s"]
+            log(f"{name:<50} {results[name]['min_s'] * 1000:>10.2f} ms")
+    return results
+
+
+def environment():
+    import networkx
+    import pandas
+
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "numpy": np.__version__, "pandas": pandas.__version__, "networkx": networkx.__version__,
+            "sqlite": sqlite3.sqlite_version}
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Return (name, baseline_s, current_s, ratio) for every case slower than the threshold allows"""
+    regressions = []
+    for name, result in results.items():
+        if name in baseline:
+            before = baseline[name]["min_s"]
+            ratio = result["min_s"] / before if before > 0 else 1.0
+            if ratio > 1 + threshold and result["min_s"] - before > MIN_REGRESSION_SECONDS:
+                regressions.append((name, before, result["min_s"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the project's hot paths")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="quick")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--only", nargs="*", help="Run only cases whose name contains one of these strings")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with the results stored in this JSON file")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.repeats, args.only, log=lambda line: print(line, file=sys.stderr))
+    report = {"environment": environment(), "scale": args.scale, "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        missing = [name for name in results if name not in baseline]
+        if missing:
+            print(f"{len(missing)} cases have no baseline: {', '.join(missing)}", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            # Time the slow cases again with more runs; only slowdowns that persist are regressions
+            names = [name for name, *_ in regressions]
+            print(f"Re-timing {len(names)} slow cases", file=sys.stderr)
+            retimed = run(args.scale, 3 * args.repeats, names, log=lambda line: print(line, file=sys.stderr))
+            confirmed = {name: min((results[name], retimed[name]), key=lambda result: result["min_s"])
+                         for name in names if name in retimed}
+            regressions = compare(confirmed, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({ratio:.2f}x)",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Time-phased multi-year cash flows built on the calculator results.
+
+The calculator assumes the same annual cash flow in every year of the
+project. This model spreads it over yearly or monthly periods and lets the
+savings ramp up with an adoption S-curve and grow with salary inflation and
+team growth, while the annual AI costs escalate. With the neutral defaults
+(full adoption at launch, no growth) the yearly schedule is exactly the
+calculator's, so NPV, IRR and payback match the main results.
+
+Every function works on arrays with one schedule per row, so thousands of
+schedules are evaluated at once.
+"""
+import numpy as np
+
+import finance
+from impact_engine import compute_impact, prepare_inputs
+
+# Phasing parameters and their neutral defaults (percentages and years)
+PHASING_DEFAULTS = {
+    # Share of the full savings realized at launch
+    "adoption_initial": 100.0,
+    # Years until 90% of the full savings are realized
+    "adoption_years_to_90": 1.0,
+    # Yearly growth of the savings through salaries and team size
+    "salary_inflation": 0.0,
+    "team_growth": 0.0,
+    # Yearly growth of the recurring AI costs
+    "cost_escalation": 0.0,
+}
+
+PERIODS_PER_YEAR = {"Yearly": 1, "Monthly": 12}
+
+
+def adoption_curve(t, initial, years_to_90):
+    """Logistic adoption in [0, 1] at times ``t`` (years) starting from ``initial`` percent.
+
+    ``initial`` and ``years_to_90`` hold one value per schedule; the result
+    has shape (schedules, len(t)).
+    """
+    a0 = np.clip(np.asarray(initial, dtype=float) / 100, 1e-6, 1.0)[:, None]
+    years = np.asarray(years_to_90, dtype=float)[:, None]
+    c = (1 - a0) / a0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Steep enough to pass 90% after ``years``; curves starting above 50% keep the 50%-start steepness
+        rate = np.log(np.maximum(9 * c, 9)) / years
+        curve = 1 / (1 + c * np.exp(-rate * t))
+    return np.where(years > 0, curve, 1.0)
+
+
+def phased_cash_flows(inputs, phasing=None, periods_per_year=1):
+    """Cash-flow schedules of shape (scenarios, periods + 1) for calculator inputs.
+
+    Column 0 is the initial investment; period k covers the (k-1)-th
+    ``1 / periods_per_year`` of a year. Growth and escalation step once per
+    year. ``phasing`` maps PHASING_DEFAULTS names to scalars or one value
+    per scenario.
+    """
+    results = compute_impact(inputs)
+    x = prepare_inputs(inputs)
+    n = len(results["NPV"])
+    p = {name: np.broadcast_to(np.asarray((phasing or {}).get(name, default), dtype=float), (n,))
+         for name, default in PHASING_DEFAULTS.items()}
+
+    initial_investment = (results["Total Initial Cost"] + results["Total Training Cost"] +
+                          results["Total Indirect Cost"])
+    # The calculator's annual cash flow is the savings less these recurring deductions
+    savings = results["Total Savings"]
+    deductions = savings - results["Free Cash Flow"]
+
+    duration = x["project_duration"].astype(int) * periods_per_year
+    period = np.arange(1, max(int(duration.max(initial=0)), 1) + 1)
+    year = (period - 1) // periods_per_year
+
+    adoption = adoption_curve(period / periods_per_year, p["adoption_initial"], p["adoption_years_to_90"])
+    growth = ((1 + p["salary_inflation"] / 100) * (1 + p["team_growth"] / 100))[:, None] ** year
+    escalation = (1 + p["cost_escalation"] / 100)[:, None] ** year
+
+    flows = (savings[:, None] * adoption * growth - deductions[:, None] * escalation) / periods_per_year
+    flows = np.where(period <= duration[:, None], flows, 0.0)
+    return np.column_stack([-initial_investment, flows])
+
+
+def evaluate_schedules(cash_flows, discount_rate, periods_per_year=1, default_payback=np.nan):
+    """NPV, annualized IRR (%) and discounted payback (years) of every schedule.
+
+    ``discount_rate`` is the annual rate in percent, converted to the
+    equivalent per-period rate.
+    """
+    cash_flows = finance.as_schedules(cash_flows)
+    rate = (1 + np.asarray(discount_rate, dtype=float) / 100) ** (1 / periods_per_year) - 1
+    irr, roots = finance.irr(cash_flows)
+    payback = finance.discounted_payback(rate, cash_flows)
+    return {
+        "NPV": finance.npv(rate, cash_flows),
+        "IRR": ((1 + irr) ** periods_per_year - 1) * 100,
+        "IRR Solutions": roots,
+        "Discounted Payback Period": np.where(np.isnan(payback), default_payback, payback / periods_per_year),
+        "Total Net Cash Flow": cash_flows.sum(axis=1),
+    }
+
+
+def compute_phased_impact(inputs, phasing=None, periods_per_year=1):
+    """Schedules and their metrics; payback defaults to the project duration like the calculator"""
+    x = prepare_inputs(inputs)
+    cash_flows = phased_cash_flows(inputs, phasing, periods_per_year)
+    metrics = evaluate_schedules(cash_flows, x["discount_rate"], periods_per_year,
+                                 default_payback=x["project_duration"].astype(int))
+    metrics["Cash Flows"] = cash_flows
+    return metrics
+
+
+def yearly_totals(cash_flows, periods_per_year=1):
+    """Sum period flows into years: shape (schedules, years), excluding the initial investment"""
+    flows = finance.as_schedules(cash_flows)[:, 1:]
+    years = -(-flows.shape[1] // periods_per_year)
+    padded = np.zeros((flows.shape[0], years * periods_per_year))
+    padded[:, :flows.shape[1]] = flows
+    return padded.reshape(flows.shape[0], years, periods_per_year).sum(axis=2)
@@ -0,0 +1,156 @@
+"""Vectorized NPV, IRR and payback over arrays of cash-flow schedules.
+
+A schedule is a row of cash flows where column t is the flow at the end of
+period t (column 0 is the upfront investment, usually negative). Every
+function accepts a 2-D array with one schedule per row; shorter schedules are
+padded with zeros, which does not change any of the results.
+"""
+import numpy as np
+
+# Search range for IRR expressed as log10(1 + rate): -99% up to +99,999,900%
+IRR_LOG_GROWTH_RANGE = (-2.0, 6.0)
+# Grid points per decade of (1 + rate) used to bracket IRR sign changes
+IRR_GRID_DENSITY = 20
+# Bisection steps used to refine each bracketed IRR
+IRR_REFINE_STEPS = 45
+# Upper bound on grid evaluations held in memory at once
+MAX_GRID_ELEMENTS = 4_000_000
+
+
+def as_schedules(cash_flows):
+    """Return cash flows as a float array of shape (n_schedules, n_periods + 1)"""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    if cash_flows.ndim == 1:
+        cash_flows = cash_flows[None, :]
+    if cash_flows.ndim != 2:
+        raise ValueError("Cash flows must be a 1-D schedule or a 2-D array of schedules")
+    return cash_flows
+
+
+def annuity_schedules(initial_investment, annual_cash_flow, years):
+    """Build schedules of -initial_investment followed by a constant flow for ``years`` periods"""
+    initial_investment, annual_cash_flow, years = np.broadcast_arrays(
+        np.asarray(initial_investment, dtype=float),
+        np.asarray(annual_cash_flow, dtype=float),
+        np.asarray(years, dtype=int))
+    initial_investment, annual_cash_flow, years = (
+        np.ravel(initial_investment), np.ravel(annual_cash_flow), np.ravel(years))
+
+    horizon = np.arange(1, max(int(years.max(initial=0)), 1) + 1)
+    cash_flows = np.where(horizon <= years[:, None], annual_cash_flow[:, None], 0.0)
+    return np.column_stack([-initial_investment, cash_flows])
+
+
+def discount_factors(rate, periods):
+    """Return an (n, periods + 1) matrix of 1 / (1 + rate) ** t for t = 0..periods"""
+    rate = np.asarray(rate, dtype=float).reshape(-1, 1)
+    return (1 + rate) ** -np.arange(periods + 1)
+
+
+def npv(rate, cash_flows):
+    """Net present value of each schedule at a per-period rate (scalar or one per schedule)"""
+    cash_flows = as_schedules(cash_flows)
+    return np.sum(cash_flows * discount_factors(rate, cash_flows.shape[1] - 1), axis=1)
+
+
+def discounted_payback(rate, cash_flows, default=np.nan):
+    """First period in which the cumulative discounted cash flow turns non-negative.
+
+    Schedules that never recover their investment get ``default``.
+    """
+    cash_flows = as_schedules(cash_flows)
+    discounted = cash_flows * discount_factors(rate, cash_flows.shape[1] - 1)
+    recovered = np.cumsum(discounted, axis=1)[:, 1:] >= 0
+    periods = recovered.argmax(axis=1) + 1.0
+    return np.where(recovered.any(axis=1), periods, default)
+
+
+def _irr_grid(periods):
+    """Grid of log10(1 + rate) values wide enough for the schedule length without overflow"""
+    low, high = IRR_LOG_GROWTH_RANGE
+    limit = 300 / max(periods, 1)
+    low, high = max(low, -limit), min(high, limit)
+    return np.linspace(low, high, int(round((high - low) * IRR_GRID_DENSITY)) + 1)
+
+
+def _horner(periods, discount):
+    """Evaluate NPV as a polynomial in the per-schedule discount factor 1 / (1 + rate).
+
+    ``periods`` holds the cash flows transposed to one contiguous row per period.
+    """
+    value = periods[-1].copy()
+    for flows in periods[-2::-1]:
+        value *= discount
+        value += flows
+    return value
+
+
+def _coefficient_sign_changes(cash_flows):
+    """Count sign changes between consecutive non-zero cash flows (Descartes' rule of signs)"""
+    signs = np.sign(cash_flows)
+    # Carry the last non-zero sign forward over zero flows
+    last_nonzero = np.maximum.accumulate(np.where(signs != 0, np.arange(signs.shape[1]), 0), axis=1)
+    filled = np.take_along_axis(signs, last_nonzero, axis=1)
+    return np.sum((filled[:, 1:] * filled[:, :-1]) < 0, axis=1)
+
+
+def irr(cash_flows):
+    """Solve the IRR of every schedule at once.
+
+    Returns ``(rates, roots)`` where ``rates`` is the IRR per period as a
+    fraction (NaN when no IRR exists in the search range) and ``roots`` is the
+    number of IRRs found across that range. When a schedule has several IRRs,
+    the one closest to zero is returned.
+
+    Schedules whose flows change sign once have exactly one IRR and are
+    bisected over the whole range directly; only the remaining schedules are
+    scanned on a grid to bracket each sign change of NPV.
+    """
+    cash_flows = as_schedules(cash_flows)
+    n, width = cash_flows.shape
+    grid = _irr_grid(width - 1)
+
+    low = np.full(n, grid[0])
+    high = np.full(n, grid[-1])
+    roots = np.zeros(n, dtype=int)
+
+    # Conventional schedules: a single root if the NPV changes sign over the range
+    sign_changes = _coefficient_sign_changes(cash_flows)
+    single = np.flatnonzero(sign_changes == 1)
+    flows = np.ascontiguousarray(cash_flows[single].T)
+    roots[single] = np.sign(_horner(flows, 10.0 ** -grid[0])) != np.sign(_horner(flows, 10.0 ** -grid[-1]))
+
+    # Non-conventional schedules: bracket every sign change on the grid
+    multiple = np.flatnonzero(sign_changes > 1)
+    grid_factors = (10.0 ** grid)[None, :] ** -np.arange(width)[:, None]
+    chunk = max(1, MAX_GRID_ELEMENTS // len(grid))
+    for start in range(0, len(multiple), chunk):
+        rows = multiple[start:start + chunk]
+        signs = np.sign(cash_flows[rows] @ grid_factors)
+        # An exact zero counts with the following grid point
+        signs[signs == 0] = 1
+        changes = signs[:, 1:] != signs[:, :-1]
+        roots[rows] = changes.sum(axis=1)
+
+        # Bracket the sign change closest to a zero rate
+        distance = np.where(changes, np.abs(grid[:-1] + grid[1:]), np.inf)
+        nearest = distance.argmin(axis=1)
+        low[rows] = grid[nearest]
+        high[rows] = grid[nearest + 1]
+
+    found = np.flatnonzero(roots > 0)
+    low, high = low[found], high[found]
+    flows = np.ascontiguousarray(cash_flows[found].T)
+    low_sign = np.sign(_horner(flows, 10.0 ** -low))
+    steps = IRR_REFINE_STEPS + int(np.ceil(np.log2(len(grid))))
+
+    for _ in range(steps):
+        mid = (low + high) / 2
+        mid_sign = np.sign(_horner(flows, 10.0 ** -mid))
+        same = mid_sign == low_sign
+        np.copyto(low, mid, where=same)
+        np.copyto(high, mid, where=~same)
+
+    rates = np.full(n, np.nan)
+    rates[found] = 10.0 ** ((low + high) / 2) - 1
+    return rates, roots
@@ -0,0 +1,120 @@
+"""Batch graph edits written as a list of commands.
+
+Commands are one per line, comma separated (quote names that contain
+commas); blank lines and lines starting with ``#`` are skipped:
+
+    add, Prompt Review, Code Implementation
+    delete, Rollback Plan
+    delete_subtree, Feasibility Study
+    rename, Code Review, Peer Review
+    reparent, Test Planning, Quality Assurance
+    set_ai_percentage, Unit Testing, 60
+    set_effort_share, Implementation, 3
+    add_edge, Test Cases, Code Review
+    remove_edge, Coding, Development
+
+The same commands load from .txt/.csv files, or from a .json file with a
+list of ``[action, node, argument]`` arrays or ``{"action", "node",
+"argument"}`` objects. Every command becomes one graph_history operation;
+the whole list is applied as a single atomic batch.
+"""
+import csv
+import io
+import json
+import os
+
+# action -> (graph_history operation, argument kind)
+COMMANDS = {
+    "add": ("add_node", "parent"),
+    "delete": ("remove", None),
+    "delete_subtree": ("delete_subtree", None),
+    "rename": ("rename", "new name"),
+    "reparent": ("reparent", "new parent"),
+    "set_ai_percentage": ("set_ai_percentage", "percentage"),
+    "set_effort_share": ("set_effort_share", "share"),
+    "add_edge": ("add_edge", "target"),
+    "remove_edge": ("remove_edge", "target"),
+}
+# Upload types accepted by load_commands
+COMMAND_FILE_TYPES = ["txt", "csv", "json"]
+
+
+def command_op(action, node, argument=None):
+    """The graph_history operation of one command; raises ValueError for malformed commands"""
+    action = str(action).strip().lower()
+    if action not in COMMANDS:
+        raise ValueError(f"Unknown action {action!r}; expected one of {', '.join(COMMANDS)}")
+    kind, argument_kind = COMMANDS[action]
+    node = str(node).strip()
+    if not node:
+        raise ValueError(f"{action} needs a node name")
+    argument = "" if argument is None else str(argument).strip()
+    if argument_kind is None:
+        if argument:
+            raise ValueError(f"{action} {node} takes no argument")
+        return (kind, [node], []) if kind == "remove" else (kind, node)
+    if not argument:
+        raise ValueError(f"{action} {node} needs a {argument_kind}")
+    if argument_kind in ("percentage", "share"):
+        try:
+            value = float(argument)
+        except ValueError:
+            raise ValueError(f"{action} {node}: {argument!r} is not a number") from None
+        if value < 0 or (argument_kind == "percentage" and value > 100):
+            raise ValueError(f"{action} {node}: {value:g} is out of range")
+        return (kind, node, value)
+    if kind == "remove_edge":
+        return ("remove", [], [(node, argument)])
+    return (kind, node, argument)
+
+
+def parse_commands(text):
+    """Operations of the command lines in ``text``; errors name the offending line"""
+    ops = []
+    for number, row in enumerate(csv.reader(io.StringIO(text), skipinitialspace=True), 1):
+        if not row or not "".join(row).strip() or row[0].lstrip().startswith("#"):
+            continue
+        if len(row) > 3:
+            raise ValueError(f"Line {number}: expected action, node and at most one argument")
+        try:
+            ops.append(command_op(*row))
+        except ValueError as error:
+            raise ValueError(f"Line {number}: {error}") from None
+    return ops
+
+
+def parse_json_commands(data):
+    ops = []
+    for number, item in enumerate(json.loads(data), 1):
+        try:
+            if isinstance(item, dict):
+                ops.append(command_op(item.get("action", ""), item.get("node", ""), item.get("argument")))
+            else:
+                ops.append(command_op(*item))
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"Command {number}: {error}") from None
+    return ops
+
+
+def load_commands(data, filename):
+    """Operations of an uploaded command file, chosen by its extension"""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    if os.path.splitext(filename)[1].lower() == ".json":
+        return parse_json_commands(data)
+    return parse_commands(data)
+
+
+def describe(op):
+    """Short text of an operation built by command_op"""
+    kind = op[0]
+    if kind == "remove":
+        return f"delete {op[1][0]}" if op[1] else f"remove edge {op[2][0][0]} → {op[2][0][1]}"
+    if kind == "delete_subtree":
+        return f"delete subtree {op[1]}"
+    if kind == "set_ai_percentage":
+        return f"set AI percentage of {op[1]} to {op[2]:g}%"
+    if kind == "set_effort_share":
+        return f"set effort share of {op[1]} to {op[2]:g}"
+    return {"add_node": "add {} under {}", "rename": "rename {} to {}", "reparent": "move {} under {}",
+            "add_edge": "add edge {} → {}"}[kind].format(op[1], op[2])
@@ -0,0 +1,357 @@
+"""Undo/redo history of graph edits as a log of invertible operations.
+
+Every edit is an operation tuple applied to a GraphState by ``apply_op``,
+which returns the edited state together with the exact inverse operation.
+The history keeps (label, operation, inverse) entries, so its memory grows
+with the size of the edits rather than with the graph size times the
+number of steps. Undo applies one inverse: percentage edits touch only the
+node's ancestors in place, structural edits rebuild the compact arrays in
+one vectorized pass.
+
+Operations:
+
+    ("set_ai_percentage", node, value)
+    ("set_effort_share", node, value)
+    ("rename", old_name, new_name)
+    ("insert", [(position, name, level, ai_percentage, effort_share), ...],
+               [(edge_position, source, target), ...])
+    ("remove", [name, ...], [(source, target), ...])
+    ("set_levels", [(name, level), ...])
+    ("replace", graph)
+    ("batch", [operation, ...])
+
+and the name-based operations, resolved against the graph when applied:
+
+    ("add_node", name, parent)
+    ("add_edge", source, target)
+    ("delete_subtree", name)
+    ("reparent", name, new_parent)
+
+Positions are indices in the resulting node order and in the source-grouped
+edge order of GraphState.edges(), both ascending. "remove" drops the named
+nodes with all their edges plus the listed edges. A batch applies its steps
+atomically and recomputes the rollups once at the end. "replace" swaps in a
+whole new graph, such as an imported file; its inverse holds the old one.
+
+A few checkpoints (copies that share the unchanged structure arrays) let
+``goto`` jump far back or forward without replaying every step.
+"""
+import numpy as np
+
+from graph_state import GraphState
+
+# Steps between checkpoints
+CHECKPOINT_INTERVAL = 50
+# Checkpoints kept; older ones are dropped and reached through the log
+MAX_CHECKPOINTS = 8
+
+
+def _edge_arrays(graph):
+    """(sources, targets) node ids in GraphState.edges() order"""
+    sources = np.repeat(np.arange(len(graph), dtype=np.int64), graph.out_degree())
+    return sources, graph.child_idx.astype(np.int64)
+
+
+def _edge_position(graph, source, target):
+    """Index of the edge source -> target in GraphState.edges() order"""
+    _require(graph, source, target)
+    s, t = graph.index[source], graph.index[target]
+    matches = np.flatnonzero(graph.children(s) == t)
+    if not len(matches):
+        raise ValueError(f"There is no edge {source} → {target}")
+    return int(graph.child_ptr[s] + matches[0])
+
+
+def _require(graph, *names):
+    for name in names:
+        if name not in graph.index:
+            raise ValueError(f"There is no node named {name}")
+
+
+def _rollup(graph, names, dirty):
+    """Recompute the rollups above ``names`` now, or leave them for the end of the batch in ``dirty``"""
+    if dirty is None:
+        graph.update_rollups([graph.index[name] for name in names])
+    else:
+        dirty.update(names)
+
+
+def _descendants(graph, i):
+    """Ids of every node below node id ``i``"""
+    seen = set()
+    stack = [i]
+    while stack:
+        for child in graph.children(stack.pop()):
+            if child not in seen:
+                seen.add(int(child))
+                stack.append(child)
+    return seen
+
+
+def _set_column(graph, column, node, value, dirty):
+    _require(graph, node)
+    if column == "ai_percentage" and len(graph.children(graph.index[node])):
+        # A parent's percentage is its rollup, which would overwrite the value at once
+        raise ValueError(f"{node} is not a leaf; its AI percentage is rolled up from its children")
+    values = getattr(graph, column)
+    old = float(values[graph.index[node]])
+    values[graph.index[node]] = value
+    _rollup(graph, [node], dirty)
+    return graph, (f"set_{column}", node, old)
+
+
+def _set_levels(graph, levels):
+    _require(graph, *(name for name, _ in levels))
+    ids = [graph.index[name] for name, _ in levels]
+    inverse = ("set_levels", [(name, int(graph.level[i])) for (name, _), i in zip(levels, ids)])
+    # Levels are shared between copies, so they are replaced rather than changed in place
+    state = graph.copy()
+    state.level = graph.level.copy()
+    state.level[ids] = [level for _, level in levels]
+    return state, inverse
+
+
+def _rename(graph, old, new, dirty):
+    _require(graph, old)
+    if new in graph.index:
+        raise ValueError(f"A node named {new} already exists")
+    names = list(graph.names)
+    names[graph.index[old]] = new
+    state = graph.copy()
+    state.names = names
+    state._index = None
+    state._names_digest = None
+    if dirty is not None and old in dirty:
+        dirty.discard(old)
+        dirty.add(new)
+    return state, ("rename", new, old)
+
+
+def _insert(graph, nodes, edges, dirty):
+    inserted = {node[1]: int(node[0]) for node in nodes}
+    for name in inserted:
+        if name in graph.index:
+            raise ValueError(f"A node named {name} already exists")
+    _require(graph, *(name for edge in edges for name in edge[1:] if name not in inserted))
+
+    n, added = len(graph), len(nodes)
+    positions = np.array([node[0] for node in nodes], dtype=np.int64)
+    old_ids = np.ones(n + added, dtype=bool)
+    old_ids[positions] = False
+    old_to_new = np.flatnonzero(old_ids)
+
+    names = np.empty(n + added, dtype=object)
+    names[old_to_new] = graph.names
+    names[positions] = [node[1] for node in nodes]
+    columns = []
+    for values, column, dtype in ((graph.level, 2, np.int32), (graph.ai_percentage, 3, np.float64),
+                                  (graph.effort_share, 4, np.float64)):
+        full = np.empty(n + added, dtype=dtype)
+        full[old_to_new] = values
+        full[positions] = [node[column] for node in nodes]
+        columns.append(full)
+
+    def node_id(name):
+        return inserted[name] if name in inserted else int(old_to_new[graph.index[name]])
+
+    sources, targets = _edge_arrays(graph)
+    sources, targets = old_to_new[sources], old_to_new[targets]
+    if edges:
+        # np.insert positions refer to the array before insertion
+        before = np.array([edge[0] for edge in edges], dtype=np.int64) - np.arange(len(edges))
+        sources = np.insert(sources, before, [node_id(edge[1]) for edge in edges])
+        targets = np.insert(targets, before, [node_id(edge[2]) for edge in edges])
+
+    state = GraphState(names.tolist(), columns[0], columns[1], sources, targets, columns[2])
+    _rollup(state, {edge[1] for edge in edges}, dirty)
+    # Edges of inserted nodes go away with the nodes
+    inverse = ("remove", list(inserted), [(source, target) for _, source, target in edges
+                                          if source not in inserted and target not in inserted])
+    # Leaves that gained a child lose their own percentage to the rollup; the inverse restores it
+    restores = [("set_ai_percentage", name, float(graph.ai_percentage[graph.index[name]]))
+                for name in dict.fromkeys(edge[1] for edge in edges)
+                if name not in inserted and len(graph.children(graph.index[name])) == 0]
+    return state, ("batch", [inverse] + restores) if restores else inverse
+
+
+def _remove(graph, names, edges, dirty):
+    _require(graph, *names)
+    removed = np.array(sorted({graph.index[name] for name in names}), dtype=np.int64)
+    keep = np.ones(len(graph), dtype=bool)
+    keep[removed] = False
+
+    sources, targets = _edge_arrays(graph)
+    dropped = ~keep[sources] | ~keep[targets]
+    for source, target in edges:
+        dropped[_edge_position(graph, source, target)] = True
+    dropped_positions = np.flatnonzero(dropped)
+
+    inverse = ("insert",
+               [(int(i), graph.names[i], int(graph.level[i]), float(graph.ai_percentage[i]),
+                 float(graph.effort_share[i])) for i in removed],
+               [(int(k), graph.names[sources[k]], graph.names[targets[k]]) for k in dropped_positions])
+
+    new_ids = np.cumsum(keep) - 1
+    state = GraphState([name for name, kept in zip(graph.names, keep) if kept], graph.level[keep],
+                       graph.ai_percentage[keep], new_ids[sources[~dropped]], new_ids[targets[~dropped]],
+                       graph.effort_share[keep])
+    # Parents that lost a child recompute their rollups
+    _rollup(state, {graph.names[s] for s in sources[dropped_positions] if keep[s]}, dirty)
+    return state, inverse
+
+
+def apply_op(graph, op):
+    """Apply an operation and return (graph, inverse operation).
+
+    Single percentage edits change ``graph`` in place and return it;
+    structural edits and batches return a new state and leave ``graph``
+    untouched. Invalid operations raise ValueError and change nothing; a
+    failing batch step is reported with its number.
+    """
+    return _apply(graph, op, None)
+
+
+def _apply(graph, op, dirty):
+    kind = op[0]
+    if kind in ("set_ai_percentage", "set_effort_share"):
+        return _set_column(graph, kind[len("set_"):], op[1], op[2], dirty)
+    if kind == "rename":
+        return _rename(graph, op[1], op[2], dirty)
+    if kind == "insert":
+        return _insert(graph, op[1], op[2], dirty)
+    if kind == "remove":
+        return _remove(graph, op[1], op[2], dirty)
+    if kind == "set_levels":
+        return _set_levels(graph, op[1])
+    if kind == "replace":
+        # Copies, so later in-place percentage edits never reach the graphs held by the history
+        return op[1].copy(), ("replace", graph.copy())
+    if kind == "add_node":
+        return _apply(graph, add_node_op(graph, op[1], op[2]), dirty)
+    if kind == "add_edge":
+        return _apply(graph, add_edge_op(graph, op[1], op[2]), dirty)
+    if kind == "delete_subtree":
+        _require(graph, op[1])
+        subtree = [graph.names[i] for i in sorted(_descendants(graph, graph.index[op[1]]))]
+        return _remove(graph, [op[1]] + subtree, [], dirty)
+    if kind == "reparent":
+        return _apply(graph, reparent_op(graph, op[1], op[2]), dirty)
+    if kind == "batch":
+        outermost = dirty is None
+        if outermost:
+            # Edits go to a copy, so a failing step leaves ``graph`` unchanged, and rollups wait for the end
+            graph, dirty = graph.copy(), set()
+        inverses = []
+        for number, step in enumerate(op[1], 1):
+            try:
+                graph, inverse = _apply(graph, step, dirty)
+            except ValueError as error:
+                raise ValueError(f"Step {number}: {error}" if outermost else str(error)) from None
+            inverses.append(inverse)
+        if outermost:
+            # One rollup pass for the whole batch
+            graph.update_rollups([graph.index[name] for name in dirty if name in graph.index])
+        return graph, ("batch", inverses[::-1])
+    raise ValueError(f"Unknown graph operation: {kind}")
+
+
+def add_node_op(graph, name, parent):
+    """Operation adding ``name`` as the last child of ``parent``, one level below it"""
+    if name in graph.index:
+        raise ValueError(f"A node named {name} already exists")
+    _require(graph, parent)
+    p = graph.index[parent]
+    return ("insert", [(len(graph), name, int(graph.level[p]) + 1, 0.0, 1.0)],
+            [(int(graph.child_ptr[p + 1]), parent, name)])
+
+
+def add_edge_op(graph, source, target):
+    """Operation adding the edge source -> target after the source's other children"""
+    _require(graph, source, target)
+    s, t = graph.index[source], graph.index[target]
+    if t in graph.children(s):
+        raise ValueError(f"The edge {source} → {target} already exists")
+    if s == t:
+        raise ValueError(f"Cannot connect {source} to itself")
+    if s in _descendants(graph, t):
+        # A cycle would make the rollups, and so undo/redo, depend on the order of updates
+        raise ValueError(f"Adding {source} → {target} would create a cycle: {target} is an ancestor of {source}")
+    return ("insert", [], [(int(graph.child_ptr[s + 1]), source, target)])
+
+
+def reparent_op(graph, node, parent):
+    """Operation moving ``node`` and its subtree under ``parent``, detached from its current parents"""
+    _require(graph, node, parent)
+    i, p = graph.index[node], graph.index[parent]
+    subtree = _descendants(graph, i) | {i}
+    if p in subtree:
+        raise ValueError(f"Cannot move {node} under its own descendant {parent}")
+    steps = []
+    old_parents = [graph.names[j] for j in graph.parents(i)]
+    if old_parents:
+        steps.append(("remove", [], [(old_parent, node) for old_parent in old_parents]))
+    steps.append(("add_edge", parent, node))
+    shift = int(graph.level[p]) + 1 - int(graph.level[i])
+    if shift:
+        steps.append(("set_levels", [(graph.names[j], int(graph.level[j]) + shift) for j in sorted(subtree)]))
+    return ("batch", steps)
+
+
+class GraphHistory:
+    """Linear undo/redo log of graph operations; a new edit discards the redo steps"""
+
+    def __init__(self, graph, checkpoint_interval=CHECKPOINT_INTERVAL, max_checkpoints=MAX_CHECKPOINTS):
+        # (label, operation, inverse) per step; entries[:position] are applied
+        self.entries = []
+        self.position = 0
+        self.checkpoint_interval = checkpoint_interval
+        self.max_checkpoints = max_checkpoints
+        self.checkpoints = {0: graph.copy()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.entries)
+
+    def labels(self):
+        return [label for label, _, _ in self.entries]
+
+    def apply(self, graph, op, label):
+        """Apply and record an edit, returning the edited graph"""
+        graph, inverse = apply_op(graph, op)
+        del self.entries[self.position:]
+        self.checkpoints = {position: state for position, state in self.checkpoints.items()
+                            if position <= self.position}
+        self.entries.append((label, op, inverse))
+        self.position += 1
+        if self.position % self.checkpoint_interval == 0:
+            self.checkpoints[self.position] = graph.copy()
+            while len(self.checkpoints) > self.max_checkpoints:
+                del self.checkpoints[min(self.checkpoints)]
+        return graph
+
+    def undo(self, graph):
+        self.position -= 1
+        graph, _ = apply_op(graph, self.entries[self.position][2])
+        return graph
+
+    def redo(self, graph):
+        graph, _ = apply_op(graph, self.entries[self.position][1])
+        self.position += 1
+        return graph
+
+    def goto(self, graph, position):
+        """Move to ``position`` applied steps, starting from a checkpoint when that replays fewer steps"""
+        base = max((p for p in self.checkpoints if p <= position), default=None)
+        if base is not None and position - base < abs(position - self.position):
+            graph = self.checkpoints[base].copy()
+            self.position = base
+        while self.position > position:
+            graph = self.undo(graph)
+        while self.position < position:
+            graph = self.redo(graph)
+        return graph
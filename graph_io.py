@@ -0,0 +1,469 @@
+"""Streaming import and export of SDLC graphs in interchange formats.
+
+Formats, chosen by file extension:
+
+    json      node-link JSON, as written by networkx.node_link_data:
+              {"nodes": [{"id", "level", "ai_percentage", "effort_share"}],
+               "links": [{"source", "target"}]}
+    graphml   GraphML with level, ai_percentage and effort_share node data
+    csv       edge list, see below
+    parquet   the same table as the CSV, in Parquet
+    arrow     the same table as the CSV, as an Arrow IPC file (.arrow/.feather)
+
+The tabular formats hold one row per node followed by one row per edge,
+with the columns ``source, target, level, ai_percentage, effort_share``:
+node rows leave ``target`` empty, edge rows leave the attributes empty.
+A plain ``source,target`` edge list exported from a process modelling
+tool also loads; its nodes get their depth as level, 0% AI and an effort
+share of 1.
+
+Imports read GraphML, CSV, Parquet and Arrow in chunks and collect them
+into typed column arrays, which GraphBuilder turns into a GraphState in one
+vectorized pass, followed by one level-by-level rollup of the parent
+percentages. JSON has no streaming parser in the standard library, so it
+is parsed in one go. Exports write the same chunks incrementally.
+
+    python graph_io.py taxonomy.graphml taxonomy.parquet
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from xml.etree import ElementTree
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from graph_state import GraphState
+
+# Format -> file extensions, the first one is used for exports
+GRAPH_FORMATS = {
+    "json": [".json"],
+    "graphml": [".graphml", ".xml"],
+    "csv": [".csv"],
+    "parquet": [".parquet", ".pq"],
+    "arrow": [".arrow", ".feather", ".ipc"],
+}
+# Nodes or edges read, converted and written at a time
+CHUNK_SIZE = 20_000
+# Node attributes and their GraphML types
+NODE_ATTRIBUTES = {"level": "int", "ai_percentage": "double", "effort_share": "double"}
+
+
+def graph_format(path, fmt=None):
+    """The format named ``fmt``, or the one matching the extension of ``path``"""
+    if fmt:
+        if fmt not in GRAPH_FORMATS:
+            raise ValueError(f"Unknown graph format {fmt!r}; expected one of {', '.join(GRAPH_FORMATS)}")
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    for name, extensions in GRAPH_FORMATS.items():
+        if extension in extensions:
+            return name
+    raise ValueError(f"Unknown graph file type {extension or path!r}")
+
+
+def _column(values, size):
+    """Float column of ``values`` with NaN for missing entries"""
+    if values is None:
+        return np.full(size, np.nan)
+    return np.array(values, dtype=np.float64)
+
+
+class GraphBuilder:
+    """Collects node and edge chunks, then builds the GraphState in one pass.
+
+    Missing levels become the node's depth below the roots, missing AI
+    percentages 0 and missing effort shares 1. Edge endpoints that were
+    never listed as nodes are added after the listed nodes, duplicate edges
+    are dropped and every parent percentage is rolled up from the leaves.
+    Graphs with a cycle are rejected, as cyclic edits are in graph_history.
+    """
+
+    def __init__(self):
+        self._names, self._level, self._ai_percentage, self._effort_share = [], [], [], []
+        self._sources, self._targets = [], []
+
+    def add_nodes(self, names, level=None, ai_percentage=None, effort_share=None):
+        names = np.asarray(names, dtype=object)
+        self._names.append(names)
+        self._level.append(_column(level, len(names)))
+        self._ai_percentage.append(_column(ai_percentage, len(names)))
+        self._effort_share.append(_column(effort_share, len(names)))
+
+    def add_edges(self, sources, targets):
+        self._sources.append(np.asarray(sources, dtype=object))
+        self._targets.append(np.asarray(targets, dtype=object))
+
+    def build(self):
+        # Each chunk is consumed and dropped as soon as its rows are indexed, so the
+        # chunks and the built arrays are never held in full at the same time
+        index = {}
+        while self._names:
+            chunk = self._names.pop(0)
+            if any(name is None or name == "" for name in chunk):
+                raise ValueError("Every node needs a name")
+            size = len(index)
+            index.update(zip(chunk, range(size, size + len(chunk))))
+            if len(index) < size + len(chunk):
+                # Keys keep their insertion order, so the first ``size`` are the earlier chunks
+                seen = set(list(index)[:size])
+                for name in chunk:
+                    if name in seen:
+                        raise ValueError(f"Node {name!r} is listed more than once")
+                    seen.add(name)
+
+        # Edge ids, with endpoints that are not listed as nodes added in order of first appearance
+        source_ids, target_ids = [], []
+        while self._sources:
+            sources, targets = self._sources.pop(0), self._targets.pop(0)
+            endpoints = np.column_stack([sources, targets]).ravel()
+            if any(name is None or name == "" for name in endpoints):
+                raise ValueError("Every edge needs a source and a target")
+            for name in endpoints:
+                if name not in index:
+                    index[name] = len(index)
+            source_ids.append(np.fromiter(map(index.__getitem__, sources), dtype=np.int64, count=len(sources)))
+            target_ids.append(np.fromiter(map(index.__getitem__, targets), dtype=np.int64, count=len(targets)))
+        source_ids = np.concatenate(source_ids) if source_ids else np.empty(0, dtype=np.int64)
+        target_ids = np.concatenate(target_ids) if target_ids else np.empty(0, dtype=np.int64)
+        # Keep the first copy of duplicate edges
+        n = len(index)
+        keep = np.sort(np.unique(source_ids * n + target_ids, return_index=True)[1])
+        source_ids, target_ids = source_ids[keep], target_ids[keep]
+
+        def column(chunks):
+            # Extra endpoints have no attributes: NaN until the defaults are filled in
+            values = np.full(n, np.nan)
+            offset = 0
+            while chunks:
+                chunk = chunks.pop(0)
+                values[offset:offset + len(chunk)] = chunk
+                offset += len(chunk)
+            return values
+
+        level, ai_percentage, effort_share = (column(chunks) for chunks in
+                                              (self._level, self._ai_percentage, self._effort_share))
+        missing_level = np.isnan(level)
+        graph = GraphState(index, np.where(missing_level, 0, level),
+                           np.nan_to_num(ai_percentage, nan=0.0), source_ids, target_ids,
+                           np.where(np.isnan(effort_share), 1.0, effort_share))
+        cycle = _cycle(graph)
+        if cycle:
+            # Rollups around a cycle never settle, so its percentages would be silently wrong
+            raise ValueError(f"The graph has a cycle: {' → '.join(map(str, cycle))}")
+        if missing_level.any():
+            graph.level[missing_level] = _depths(graph)[missing_level]
+        # Parent percentages always follow from the leaves
+        graph.recompute_rollups()
+        return graph
+
+
+def _cycle(graph):
+    """Names along one cycle of the graph, first node repeated at the end; None if it is acyclic"""
+    # Peel nodes whose children are all peeled, from the leaves up; what remains leads into a cycle
+    pending = graph.out_degree().copy()
+    parent_count = np.diff(graph.parent_ptr)
+    frontier = np.flatnonzero(pending == 0)
+    while len(frontier):
+        counts = parent_count[frontier]
+        starts = np.repeat(graph.parent_ptr[frontier] - (np.cumsum(counts) - counts), counts)
+        parents = graph.parent_idx[starts + np.arange(counts.sum())]
+        pending -= np.bincount(parents, minlength=len(pending)).astype(pending.dtype)
+        frontier = np.unique(parents[pending[parents] == 0])
+    remaining = np.flatnonzero(pending > 0)
+    if not len(remaining):
+        return None
+    # Every remaining node has a remaining child, so following them must come back around
+    path, seen = [], {}
+    node = int(remaining[0])
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = int(next(child for child in graph.children(node) if pending[child] > 0))
+    return [graph.names[i] for i in path[seen[node]:] + [node]]
+
+
+def _depths(graph):
+    """Breadth-first depth of every node below the roots"""
+    depth = np.full(len(graph), -1, dtype=np.int32)
+    frontier = np.flatnonzero(np.diff(graph.parent_ptr) == 0)
+    out_degree = graph.out_degree()
+    for step in range(len(graph)):
+        if not len(frontier):
+            break
+        depth[frontier] = step
+        # Children of the whole frontier, gathered from the CSR arrays at once
+        counts = out_degree[frontier]
+        starts = np.repeat(graph.child_ptr[frontier] - (np.cumsum(counts) - counts), counts)
+        children = graph.child_idx[starts + np.arange(counts.sum())]
+        frontier = np.unique(children[depth[children] < 0])
+    return np.maximum(depth, 0)
+
+
+def _add_rows(builder, batch):
+    """Add a pyarrow record batch of the tabular layout to the builder"""
+    import pyarrow.compute as pc
+
+    columns = batch.schema.names
+    if "source" not in columns:
+        raise ValueError("Graph tables need a 'source' column")
+
+    def values(name, rows=None):
+        if name not in columns:
+            return None
+        column = batch.column(name) if rows is None else batch.column(name).filter(rows)
+        return column.to_numpy(zero_copy_only=False)
+
+    node_rows = None
+    if "target" in columns:
+        node_rows = pc.is_null(batch.column("target"))
+        edge_rows = pc.invert(node_rows)
+        builder.add_edges(values("source", edge_rows), values("target", edge_rows))
+    builder.add_nodes(*(values(name, node_rows) for name in ["source", *NODE_ATTRIBUTES]))
+
+
+def _table_schema():
+    import pyarrow as pa
+
+    return pa.schema([("source", pa.string()), ("target", pa.string()), ("level", pa.int32()),
+                      ("ai_percentage", pa.float64()), ("effort_share", pa.float64())])
+
+
+def read_json(file):
+    try:
+        data = json.load(file)
+        nodes, links = data["nodes"], data.get("links", data.get("edges", []))
+        builder = GraphBuilder()
+        builder.add_nodes([node["id"] for node in nodes],
+                          *([node.get(name) for node in nodes] for name in NODE_ATTRIBUTES))
+        builder.add_edges([link["source"] for link in links], [link["target"] for link in links])
+    except (KeyError, TypeError, AttributeError) as error:
+        raise ValueError(f"Not a node-link graph: missing {error}") from None
+    return builder.build()
+
+
+def read_graphml(file, chunk_size=CHUNK_SIZE):
+    builder = GraphBuilder()
+    keys = {}
+    nodes, edges = [], []
+    graph_element = None
+    try:
+        for event, element in ElementTree.iterparse(file, events=("start", "end")):
+            tag = element.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                if tag == "graph" and graph_element is None:
+                    graph_element = element
+                continue
+            if tag == "key":
+                keys[element.get("id")] = element.get("attr.name")
+            elif tag == "node":
+                data = {keys.get(child.get("key")): child.text for child in element}
+                nodes.append((element.get("id"), *(data.get(name) for name in NODE_ATTRIBUTES)))
+            elif tag == "edge":
+                edges.append((element.get("source"), element.get("target")))
+            else:
+                continue
+            if graph_element is not None:
+                # Drop the parsed elements so the tree never holds the whole graph
+                graph_element.clear()
+            if len(nodes) >= chunk_size:
+                builder.add_nodes(*zip(*nodes))
+                nodes = []
+            if len(edges) >= chunk_size:
+                builder.add_edges(*zip(*edges))
+                edges = []
+    except ElementTree.ParseError as error:
+        raise ValueError(f"Invalid GraphML: {error}") from None
+    if nodes:
+        builder.add_nodes(*zip(*nodes))
+    if edges:
+        builder.add_edges(*zip(*edges))
+    return builder.build()
+
+
+def read_csv(file, chunk_size=CHUNK_SIZE):
+    import pyarrow.csv as pv
+
+    builder = GraphBuilder()
+    reader = pv.open_csv(
+        file, read_options=pv.ReadOptions(block_size=chunk_size * 64),
+        # Fixed column types keep every block's schema the same; empty cells are nulls
+        convert_options=pv.ConvertOptions(column_types=_table_schema(), strings_can_be_null=True))
+    for batch in reader:
+        _add_rows(builder, batch)
+    return builder.build()
+
+
+def read_parquet(file, chunk_size=CHUNK_SIZE):
+    import pyarrow.parquet as pq
+
+    builder = GraphBuilder()
+    for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_size):
+        _add_rows(builder, batch)
+    return builder.build()
+
+
+def read_arrow(file):
+    import pyarrow as pa
+
+    builder = GraphBuilder()
+    reader = pa.ipc.open_file(file)
+    for i in range(reader.num_record_batches):
+        _add_rows(builder, reader.get_batch(i))
+    return builder.build()
+
+
+def read_graph(file, fmt, chunk_size=CHUNK_SIZE):
+    """Read a GraphState from a binary file object; malformed files raise ValueError"""
+    if fmt == "json":
+        return read_json(file)
+    if fmt == "graphml":
+        return read_graphml(file, chunk_size)
+    import pyarrow as pa
+
+    try:
+        if fmt == "csv":
+            return read_csv(file, chunk_size)
+        if fmt == "parquet":
+            return read_parquet(file, chunk_size)
+        if fmt == "arrow":
+            return read_arrow(file)
+    except pa.ArrowException as error:
+        raise ValueError(f"Invalid {fmt} graph file: {error}") from None
+    raise ValueError(f"Unknown graph format {fmt!r}")
+
+
+def _chunks(size, chunk_size):
+    for start in range(0, size, chunk_size):
+        yield start, min(start + chunk_size, size)
+
+
+def _edge_names(graph):
+    """Source and target names of every edge, in GraphState.edges() order"""
+    names = np.asarray(graph.names, dtype=object)
+    return names[np.repeat(np.arange(len(graph)), graph.out_degree())], names[graph.child_idx]
+
+
+def _record_batches(graph, chunk_size):
+    """The tabular layout as pyarrow record batches: node rows, then edge rows"""
+    import pyarrow as pa
+
+    schema = _table_schema()
+    for start, end in _chunks(len(graph), chunk_size):
+        size = end - start
+        yield pa.record_batch([
+            pa.array(graph.names[start:end], pa.string()), pa.nulls(size, pa.string()),
+            pa.array(graph.level[start:end]), pa.array(graph.ai_percentage[start:end]),
+            pa.array(graph.effort_share[start:end])], schema=schema)
+    sources, targets = _edge_names(graph)
+    for start, end in _chunks(len(sources), chunk_size):
+        size = end - start
+        yield pa.record_batch([
+            pa.array(sources[start:end], pa.string()), pa.array(targets[start:end], pa.string()),
+            pa.nulls(size, pa.int32()), pa.nulls(size, pa.float64()), pa.nulls(size, pa.float64())],
+            schema=schema)
+
+
+def _node_rows(graph, start, end):
+    """(name, level, ai_percentage, effort_share) of a range of nodes, as Python values"""
+    return zip(graph.names[start:end], graph.level[start:end].tolist(),
+               graph.ai_percentage[start:end].tolist(), graph.effort_share[start:end].tolist())
+
+
+def _json_chunks(graph, chunk_size):
+    dumps = json.dumps
+    yield '{"directed": true, "multigraph": false, "graph": {}, "nodes": [\n'
+    for start, end in _chunks(len(graph), chunk_size):
+        # Formatted directly: json.dumps of a dict per row is several times slower
+        nodes = (f'{{"id": {dumps(name)}, "level": {level}, "ai_percentage": {pct!r}, "effort_share": {share!r}}}'
+                 for name, level, pct, share in _node_rows(graph, start, end))
+        yield (",\n" if start else "") + ",\n".join(nodes)
+    yield '\n], "links": [\n'
+    sources, targets = _edge_names(graph)
+    for start, end in _chunks(len(sources), chunk_size):
+        links = (f'{{"source": {dumps(source)}, "target": {dumps(target)}}}'
+                 for source, target in zip(sources[start:end], targets[start:end]))
+        yield (",\n" if start else "") + ",\n".join(links)
+    yield "\n]}\n"
+
+
+def _graphml_chunks(graph, chunk_size):
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    for name, kind in NODE_ATTRIBUTES.items():
+        yield f'  <key id="{name}" for="node" attr.name="{name}" attr.type="{kind}"/>\n'
+    yield '  <graph edgedefault="directed">\n'
+    for start, end in _chunks(len(graph), chunk_size):
+        yield "".join(
+            f'    <node id={quoteattr(str(name))}><data key="level">{level}</data>'
+            f'<data key="ai_percentage">{pct!r}</data><data key="effort_share">{share!r}</data></node>\n'
+            for name, level, pct, share in _node_rows(graph, start, end))
+    sources, targets = _edge_names(graph)
+    for start, end in _chunks(len(sources), chunk_size):
+        yield "".join(f'    <edge source={quoteattr(str(source))} target={quoteattr(str(target))}/>\n'
+                      for source, target in zip(sources[start:end], targets[start:end]))
+    yield "  </graph>\n</graphml>\n"
+
+
+def write_graph(graph, file, fmt, chunk_size=CHUNK_SIZE):
+    """Write ``graph`` to a binary file object chunk by chunk"""
+    if fmt in ("json", "graphml"):
+        chunks = _json_chunks if fmt == "json" else _graphml_chunks
+        for chunk in chunks(graph, chunk_size):
+            file.write(chunk.encode("utf-8"))
+        return
+    if fmt == "csv":
+        import pyarrow.csv as pv
+
+        writer = pv.CSVWriter(file, _table_schema())
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(file, _table_schema())
+    elif fmt == "arrow":
+        import pyarrow as pa
+
+        writer = pa.ipc.new_file(file, _table_schema())
+    else:
+        raise ValueError(f"Unknown graph format {fmt!r}")
+    with writer:
+        for batch in _record_batches(graph, chunk_size):
+            writer.write_batch(batch)
+
+
+def export_bytes(graph, fmt, chunk_size=CHUNK_SIZE):
+    """The exported file as bytes, for download buttons"""
+    import io
+
+    buffer = io.BytesIO()
+    write_graph(graph, buffer, fmt, chunk_size)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert SDLC graphs between interchange formats")
+    parser.add_argument("input", help="Graph file to read")
+    parser.add_argument("output", help="Graph file to write")
+    parser.add_argument("--from", dest="input_format", choices=GRAPH_FORMATS,
+                        help="Input format (default: from the extension)")
+    parser.add_argument("--to", dest="output_format", choices=GRAPH_FORMATS,
+                        help="Output format (default: from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        with open(args.input, "rb") as file:
+            graph = read_graph(file, graph_format(args.input, args.input_format), args.chunk_size)
+        with open(args.output, "wb") as file:
+            write_graph(graph, file, graph_format(args.output, args.output_format), args.chunk_size)
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+    print(f"Converted {len(graph)} nodes and {len(graph.child_idx)} edges to {args.output} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Server-side layered tidy-tree layout for the SDLC graph"""
+import numpy as np
+
+# Horizontal distance between consecutive levels
+LEVEL_SPACING = 400
+# Vertical distance between neighbouring leaves
+SIBLING_SPACING = 160
+
+
+def tidy_tree_layout(graph, level_spacing=LEVEL_SPACING, sibling_spacing=SIBLING_SPACING):
+    """Compute fixed (x, y) coordinates for every node of a GraphState.
+
+    x follows the node's ``level`` attribute. y comes from a tidy tree over a
+    spanning forest of the graph: leaves take consecutive slots in depth-first
+    order and every parent is centred over its first and last child. Nodes
+    with several parents are placed under the first parent that reaches them;
+    nodes only reachable through a cycle start a tree of their own.
+    Returns an (n, 2) float array aligned with ``graph.names``.
+    """
+    n = len(graph)
+    positions = np.zeros((n, 2))
+    positions[:, 0] = graph.level * level_spacing
+    if n == 0:
+        return positions
+
+    has_parent = np.diff(graph.parent_ptr) > 0
+    # Plain lists are much faster than array slicing inside the walk
+    child_ptr = graph.child_ptr.tolist()
+    child_idx = graph.child_idx.tolist()
+    visited = [False] * n
+    y = [0.0] * n
+    next_slot = 0
+
+    # Roots first, then anything left over (cycles without an entry point)
+    for root in np.concatenate([np.flatnonzero(~has_parent), np.arange(n)]).tolist():
+        if visited[root]:
+            continue
+        visited[root] = True
+        # Iterative post-order walk over the spanning tree; each frame keeps
+        # the node, a cursor into its children and the children it placed
+        stack = [[root, 0, []]]
+        while stack:
+            frame = stack[-1]
+            node, cursor, placed = frame
+            end = child_ptr[node + 1]
+            cursor = max(cursor, child_ptr[node])
+            while cursor < end and visited[child_idx[cursor]]:
+                cursor += 1
+            if cursor < end:
+                child = child_idx[cursor]
+                frame[1] = cursor + 1
+                visited[child] = True
+                placed.append(child)
+                stack.append([child, 0, []])
+                continue
+
+            stack.pop()
+            if placed:
+                y[node] = (y[placed[0]] + y[placed[-1]]) / 2
+            else:
+                y[node] = next_slot * sibling_spacing
+                next_slot += 1
+
+    # Centre the drawing vertically around zero
+    y = np.array(y)
+    positions[:, 1] = y - (y.min() + y.max()) / 2
+    return positions
@@ -0,0 +1,161 @@
+"""Sparse effort-weighted rollup of leaf AI percentages and the calculator inputs derived from it.
+
+Every node's AI percentage is a fixed linear combination of the leaf
+percentages: the effort-weighted average of its children, applied
+recursively. RollupMatrix precomputes those coefficients once per graph
+structure as a sparse (nodes x leaves) matrix in CSR form, so a full
+recompute is a single matrix-vector product and many per-leaf adoption
+vectors can be rolled up at once.
+
+The SDLC phases then drive the calculator: the efficiency, time and
+maintenance sliders become the gains at full AI adoption, scaled by the
+effort-weighted adoption of the phases that produce them.
+"""
+import numpy as np
+
+from impact_engine import INPUT_DEFAULTS, compute_impact
+
+# Calculator inputs derived from the graph -> SDLC phases whose adoption drives them.
+# ai_percentage becomes the adoption itself; the other inputs are scaled by it.
+SAVINGS_DRIVERS = {
+    "ai_percentage": ["SDLC Process"],
+    "efficiency_gain": ["Design", "Implementation", "Testing"],
+    "time_savings": ["Planning", "Design", "Implementation", "Testing", "Deployment"],
+    "maintenance_reduction": ["Deployment", "Maintenance"],
+}
+# Path weights below this are dropped; only reached when a cycle feeds back into itself
+MIN_WEIGHT = 1e-12
+
+
+def _combine(rows, cols, weights, columns):
+    """Sum duplicate (row, col) entries; the result is sorted by row, then column"""
+    keys, inverse = np.unique(rows.astype(np.int64) * columns + cols, return_inverse=True)
+    return keys // columns, keys % columns, np.bincount(inverse, weights=weights, minlength=len(keys))
+
+
+class RollupMatrix:
+    """Sparse (nodes x leaves) matrix A with ``A @ leaf_percentages`` equal to every node's rollup.
+
+    A[node, leaf] sums, over every path from ``node`` down to ``leaf``, the
+    product of the child weights along the path (effort share over the
+    total effort share of the siblings). With the default equal shares this
+    reproduces sdlc_graph.update_parent_ai_percentages.
+    """
+    __slots__ = ("names", "leaves", "indptr", "indices", "data")
+
+    def __init__(self, graph):
+        n = len(graph)
+        self.names = graph.names
+        self.leaves = np.flatnonzero(graph.out_degree() == 0)
+
+        # Weight of every (parent, child) edge, in parent CSR order
+        out_degree = graph.out_degree()
+        owners = np.repeat(np.arange(n), out_degree)
+        shares = graph.effort_share[graph.child_idx]
+        total = np.bincount(owners, weights=shares, minlength=n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Siblings that all have zero effort share fall back to a plain average
+            edge_weight = np.where(total[owners] > 0, shares / total[owners], 1 / out_degree[owners])
+        # The same weights in child CSR order, so they can be looked up while walking up
+        edge_keys = owners.astype(np.int64) * n + graph.child_idx
+        up_keys = graph.parent_idx.astype(np.int64) * n + np.repeat(np.arange(n), np.diff(graph.parent_ptr))
+        up_weight = edge_weight[np.argsort(edge_keys)][np.searchsorted(np.sort(edge_keys), up_keys)]
+
+        # Walk every leaf's entry up one level per step, merging paths that meet
+        columns = max(len(self.leaves), 1)
+        node, col, weight = self.leaves, np.arange(len(self.leaves)), np.ones(len(self.leaves))
+        rows, cols, weights = [node], [col], [weight]
+        parent_count = np.diff(graph.parent_ptr)
+        for _ in range(n):
+            counts = parent_count[node]
+            if not counts.sum():
+                break
+            # Position of every entry's parents in the child-grouped parent arrays
+            starts = np.repeat(graph.parent_ptr[node], counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            positions = starts + offsets
+            node, col, weight = _combine(graph.parent_idx[positions], np.repeat(col, counts),
+                                         np.repeat(weight, counts) * up_weight[positions], columns)
+            keep = weight > MIN_WEIGHT
+            node, col, weight = node[keep], col[keep], weight[keep]
+            rows.append(node)
+            cols.append(col)
+            weights.append(weight)
+
+        rows, self.indices, self.data = _combine(np.concatenate(rows), np.concatenate(cols),
+                                                 np.concatenate(weights), columns)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+
+    @property
+    def shape(self):
+        return len(self.names), len(self.leaves)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def leaf_values(self, graph):
+        """Current leaf AI percentages of ``graph``, in column order"""
+        return graph.ai_percentage[self.leaves]
+
+    def matvec(self, values):
+        """Roll up leaf values of shape (..., leaves) to every node: shape (..., nodes)"""
+        values = np.asarray(values, dtype=float)
+        out = np.zeros(values.shape[:-1] + (self.shape[0],))
+        filled = np.flatnonzero(np.diff(self.indptr))
+        if len(filled):
+            products = values[..., self.indices] * self.data
+            out[..., filled] = np.add.reduceat(products, self.indptr[filled], axis=-1)
+        return out
+
+    def rows(self, nodes):
+        """Dense rows of the matrix for the named nodes, shape (len(nodes), leaves)"""
+        index = {name: i for i, name in enumerate(self.names)}
+        dense = np.zeros((len(nodes), self.shape[1]))
+        for row, name in enumerate(nodes):
+            start, end = self.indptr[index[name]], self.indptr[index[name] + 1]
+            dense[row, self.indices[start:end]] = self.data[start:end]
+        return dense
+
+
+def driver_weights(rollup, graph, drivers=SAVINGS_DRIVERS):
+    """Dense (drivers x leaves) weights turning leaf percentages into each driver's adoption.
+
+    Each driver averages the rollups of its phases by their effort share.
+    Phases missing from an edited graph are skipped; a driver left without
+    phases uses the root nodes instead.
+    """
+    present = set(graph.names)
+    roots = [graph.names[i] for i in np.flatnonzero(np.diff(graph.parent_ptr) == 0)]
+    weights = np.zeros((len(drivers), rollup.shape[1]))
+    for row, phases in enumerate(drivers.values()):
+        phases = [phase for phase in phases if phase in present] or roots
+        shares = np.array([graph.effort_share[graph.index[phase]] for phase in phases])
+        if shares.sum() <= 0:
+            shares = np.ones(len(phases))
+        if phases:
+            weights[row] = shares @ rollup.rows(phases) / shares.sum()
+    return weights
+
+
+def graph_driven_inputs(inputs, weights, leaf_values, drivers=SAVINGS_DRIVERS):
+    """Calculator inputs with the driver inputs derived from leaf percentages.
+
+    ``leaf_values`` is one adoption vector (leaves,) or many (scenarios,
+    leaves); the derived inputs then hold one value per scenario.
+    """
+    adoption = np.asarray(leaf_values, dtype=float) @ weights.T
+    derived = dict(inputs)
+    for column, name in enumerate(drivers):
+        if name == "ai_percentage":
+            derived[name] = adoption[..., column]
+        else:
+            full_gain = np.asarray(inputs.get(name, INPUT_DEFAULTS[name]), dtype=float)
+            derived[name] = full_gain * adoption[..., column] / 100
+    return derived
+
+
+def sweep(inputs, weights, leaf_matrix, drivers=SAVINGS_DRIVERS):
+    """Evaluate the calculator for every row of a (scenarios x leaves) matrix of leaf adoption"""
+    return compute_impact(graph_driven_inputs(inputs, weights, np.atleast_2d(leaf_matrix), drivers))
@@ -0,0 +1,223 @@
+"""Compact, array-backed SDLC graph state kept in the Streamlit session.
+
+Nodes are integer ids into ``names``; ``level``, ``ai_percentage`` and
+``effort_share`` are typed columns and the edges are stored twice in CSR form, once grouped by
+parent (children) and once grouped by child (parents). The state converts to
+and from a NetworkX DiGraph only when a structural edit needs it.
+"""
+import hashlib
+from collections import deque
+
+import numpy as np
+
+
+def _csr(groups, targets, size):
+    """Build (indptr, indices) arrays grouping ``targets`` by ``groups``"""
+    order = np.argsort(groups, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int32)
+    np.cumsum(np.bincount(groups, minlength=size), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32)
+
+
+class GraphState:
+    __slots__ = ("names", "level", "ai_percentage", "effort_share",
+                 "child_ptr", "child_idx", "parent_ptr", "parent_idx", "_index", "_names_digest")
+
+    def __init__(self, names, level, ai_percentage, sources, targets, effort_share=None):
+        self.names = list(names)
+        self.level = np.asarray(level, dtype=np.int32)
+        self.ai_percentage = np.asarray(ai_percentage, dtype=np.float64)
+        # Weight of each node among its siblings in the rollups; equal weights by default
+        self.effort_share = (np.ones(len(self.names)) if effort_share is None
+                             else np.asarray(effort_share, dtype=np.float64))
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        self.child_ptr, self.child_idx = _csr(sources, targets, len(self.names))
+        self.parent_ptr, self.parent_idx = _csr(targets, sources, len(self.names))
+        self._index = None
+        self._names_digest = None
+
+    @classmethod
+    def from_networkx(cls, G):
+        """Build the compact state from a DiGraph with level/ai_percentage(/effort_share) node attributes"""
+        names = list(G.nodes())
+        index = {name: i for i, name in enumerate(names)}
+        level = np.fromiter((G.nodes[n]["level"] for n in names), dtype=np.int32, count=len(names))
+        ai_percentage = np.fromiter((G.nodes[n]["ai_percentage"] for n in names), dtype=np.float64,
+                                    count=len(names))
+        effort_share = np.fromiter((G.nodes[n].get("effort_share", 1.0) for n in names), dtype=np.float64,
+                                   count=len(names))
+        edges = np.fromiter((index[n] for edge in G.edges() for n in edge), dtype=np.int32,
+                            count=2 * G.number_of_edges()).reshape(-1, 2)
+        return cls(names, level, ai_percentage, edges[:, 0], edges[:, 1], effort_share)
+
+    def to_networkx(self):
+        """Rebuild a NetworkX DiGraph, preserving node and edge order"""
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.add_nodes_from(
+            (name, {"level": int(level), "ai_percentage": float(pct), "effort_share": float(share)})
+            for name, level, pct, share in zip(self.names, self.level, self.ai_percentage, self.effort_share))
+        G.add_edges_from(self.edges())
+        return G
+
+    def copy(self):
+        """Copy whose percentage edits do not leak between states.
+
+        Only the percentage columns are copied: names, levels and edges are
+        never modified in place, so the copy shares them.
+        """
+        state = GraphState.__new__(GraphState)
+        for slot in GraphState.__slots__:
+            setattr(state, slot, getattr(self, slot))
+        state.ai_percentage = self.ai_percentage.copy()
+        state.effort_share = self.effort_share.copy()
+        return state
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def index(self):
+        """Mapping of node name -> integer id, built on first use"""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the arrays and node names"""
+        arrays = (self.level, self.ai_percentage, self.effort_share, self.child_ptr, self.child_idx,
+                  self.parent_ptr, self.parent_idx)
+        return sum(a.nbytes for a in arrays) + sum(len(str(name)) for name in self.names)
+
+    def fingerprint(self, include_percentages=True):
+        """Content hash of the graph, used to skip re-rendering an unchanged graph.
+
+        With ``include_percentages=False`` only the structure (names, levels
+        and edges) is hashed, which is what the layout depends on.
+        """
+        if self._names_digest is None:
+            # Names never change within a state object, so hash them once
+            self._names_digest = hashlib.sha1("\0".join(map(str, self.names)).encode("utf-8")).digest()
+        digest = hashlib.sha1(self._names_digest)
+        arrays = [self.level, self.child_ptr, self.child_idx]
+        if include_percentages:
+            arrays += [self.ai_percentage, self.effort_share]
+        for array in arrays:
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def children(self, i):
+        return self.child_idx[self.child_ptr[i]:self.child_ptr[i + 1]]
+
+    def parents(self, i):
+        return self.parent_idx[self.parent_ptr[i]:self.parent_ptr[i + 1]]
+
+    def out_degree(self):
+        return np.diff(self.child_ptr)
+
+    def leaves(self):
+        """Names of the nodes without children"""
+        return [self.names[i] for i in np.flatnonzero(self.out_degree() == 0)]
+
+    def edges(self):
+        """(source, target) name pairs, grouped by source"""
+        sources = np.repeat(np.arange(len(self.names)), self.out_degree())
+        return [(self.names[s], self.names[t]) for s, t in zip(sources, self.child_idx)]
+
+    def to_d3(self):
+        """Node/link dict in the shape expected by the D3 visualization"""
+        nodes = [{"id": name, "level": int(level), "ai_percentage": float(pct)}
+                 for name, level, pct in zip(self.names, self.level, self.ai_percentage)]
+        links = [{"source": source, "target": target} for source, target in self.edges()]
+        return {"nodes": nodes, "links": links}
+
+    def set_ai_percentage(self, node, value):
+        """Set a node's AI percentage and update its ancestors' rollups in place.
+
+        Mirrors sdlc_graph.propagate_ai_percentages on the arrays: only the
+        ancestors of ``node`` are recomputed, children before parents.
+        """
+        start = self.index[node]
+        self.ai_percentage[start] = value
+        self.update_rollups([start])
+
+    def set_effort_share(self, node, value):
+        """Set a node's effort share and update the rollups of its ancestors in place"""
+        start = self.index[node]
+        self.effort_share[start] = value
+        self.update_rollups([start])
+
+    def recompute_rollups(self):
+        """Recompute every parent's rollup from the leaves, one vectorized pass per height.
+
+        Equivalent to update_rollups over all nodes for acyclic graphs; nodes
+        on a cycle are left to update_rollups afterwards.
+        """
+        out_degree = self.out_degree()
+        parent_count = np.diff(self.parent_ptr)
+        pending = out_degree.copy()
+        frontier = np.flatnonzero(pending == 0)
+        while len(frontier):
+            # Parents of the finished frontier, one entry per edge
+            counts = parent_count[frontier]
+            starts = np.repeat(self.parent_ptr[frontier] - (np.cumsum(counts) - counts), counts)
+            parents = self.parent_idx[starts + np.arange(counts.sum())]
+            pending -= np.bincount(parents, minlength=len(pending)).astype(pending.dtype)
+            frontier = np.unique(parents[pending[parents] == 0])
+            if not len(frontier):
+                break
+            # Effort-weighted mean of the children of every frontier node
+            counts = out_degree[frontier]
+            owners = np.repeat(np.arange(len(frontier)), counts)
+            starts = np.repeat(self.child_ptr[frontier] - (np.cumsum(counts) - counts), counts)
+            children = self.child_idx[starts + np.arange(counts.sum())]
+            shares = self.effort_share[children]
+            total = np.bincount(owners, weights=shares, minlength=len(frontier))
+            weighted = np.bincount(owners, weights=shares * self.ai_percentage[children], minlength=len(frontier))
+            plain = np.bincount(owners, weights=self.ai_percentage[children], minlength=len(frontier)) / counts
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.ai_percentage[frontier] = np.where(total > 0, weighted / total, plain)
+        cyclic = np.flatnonzero(pending > 0)
+        if len(cyclic):
+            self.update_rollups(cyclic.tolist())
+
+    def update_rollups(self, starts):
+        """Recompute the rollups of the node ids ``starts`` and all their ancestors, children before parents"""
+        # Collect the dirty ancestors
+        dirty = set(starts)
+        queue = deque(dirty)
+        while queue:
+            for parent in self.parents(queue.popleft()):
+                if parent not in dirty:
+                    dirty.add(parent)
+                    queue.append(parent)
+
+        # Count the dirty children of every dirty node, then peel from the bottom
+        pending = {i: sum(1 for c in self.children(i) if c in dirty) for i in dirty}
+        ready = deque(i for i, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            i = ready.popleft()
+            order.append(i)
+            for parent in self.parents(i):
+                if parent in pending:
+                    pending[parent] -= 1
+                    if pending[parent] == 0:
+                        ready.append(parent)
+        # Nodes on a cycle never become ready: fall back to the deepest level first
+        remaining = [i for i in dirty if pending[i] > 0]
+        order += sorted(remaining, key=lambda i: self.level[i], reverse=True)
+
+        for i in order:
+            children = self.children(i)
+            if len(children):
+                # Weighted by effort share like sdlc_graph.calculate_parent_ai_percentage
+                shares = self.effort_share[children]
+                total_share = shares.sum()
+                if total_share > 0:
+                    self.ai_percentage[i] = (shares * self.ai_percentage[children]).sum() / total_share
+                else:
+                    self.ai_percentage[i] = self.ai_percentage[children].mean()
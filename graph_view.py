@@ -0,0 +1,685 @@
+"""Rendering of the D3 graph visualization, memoized on the graph content"""
+import json
+
+from graph_layout import tidy_tree_layout
+
+# Graphs with more nodes than this are drawn on a canvas instead of SVG
+CANVAS_NODE_THRESHOLD = 1500
+
+
+def graph_delta(previous, current):
+    """Compare two D3 payloads and return the ids of added, removed and changed nodes and links"""
+    previous_nodes = {node["id"]: node for node in previous["nodes"]}
+    current_nodes = {node["id"]: node for node in current["nodes"]}
+    previous_links = {(link["source"], link["target"]) for link in previous["links"]}
+    current_links = {(link["source"], link["target"]) for link in current["links"]}
+    return {
+        "added_nodes": [n for n in current_nodes if n not in previous_nodes],
+        "removed_nodes": [n for n in previous_nodes if n not in current_nodes],
+        "changed_nodes": [n for n, node in current_nodes.items()
+                          if n in previous_nodes and previous_nodes[n] != node],
+        "added_links": sorted(current_links - previous_links),
+        "removed_links": sorted(previous_links - current_links),
+    }
+
+
+def attach_layout(graph_data, positions):
+    """Return a copy of the payload with fixed x/y coordinates on every node"""
+    nodes = [dict(node, x=round(float(x), 1), y=round(float(y), 1))
+             for node, (x, y) in zip(graph_data["nodes"], positions)]
+    return {"nodes": nodes, "links": graph_data["links"]}
+
+
+def build_graph_html(graph_data, animate=None, relax=False):
+    """Build the D3.js visualization page for a node/link payload.
+
+    ``animate`` lists the node ids to reveal with the level-by-level
+    animation; by default every node is animated. When the nodes carry x/y
+    coordinates they are drawn in place, with a short collision-only
+    relaxation if ``relax`` is set; otherwise a force simulation lays them out.
+    """
+    payload = dict(graph_data, relax=relax)
+    if animate is not None:
+        payload["animate"] = list(animate)
+    # Escape "</" so node names cannot close the script tag
+    graph_json = json.dumps(payload).replace("</", "<\\/")
+    
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <script src="https://d3js.org/d3.v7.min.js"></script>
+        <link href="https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
+        <style>
+            body {{ 
+                margin: 0; 
+                padding: 0; 
+                background-color: transparent; 
+                width: 100%;
+                height: 100%;
+                font-family: 'DM Sans', sans-serif;
+            }}
+            #visualization {{
+                width: 100%;
+                height: 800px;
+                margin: 0;
+                padding: 0;
+                background-color: transparent;
+            }}
+            svg {{
+                width: 100%;
+                height: 100%;
+                background-color: transparent;
+            }}
+            .node {{ cursor: pointer; }}
+            .node text {{
+                pointer-events: none;
+                font-family: 'DM Sans', sans-serif;
+                font-size: 12px;
+                text-anchor: middle;
+                dominant-baseline: middle;
+                fill: white;
+                font-weight: 600;
+            }}
+            .link {{ 
+                stroke: #999; 
+                stroke-opacity: 0.6;
+                stroke-width: 2;
+            }}
+            .node circle {{ 
+                transition: r 0.2s, fill 0.2s, stroke 0.2s;
+                stroke-width: 2px;
+                stroke: white;
+            }}
+            .node text {{ transition: font-size 0.2s; }}
+            .link {{ transition: stroke-opacity 0.2s; }}
+            .controls {{
+                position: absolute;
+                top: 10px;
+                right: 10px;
+                background: rgba(255, 255, 255, 0.9);
+                padding: 10px;
+                border-radius: 5px;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            }}
+            .tooltip {{
+                position: absolute;
+                background: rgba(255, 255, 255, 0.9);
+                padding: 5px 10px;
+                border-radius: 3px;
+                font-size: 12px;
+                pointer-events: none;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            }}
+        </style>
+    </head>
+    <body>
+        <div id="visualization"></div>
+        <div class="tooltip"></div>
+        <script>
+            // Wait for the DOM to be fully loaded
+            document.addEventListener('DOMContentLoaded', function() {{
+                const data = {graph_json};
+                
+                // Only nodes in data.animate are revealed with the level animation;
+                // nodes that were already on screen before an edit appear immediately
+                const animated = new Set(data.animate || data.nodes.map(function(d) {{ return d.id; }}));
+                const maxLevel = d3.max(data.nodes, function(d) {{ return d.level; }}) || 0;
+                
+                // Get container dimensions
+                const container = document.getElementById('visualization');
+                const width = container.clientWidth;
+                const height = 800;
+                
+                // Create SVG
+                const svg = d3.select("#visualization")
+                    .append("svg")
+                    .attr("width", width)
+                    .attr("height", height)
+                    .attr("viewBox", "0 0 " + width + " " + height)
+                    .attr("preserveAspectRatio", "xMidYMid meet")
+                    .style("background-color", "transparent");
+                
+                const g = svg.append("g");
+                
+                // Create a map of connected nodes for quick lookup
+                const connectedNodes = {{}};
+                data.links.forEach(link => {{
+                    if (!connectedNodes[link.source]) connectedNodes[link.source] = new Set();
+                    if (!connectedNodes[link.target]) connectedNodes[link.target] = new Set();
+                    connectedNodes[link.source].add(link.target);
+                    connectedNodes[link.target].add(link.source);
+                }});
+                
+                // Nodes carry fixed coordinates when the server computed the layout
+                const precomputed = data.nodes.length > 0 && data.nodes.every(function(d) {{ return d.x !== undefined; }});
+                let simulation;
+                
+                if (precomputed) {{
+                    // Render statically; only resolve link endpoints unless a short relaxation is requested
+                    simulation = d3.forceSimulation(data.nodes)
+                        .force("link", d3.forceLink(data.links)
+                            .id(function(d) {{ return d.id; }})
+                            .strength(0))
+                        .stop();
+                    if (data.relax) {{
+                        simulation
+                            .force("collision", d3.forceCollide().radius(function(d) {{
+                                return 40 + Math.max(0, 5 - d.level) * 10;
+                            }}))
+                            .alpha(0.3)
+                            .alphaDecay(0.1)
+                            .restart();
+                    }}
+                }} else {{
+                    // Initialize positions based on level
+                    data.nodes.forEach(node => {{
+                        node.x = width / 2 + (node.level - 2) * 150;
+                        node.y = height / 2 + (node.level % 2 ? 80 : -80);
+                    }});
+                    
+                    simulation = d3.forceSimulation(data.nodes)
+                        .force("link", d3.forceLink(data.links)
+                            .id(function(d) {{ return d.id; }})
+                            .distance(function(d) {{
+                                // Increase distance based on level difference
+                                return 400 + (Math.abs(d.source.level - d.target.level) * 150);
+                            }}))
+                        .force("charge", d3.forceManyBody().strength(function(d) {{
+                            // Stronger repulsion for better spacing
+                            return d.id === "SDLC Process" ? -10000 : -3000;
+                        }}))
+                        .force("center", d3.forceCenter(width / 2, height / 2))
+                        .force("collision", d3.forceCollide().radius(function(d) {{
+                            // Larger collision radius to prevent node overlap
+                            return 150 + (d.level * 25);
+                        }}))
+                        .force("x", d3.forceX().strength(0.3).x(function(d) {{
+                            // Strong horizontal force to maintain clear hierarchy
+                            return (d.level * 250) + (width / 4);
+                        }}))
+                        .force("y", d3.forceY().strength(0.2).y(function(d) {{
+                            // Vertical force to spread nodes
+                            return height / 2 + (d.level % 2 ? 150 : -150);
+                        }}))
+                        .force("radial", d3.forceRadial(function(d) {{
+                            // Radial force to maintain circular layout
+                            return d.level * 250;
+                        }}, width/2, height/2).strength(0.4))
+                        .alphaDecay(0.03)  // Slower decay for more stable layout
+                        .velocityDecay(0.8);  // Higher velocity decay for smoother movement
+                }}
+                
+                // Create links with initial opacity 0
+                const link = g.append("g")
+                    .selectAll("line")
+                    .data(data.links)
+                    .enter().append("line")
+                    .attr("class", "link")
+                    .attr("stroke-width", 2)
+                    .style("opacity", function(d) {{
+                        return animated.has(d.source.id) || animated.has(d.target.id) ? 0 : 1;
+                    }})
+                    .attr("marker-end", "url(#arrowhead)");  // Add arrowhead to links
+                
+                // Add arrowhead definition
+                svg.append("defs").append("marker")
+                    .attr("id", "arrowhead")
+                    .attr("viewBox", "0 -5 10 10")
+                    .attr("refX", 15)
+                    .attr("refY", 0)
+                    .attr("orient", "auto")
+                    .attr("markerWidth", 6)
+                    .attr("markerHeight", 6)
+                    .append("path")
+                    .attr("d", "M0,-5L10,0L0,5")
+                    .attr("fill", "#999");
+                
+                // Create nodes with initial opacity 0
+                const node = g.append("g")
+                    .selectAll("g")
+                    .data(data.nodes)
+                    .enter().append("g")
+                    .attr("class", "node")
+                    .style("opacity", function(d) {{ return animated.has(d.id) ? 0 : 1; }})
+                    .call(d3.drag()
+                        .on("start", dragstarted)
+                        .on("drag", dragged)
+                        .on("end", dragended));
+                
+                node.append("circle")
+                    .attr("r", function(d) {{ 
+                        const textLength = d.id.length;
+                        const textSize = textLength * 0.8;
+                        const levelSize = (5 - d.level) * 10;
+                        return Math.max(30 + textSize, 40 + levelSize);
+                    }})
+                    .attr("fill", function(d) {{
+                        if (d.ai_percentage > 0) {{
+                            return "black";
+                        }} else {{
+                            return d3.schemeCategory10[d.level % 10];
+                        }}
+                    }})
+                    .attr("stroke", "white")
+                    .attr("stroke-width", 2)
+                    .on("mouseover", function(event, d) {{
+                        const connected = connectedNodes[d.id] || new Set();
+                        node.selectAll("circle")
+                            .style("opacity", function(node) {{
+                                return connected.has(node.id) || node.id === d.id ? 1 : 0.3;
+                            }});
+                        node.selectAll("text")
+                            .style("opacity", function(node) {{
+                                return connected.has(node.id) || node.id === d.id ? 1 : 0.3;
+                            }});
+                        link.style("opacity", function(l) {{
+                            return l.source.id === d.id || l.target.id === d.id ? 1 : 0.3;
+                        }});
+                        
+                        // Show tooltip with AI percentage
+                        const tooltip = d3.select(".tooltip");
+                        tooltip
+                            .style("left", (event.pageX + 10) + "px")
+                            .style("top", (event.pageY - 10) + "px")
+                            .style("opacity", 1)
+                            .html(`<strong>${{d.id}}</strong><br>AI Augmentation: ${{d.ai_percentage.toFixed(1)}}%`);
+                    }})
+                    .on("mousemove", function(event) {{
+                        const tooltip = d3.select(".tooltip");
+                        tooltip
+                            .style("left", (event.pageX + 10) + "px")
+                            .style("top", (event.pageY - 10) + "px");
+                    }})
+                    .on("mouseout", function() {{
+                        node.selectAll("circle").style("opacity", 1);
+                        node.selectAll("text").style("opacity", 1);
+                        link.style("opacity", 1);
+                        
+                        // Hide tooltip
+                        d3.select(".tooltip").style("opacity", 0);
+                    }});
+                
+                node.append("text")
+                    .attr("dy", 0)
+                    .attr("text-anchor", "middle")
+                    .attr("font-size", function(d) {{
+                        return 12 + (5 - d.level) * 2;
+                    }})
+                    .text(function(d) {{ return d.id; }});
+                
+                function ticked() {{
+                    link
+                        .attr("x1", function(d) {{ return d.source.x; }})
+                        .attr("y1", function(d) {{ return d.source.y; }})
+                        .attr("x2", function(d) {{ return d.target.x; }})
+                        .attr("y2", function(d) {{ return d.target.y; }});
+                    
+                    node.filter(function(d) {{ return d3.select(this).style("opacity") === "1" }})
+                        .attr("transform", function(d) {{ return "translate(" + d.x + "," + d.y + ")"; }});
+                }}
+                
+                simulation.on("tick", ticked);
+                // A static layout never ticks, so draw it once
+                if (precomputed) ticked();
+                
+                // Function to reveal nodes level by level
+                function revealLevel(level) {{
+                    node.filter(d => d.level === level && animated.has(d.id))
+                        .attr("transform", function(d) {{ 
+                            return "translate(" + d.x + "," + d.y + ") scale(0)"; 
+                        }})
+                        .transition()
+                        .duration(800)
+                        .style("opacity", 1)
+                        .attr("transform", function(d) {{ 
+                            return "translate(" + d.x + "," + d.y + ") scale(1)"; 
+                        }});
+                    
+                    link.filter(d => (d.source.level === level || d.target.level === level) &&
+                                     (animated.has(d.source.id) || animated.has(d.target.id)))
+                        .transition()
+                        .duration(800)
+                        .style("opacity", 1);
+                    
+                    if (level < maxLevel) {{
+                        setTimeout(() => revealLevel(level + 1), 1000);
+                    }}
+                }}
+                
+                // Start revealing from level 0
+                setTimeout(() => revealLevel(0), 500);
+                
+                function dragstarted(event, d) {{
+                    if (!event.active) simulation.alphaTarget(0.3).restart();
+                    d.fx = d.x;
+                    d.fy = d.y;
+                }}
+                
+                function dragged(event, d) {{
+                    d.fx = event.x;
+                    d.fy = event.y;
+                }}
+                
+                function dragended(event, d) {{
+                    if (!event.active) simulation.alphaTarget(0);
+                    d.fx = null;
+                    d.fy = null;
+                }}
+                
+                // Add zoom behavior
+                const zoom = d3.zoom()
+                    .scaleExtent([0.1, 4])
+                    .on("zoom", function(event) {{
+                        g.attr("transform", event.transform);
+                    }});
+                
+                svg.call(zoom);
+                
+                // Initial zoom to fit all nodes
+                setTimeout(function() {{
+                    const bounds = g.node().getBBox();
+                    const fullWidth = bounds.width;
+                    const fullHeight = bounds.height;
+                    const midX = bounds.x + fullWidth / 2;
+                    const midY = bounds.y + fullHeight / 2;
+                    
+                    const scale = 0.8 / Math.max(fullWidth / width, fullHeight / height);
+                    const translate = [width / 2 - scale * midX, height / 2 - scale * midY];
+                    
+                    svg.call(zoom.transform, d3.zoomIdentity
+                        .translate(translate[0], translate[1])
+                        .scale(scale));
+                }}, 1000);
+            }});
+        </script>
+    </body>
+    </html>
+    """
+
+
+def build_canvas_html(graph_data):
+    """Build a 2D canvas rendering of a laid-out payload for large graphs.
+
+    Nodes must carry x/y coordinates. Hit-testing uses a d3 quadtree of the
+    visible levels, labels are drawn only once nodes are large enough on
+    screen, and levels deeper than the zoom level warrants are collapsed into
+    their visible ancestors.
+    """
+    # Escape "</" so node names cannot close the script tag
+    graph_json = json.dumps(graph_data).replace("</", "<\\/")
+    
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <script src="https://d3js.org/d3.v7.min.js"></script>
+        <link href="https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700&display=swap" rel="stylesheet">
+        <style>
+            body {{
+                margin: 0;
+                padding: 0;
+                background-color: transparent;
+                font-family: 'DM Sans', sans-serif;
+            }}
+            #visualization {{
+                width: 100%;
+                height: 800px;
+                margin: 0;
+                padding: 0;
+            }}
+            canvas {{ display: block; cursor: grab; }}
+            .tooltip {{
+                position: absolute;
+                background: rgba(255, 255, 255, 0.9);
+                padding: 5px 10px;
+                border-radius: 3px;
+                font-size: 12px;
+                pointer-events: none;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+                opacity: 0;
+            }}
+        </style>
+    </head>
+    <body>
+        <div id="visualization"></div>
+        <div class="tooltip"></div>
+        <script>
+            document.addEventListener('DOMContentLoaded', function() {{
+                const data = {graph_json};
+                
+                const container = document.getElementById('visualization');
+                const width = container.clientWidth;
+                const height = 800;
+                const ratio = window.devicePixelRatio || 1;
+                
+                const canvas = d3.select("#visualization").append("canvas")
+                    .attr("width", width * ratio)
+                    .attr("height", height * ratio)
+                    .style("width", width + "px")
+                    .style("height", height + "px");
+                const context = canvas.node().getContext("2d");
+                const tooltip = d3.select(".tooltip");
+                
+                // Index nodes and precompute radii, colours and neighbours once
+                const byId = new Map();
+                data.nodes.forEach(function(d) {{
+                    d.r = Math.max(30 + String(d.id).length * 0.8, 40 + Math.max(0, 5 - d.level) * 10);
+                    d.color = d.ai_percentage > 0 ? "black" : d3.schemeCategory10[d.level % 10];
+                    d.neighbors = new Set();
+                    d.hasChildren = false;
+                    byId.set(d.id, d);
+                }});
+                const links = data.links.map(function(l) {{
+                    const link = {{source: byId.get(l.source), target: byId.get(l.target)}};
+                    link.source.neighbors.add(link.target);
+                    link.target.neighbors.add(link.source);
+                    link.source.hasChildren = true;
+                    return link;
+                }});
+                const maxLevel = d3.max(data.nodes, function(d) {{ return d.level; }}) || 0;
+                const quadtree = d3.quadtree(data.nodes, function(d) {{ return d.x; }}, function(d) {{ return d.y; }});
+                const maxRadius = d3.max(data.nodes, function(d) {{ return d.r; }}) || 0;
+                // Hit-testing quadtrees holding only the nodes shown at each depth, built on first hover
+                const hitTrees = new Map();
+                function hitTree(depth) {{
+                    if (!hitTrees.has(depth)) {{
+                        const shown = data.nodes.filter(function(d) {{ return d.level <= depth; }});
+                        hitTrees.set(depth, d3.quadtree(shown, function(d) {{ return d.x; }}, function(d) {{ return d.y; }}));
+                    }}
+                    return hitTrees.get(depth);
+                }}
+                
+                let transform = d3.zoomIdentity;
+                let hovered = null;
+                let pending = false;
+                
+                // Deeper levels are folded into their ancestors as the view zooms out
+                function visibleDepth(k) {{
+                    if (k >= 0.5) return maxLevel;
+                    return Math.max(1, Math.min(maxLevel, Math.floor(maxLevel * k * 2) + 1));
+                }}
+                
+                function visibleNodes(depth) {{
+                    // Viewport in graph coordinates, padded by the largest radius
+                    const x0 = transform.invertX(0) - maxRadius, y0 = transform.invertY(0) - maxRadius;
+                    const x1 = transform.invertX(width) + maxRadius, y1 = transform.invertY(height) + maxRadius;
+                    const found = [];
+                    quadtree.visit(function(quad, qx0, qy0, qx1, qy1) {{
+                        if (!quad.length) {{
+                            do {{
+                                const d = quad.data;
+                                if (d.level <= depth && d.x >= x0 && d.x <= x1 && d.y >= y0 && d.y <= y1) found.push(d);
+                            }} while ((quad = quad.next));
+                        }}
+                        return qx0 > x1 || qy0 > y1 || qx1 < x0 || qy1 < y0;
+                    }});
+                    return found;
+                }}
+                
+                function draw() {{
+                    pending = false;
+                    const k = transform.k;
+                    const depth = visibleDepth(k);
+                    const nodes = visibleNodes(depth);
+                    const dim = hovered !== null;
+                    
+                    context.save();
+                    context.setTransform(ratio, 0, 0, ratio, 0, 0);
+                    context.clearRect(0, 0, width, height);
+                    context.translate(transform.x, transform.y);
+                    context.scale(k, k);
+                    
+                    // All links in a single path
+                    context.beginPath();
+                    links.forEach(function(l) {{
+                        if (l.source.level > depth || l.target.level > depth) return;
+                        context.moveTo(l.source.x, l.source.y);
+                        context.lineTo(l.target.x, l.target.y);
+                    }});
+                    context.strokeStyle = "#999";
+                    context.globalAlpha = dim ? 0.15 : 0.6;
+                    context.lineWidth = 2 / Math.max(k, 0.25);
+                    context.stroke();
+                    
+                    if (dim) {{
+                        context.beginPath();
+                        hovered.neighbors.forEach(function(n) {{
+                            if (n.level > depth) return;
+                            context.moveTo(hovered.x, hovered.y);
+                            context.lineTo(n.x, n.y);
+                        }});
+                        context.globalAlpha = 1;
+                        context.stroke();
+                    }}
+                    
+                    // Nodes batched by colour, one path per colour
+                    const groups = d3.group(nodes, function(d) {{ return d.color; }});
+                    groups.forEach(function(group, color) {{
+                        [false, true].forEach(function(highlighted) {{
+                            context.beginPath();
+                            group.forEach(function(d) {{
+                                const isHighlighted = !dim || d === hovered || hovered.neighbors.has(d);
+                                if (isHighlighted !== highlighted) return;
+                                context.moveTo(d.x + d.r, d.y);
+                                context.arc(d.x, d.y, d.r, 0, 2 * Math.PI);
+                            }});
+                            context.globalAlpha = highlighted ? 1 : 0.3;
+                            context.fillStyle = color;
+                            context.fill();
+                        }});
+                    }});
+                    
+                    // Mark nodes whose children are folded away at this zoom level
+                    context.beginPath();
+                    nodes.forEach(function(d) {{
+                        if (d.level === depth && d.hasChildren && depth < maxLevel) {{
+                            context.moveTo(d.x + d.r + 6, d.y);
+                            context.arc(d.x, d.y, d.r + 6, 0, 2 * Math.PI);
+                        }}
+                    }});
+                    context.globalAlpha = 0.8;
+                    context.strokeStyle = "#555";
+                    context.lineWidth = 3 / Math.max(k, 0.25);
+                    context.stroke();
+                    
+                    // Labels only once nodes are big enough on screen to hold them
+                    context.globalAlpha = 1;
+                    context.fillStyle = "white";
+                    context.textAlign = "center";
+                    context.textBaseline = "middle";
+                    nodes.forEach(function(d) {{
+                        if (d.r * k < 25) return;
+                        context.font = "600 " + (12 + Math.max(0, 5 - d.level) * 2) + "px 'DM Sans', sans-serif";
+                        context.fillText(d.id, d.x, d.y);
+                    }});
+                    
+                    context.restore();
+                }}
+                
+                function scheduleDraw() {{
+                    if (!pending) {{
+                        pending = true;
+                        requestAnimationFrame(draw);
+                    }}
+                }}
+                
+                const zoom = d3.zoom()
+                    .scaleExtent([0.005, 4])
+                    .on("zoom", function(event) {{
+                        transform = event.transform;
+                        scheduleDraw();
+                    }});
+                canvas.call(zoom);
+                
+                canvas.on("mousemove", function(event) {{
+                    const [mx, my] = d3.pointer(event);
+                    const depth = visibleDepth(transform.k);
+                    const x = transform.invertX(mx), y = transform.invertY(my);
+                    // Nearest node within the largest radius, then check the exact radius
+                    let found = hitTree(depth).find(x, y, maxRadius);
+                    if (found && Math.hypot(found.x - x, found.y - y) > found.r) found = null;
+                    if (found !== hovered) {{
+                        hovered = found;
+                        scheduleDraw();
+                    }}
+                    if (hovered) {{
+                        tooltip
+                            .style("left", (event.pageX + 10) + "px")
+                            .style("top", (event.pageY - 10) + "px")
+                            .style("opacity", 1)
+                            .html(`<strong>${{hovered.id}}</strong><br>AI Augmentation: ${{hovered.ai_percentage.toFixed(1)}}%`);
+                    }} else {{
+                        tooltip.style("opacity", 0);
+                    }}
+                }});
+                canvas.on("mouseleave", function() {{
+                    hovered = null;
+                    tooltip.style("opacity", 0);
+                    scheduleDraw();
+                }});
+                
+                // Initial zoom to fit all nodes
+                const [minX, maxX] = d3.extent(data.nodes, function(d) {{ return d.x; }});
+                const [minY, maxY] = d3.extent(data.nodes, function(d) {{ return d.y; }});
+                const fullWidth = (maxX - minX) + 2 * maxRadius;
+                const fullHeight = (maxY - minY) + 2 * maxRadius;
+                const scale = Math.min(4, 0.9 / Math.max(fullWidth / width, fullHeight / height));
+                canvas.call(zoom.transform, d3.zoomIdentity
+                    .translate(width / 2 - scale * (minX + maxX) / 2, height / 2 - scale * (minY + maxY) / 2)
+                    .scale(scale));
+                scheduleDraw();
+            }});
+        </script>
+    </body>
+    </html>
+    """
+
+
+def render_graph(graph, cache, relax=False):
+    """Return the visualization HTML for ``graph``, rebuilding it only when its content changes.
+
+    ``cache`` is a dict (e.g. in the session state) holding the fingerprint,
+    payload, layout and HTML of the last render. The tidy-tree layout is
+    recomputed only when the structure changes, and when the graph changed
+    only the nodes added or modified since the last render are animated.
+    Graphs above CANVAS_NODE_THRESHOLD nodes use the canvas renderer.
+    """
+    fingerprint = (graph.fingerprint(), relax)
+    if cache.get("fingerprint") != fingerprint:
+        structure = graph.fingerprint(include_percentages=False)
+        if cache.get("structure") != structure:
+            cache.update(structure=structure, positions=tidy_tree_layout(graph))
+
+        graph_data = graph.to_d3()
+        animate = None
+        if "graph_data" in cache:
+            delta = graph_delta(cache["graph_data"], graph_data)
+            animate = delta["added_nodes"] + delta["changed_nodes"]
+        payload = attach_layout(graph_data, cache["positions"])
+        if len(graph) > CANVAS_NODE_THRESHOLD:
+            html = build_canvas_html(payload)
+        else:
+            html = build_graph_html(payload, animate, relax)
+        cache.update(fingerprint=fingerprint, graph_data=graph_data, html=html)
+    return cache["html"]
@@ -0,0 +1,276 @@
+"""Vectorized AI impact calculations shared by the UI and batch tools"""
+import numpy as np
+
+import finance
+
+# Calculator inputs with the default values used by the Streamlit widgets
+INPUT_DEFAULTS = {
+    # Team & Project Metrics
+    "team_size": 10,
+    "avg_salary": 120000,
+    "current_cycle_time": 14,
+    "current_velocity": 20,
+    "sprint_duration": 2,
+    "features_per_sprint": 3,
+    # Financial Parameters
+    "discount_rate": 8.0,
+    "project_duration": 5,
+    # AI Impact Metrics
+    "ai_percentage": 30,
+    "efficiency_gain": 25,
+    "error_reduction": 30,
+    "time_savings": 20,
+    "maintenance_reduction": 15,
+    # Initial Setup Costs
+    "initial_ai_cost": 50000,
+    "infrastructure_cost": 20000,
+    "integration_cost": 15000,
+    "data_migration_cost": 10000,
+    # Training & Development Costs
+    "ai_training_cost": 10000,
+    "developer_training": 40,
+    "training_rate": 100,
+    "documentation_cost": 5000,
+    # Ongoing Operational Costs
+    "annual_ai_maintenance": 20000,
+    "cloud_service_cost": 1000,
+    "api_usage_cost": 500,
+    "support_contract": 15000,
+    # Additional Costs
+    "model_retraining": 10000,
+    "productivity_loss": 5,
+    "transition_support": 8000,
+    "risk_mitigation": 5000,
+    # Compliance & Security Costs
+    "security_audit": 12000,
+    "data_privacy": 8000,
+    "compliance_certification": 10000,
+}
+
+INPUT_NAMES = list(INPUT_DEFAULTS)
+
+# Metrics produced by compute_impact, in the order of the downloadable results
+RESULT_NAMES = [
+    "Annual Team Cost",
+    "Total Initial Cost",
+    "Total Training Cost",
+    "Total Annual Cost",
+    "Total Indirect Cost",
+    "Total AI Cost",
+    "Current Cycle Time",
+    "New Cycle Time",
+    "Cycle Time Reduction",
+    "Cycle Time Improvement",
+    "Efficiency Savings",
+    "Error Reduction Savings",
+    "Time Savings",
+    "Maintenance Savings",
+    "Total Savings",
+    "Net Savings",
+    "Monthly Savings",
+    "Daily Savings",
+    "ROI",
+    "Payback Period",
+    "NPV",
+    "IRR",
+    "IRR Solutions",
+    "Profitability Index",
+    "Discounted Payback Period",
+    "Free Cash Flow",
+    "ROI per Employee",
+    "Cost Savings Ratio",
+    "AI Investment Efficiency",
+    "Annual Savings per Employee",
+    "Feature Cost Reduction",
+    "AI Cost per Feature",
+    "Break-even Features",
+    "AI Impact Score",
+    "Current Velocity",
+    "New Velocity",
+    "Velocity Improvement",
+    "Current Features per Month",
+    "Additional Features per Month",
+    "Total Features per Month",
+    "Cost per Feature",
+]
+
+
+def prepare_inputs(inputs):
+    """Broadcast a mapping or DataFrame of inputs to equal-length float arrays.
+
+    Inputs that are not supplied fall back to INPUT_DEFAULTS.
+    """
+    unknown = [name for name in inputs if name not in INPUT_DEFAULTS]
+    if unknown:
+        raise ValueError(f"Unknown calculator inputs: {', '.join(map(str, unknown))}")
+
+    values = [
+        np.asarray(inputs[name] if name in inputs else default, dtype=float)
+        for name, default in INPUT_DEFAULTS.items()
+    ]
+    values = np.broadcast_arrays(*values)
+    return {name: np.ravel(value) for name, value in zip(INPUT_NAMES, values)}
+
+
+def compute_impact(inputs):
+    """Evaluate every calculator metric for one or many scenarios.
+
+    ``inputs`` maps input names (see INPUT_DEFAULTS) to scalars or arrays with
+    one element per scenario; a DataFrame with one row per scenario works too.
+    Returns a dict of result name -> numpy array, keyed like RESULT_NAMES.
+    """
+    x = prepare_inputs(inputs)
+    team_size = x["team_size"]
+    avg_salary = x["avg_salary"]
+    current_cycle_time = x["current_cycle_time"]
+    current_velocity = x["current_velocity"]
+    efficiency_gain = x["efficiency_gain"]
+    error_reduction = x["error_reduction"]
+    time_savings = x["time_savings"]
+    maintenance_reduction = x["maintenance_reduction"]
+    project_duration = x["project_duration"].astype(int)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Calculate total costs
+        total_initial_cost = (x["initial_ai_cost"] + x["infrastructure_cost"] + x["integration_cost"] +
+                              x["data_migration_cost"] + x["security_audit"] + x["data_privacy"] +
+                              x["compliance_certification"])
+
+        total_training_cost = (x["ai_training_cost"] + (x["developer_training"] * x["training_rate"] * team_size) +
+                               x["documentation_cost"])
+
+        total_annual_cost = (x["annual_ai_maintenance"] + (x["cloud_service_cost"] * 12) +
+                             (x["api_usage_cost"] * 12) + x["support_contract"] + x["model_retraining"])
+
+        total_indirect_cost = ((x["productivity_loss"] * team_size * (avg_salary / 260)) +
+                               x["transition_support"] + x["risk_mitigation"])
+
+        total_ai_cost = total_initial_cost + total_training_cost + total_annual_cost + total_indirect_cost
+
+        # Calculate costs and time metrics
+        annual_team_cost = team_size * avg_salary
+        sprints_per_month = 4 / x["sprint_duration"]
+        features_per_month = x["features_per_sprint"] * sprints_per_month
+
+        # Calculate new cycle time with AI impact
+        new_cycle_time = current_cycle_time * (1 - (efficiency_gain / 100))
+        cycle_time_reduction = current_cycle_time - new_cycle_time
+
+        # Calculate savings
+        efficiency_savings = annual_team_cost * (efficiency_gain / 100)
+        error_reduction_savings = annual_team_cost * (error_reduction / 100) * 0.3  # Assuming 30% of time spent on fixing errors
+        time_savings_amount = annual_team_cost * (time_savings / 100)
+        maintenance_savings = annual_team_cost * (maintenance_reduction / 100) * 0.2  # Assuming 20% of time spent on maintenance
+
+        total_savings = efficiency_savings + error_reduction_savings + time_savings_amount + maintenance_savings
+        net_savings = total_savings - total_annual_cost  # Subtract annual AI costs
+
+        # Calculate productivity metrics
+        new_velocity = current_velocity * (1 + (efficiency_gain / 100))
+        productivity_gain = (new_velocity - current_velocity) / current_velocity * 100
+        additional_features_per_month = features_per_month * (efficiency_gain / 100)
+
+        # Calculate ROI and payback period
+        roi = ((net_savings - total_ai_cost) / total_ai_cost) * 100
+        payback_period = total_ai_cost / net_savings  # in years
+
+        # Calculate NPV and IRR
+        initial_investment = total_initial_cost + total_training_cost + total_indirect_cost
+        annual_cash_flow = net_savings - total_annual_cost
+
+        cash_flows = finance.annuity_schedules(initial_investment, annual_cash_flow, project_duration)
+        npv = finance.npv(x["discount_rate"] / 100, cash_flows)
+        irr_rate, irr_solutions = finance.irr(cash_flows)
+        irr = irr_rate * 100
+
+        # Calculate Profitability Index
+        profitability_index = (npv + initial_investment) / initial_investment
+
+        # Calculate Discounted Payback Period (defaults to project duration if not achieved)
+        discounted_payback_period = finance.discounted_payback(x["discount_rate"] / 100, cash_flows,
+                                                               default=project_duration)
+
+        # Calculate additional financial metrics
+        free_cash_flow = net_savings - total_annual_cost
+        roi_per_employee = (net_savings - total_ai_cost) / team_size
+        cost_savings_ratio = total_savings / total_ai_cost
+        ai_investment_efficiency = net_savings / total_ai_cost
+        annual_savings_per_employee = net_savings / team_size
+
+        # Feature Cost Reduction
+        current_feature_cost = annual_team_cost / (features_per_month * 12)
+        new_feature_cost = annual_team_cost / ((features_per_month + additional_features_per_month) * 12)
+        feature_cost_reduction = ((current_feature_cost - new_feature_cost) / current_feature_cost) * 100
+
+        ai_cost_per_feature = total_ai_cost / (additional_features_per_month * 12)
+        break_even_features = total_ai_cost / (current_feature_cost - new_feature_cost)
+
+        # AI Impact Score (composite metric)
+        ai_impact_score = (
+            (efficiency_gain * 0.3) +
+            (error_reduction * 0.2) +
+            (time_savings * 0.2) +
+            (maintenance_reduction * 0.1) +
+            (productivity_gain * 0.2)
+        )
+
+        results = {
+            "Annual Team Cost": annual_team_cost,
+            "Total Initial Cost": total_initial_cost,
+            "Total Training Cost": total_training_cost,
+            "Total Annual Cost": total_annual_cost,
+            "Total Indirect Cost": total_indirect_cost,
+            "Total AI Cost": total_ai_cost,
+            "Current Cycle Time": current_cycle_time,
+            "New Cycle Time": new_cycle_time,
+            "Cycle Time Reduction": cycle_time_reduction,
+            "Cycle Time Improvement": (cycle_time_reduction / current_cycle_time) * 100,
+            "Efficiency Savings": efficiency_savings,
+            "Error Reduction Savings": error_reduction_savings,
+            "Time Savings": time_savings_amount,
+            "Maintenance Savings": maintenance_savings,
+            "Total Savings": total_savings,
+            "Net Savings": net_savings,
+            "Monthly Savings": net_savings / 12,
+            "Daily Savings": net_savings / 365,
+            "ROI": roi,
+            "Payback Period": payback_period,
+            "NPV": npv,
+            "IRR": irr,
+            "IRR Solutions": irr_solutions,
+            "Profitability Index": profitability_index,
+            "Discounted Payback Period": discounted_payback_period,
+            "Free Cash Flow": free_cash_flow,
+            "ROI per Employee": roi_per_employee,
+            "Cost Savings Ratio": cost_savings_ratio,
+            "AI Investment Efficiency": ai_investment_efficiency,
+            "Annual Savings per Employee": annual_savings_per_employee,
+            "Feature Cost Reduction": feature_cost_reduction,
+            "AI Cost per Feature": ai_cost_per_feature,
+            "Break-even Features": break_even_features,
+            "AI Impact Score": ai_impact_score,
+            "Current Velocity": current_velocity,
+            "New Velocity": new_velocity,
+            "Velocity Improvement": productivity_gain,
+            "Current Features per Month": features_per_month,
+            "Additional Features per Month": additional_features_per_month,
+            "Total Features per Month": features_per_month + additional_features_per_month,
+            "Cost per Feature": ai_cost_per_feature,
+        }
+
+    return results
+
+
+def compute_impact_frame(inputs):
+    """Like compute_impact, but returns a DataFrame with one row per scenario"""
+    import pandas as pd
+
+    return pd.DataFrame(compute_impact(inputs), columns=RESULT_NAMES)
+
+
+def compute_scenario(inputs):
+    """Evaluate a single scenario and return plain Python floats"""
+    results = compute_impact(inputs)
+    if len(results["NPV"]) != 1:
+        raise ValueError("compute_scenario expects scalar inputs; use compute_impact for batches")
+    return {name: float(values[0]) for name, values in results.items()}
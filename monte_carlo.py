@@ -0,0 +1,95 @@
+"""Monte Carlo uncertainty analysis on top of the impact engine"""
+import numpy as np
+
+from impact_engine import INPUT_DEFAULTS, compute_impact
+
+# Supported distributions and the parameters each one expects
+DISTRIBUTIONS = {
+    "triangular": ("low", "mode", "high"),
+    "normal": ("mean", "std", "low", "high"),
+    "uniform": ("low", "high"),
+}
+
+# Metrics reported by a simulation run
+SUMMARY_METRICS = ["NPV", "IRR", "ROI", "Discounted Payback Period"]
+
+
+def sample_distribution(spec, size, rng):
+    """Draw ``size`` samples for one distribution spec.
+
+    A spec is a tuple of the distribution name followed by its parameters,
+    e.g. ("triangular", 10, 25, 40) or ("normal", 25, 5, 0, 100). The bounds
+    of a normal distribution are optional and clip the samples.
+    """
+    kind, *params = spec
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {kind}")
+
+    if kind == "triangular":
+        low, mode, high = params
+        if low == high:
+            return np.full(size, float(mode))
+        return rng.triangular(low, mode, high, size)
+    elif kind == "uniform":
+        low, high = params
+        return rng.uniform(low, high, size)
+    else:
+        mean, std, *bounds = params
+        values = rng.normal(mean, std, size)
+        if bounds:
+            values = np.clip(values, *bounds)
+        return values
+
+
+def run_simulation(base_inputs, distributions, draws=100_000, batch_size=50_000,
+                   seed=None, metrics=SUMMARY_METRICS):
+    """Sample uncertain inputs and evaluate the impact engine in batches.
+
+    ``base_inputs`` holds the point estimates; every input named in
+    ``distributions`` is replaced by draws from its spec. Returns a dict of
+    metric -> array with one value per draw.
+    """
+    unknown = [name for name in distributions if name not in INPUT_DEFAULTS]
+    if unknown:
+        raise ValueError(f"Unknown calculator inputs: {', '.join(unknown)}")
+
+    rng = np.random.default_rng(seed)
+    samples = {metric: np.empty(draws) for metric in metrics}
+
+    for start in range(0, draws, batch_size):
+        size = min(batch_size, draws - start)
+        batch = dict(base_inputs)
+        for name, spec in distributions.items():
+            batch[name] = sample_distribution(spec, size, rng)
+        # Keep integer inputs integral, as the widgets would
+        if "project_duration" in distributions:
+            batch["project_duration"] = np.maximum(np.rint(batch["project_duration"]), 1)
+
+        results = compute_impact(batch)
+        for metric in metrics:
+            samples[metric][start:start + size] = results[metric]
+
+    return samples
+
+
+def summarize(samples, percentiles=(5, 50, 95)):
+    """Return a DataFrame of percentiles (columns) for each simulated metric"""
+    import pandas as pd
+
+    rows = {}
+    for metric, values in samples.items():
+        finite = values[np.isfinite(values)]
+        if finite.size:
+            rows[metric] = np.percentile(finite, percentiles)
+        else:
+            rows[metric] = np.full(len(percentiles), np.nan)
+    return pd.DataFrame.from_dict(rows, orient="index", columns=[f"P{p}" for p in percentiles])
+
+
+def histogram(values, bins=50):
+    """Bin finite samples into a DataFrame of bin centers and counts"""
+    import pandas as pd
+
+    finite = values[np.isfinite(values)]
+    counts, edges = np.histogram(finite, bins=bins)
+    return pd.DataFrame({"Value": (edges[:-1] + edges[1:]) / 2, "Count": counts})
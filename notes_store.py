@@ -0,0 +1,448 @@
+"""SQLite notes repository with a shared connection pool and a batching writer.
+
+Run as a script to bulk export or import notes as JSONL or CSV:
+
+    python notes_store.py export notes.jsonl
+    python notes_store.py import archive.csv --db notes.db
+"""
+import argparse
+import atexit
+import csv
+import itertools
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+
+# Longest time the writer waits for more inserts before committing a batch
+WRITE_BATCH_WINDOW = 0.005
+# Largest number of inserts committed in one transaction
+WRITE_BATCH_SIZE = 500
+# Number of recent latencies kept per operation
+LATENCY_HISTORY = 1000
+# Seconds before the cached note count is re-read to pick up other writers
+COUNT_CACHE_TTL = 30
+# Rows fetched or inserted per round trip by bulk export and import
+BULK_CHUNK_SIZE = 50_000
+# Columns written by export and read by import
+NOTE_FIELDS = ("email", "notes", "timestamp")
+BULK_FORMATS = ("jsonl", "csv")
+# Page cache (KiB) used while importing, so index updates stay in memory
+BULK_CACHE_KIB = 131072
+# Most recent matches ranked per search (500 pages of 20), so a common term does not score every note
+SEARCH_CANDIDATES = 10_000
+# Shortest last word searched as a prefix; shorter or numeric words must match exactly
+MIN_PREFIX_LENGTH = 3
+# Tokens shown around the matches in a search snippet
+SNIPPET_TOKENS = 16
+
+
+def fts_query(text, prefix=True):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix.
+
+    Short or numeric last words, or every word with ``prefix=False``, are
+    matched exactly: "team 5" should not expand to every token starting with 5.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    if prefix and len(words[-1]) >= MIN_PREFIX_LENGTH and not words[-1].isdigit():
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class NotesRepository:
+    """Thread-safe access to the ``notes`` table.
+
+    Reads borrow a connection from a fixed pool. Writes are queued to a single
+    background writer that groups concurrent ``add_note`` calls into one
+    transaction, so sessions never contend for the write lock. The database
+    runs in WAL mode, which lets readers proceed while a batch commits.
+    """
+
+    def __init__(self, path="notes.db", pool_size=4):
+        self.path = path
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_HISTORY))
+        self._batch_sizes = deque(maxlen=LATENCY_HISTORY)
+        self._count = None
+        self._count_read_at = 0.0
+        self._count_lock = threading.Lock()
+        self.init_db()
+
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="notes-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of the block"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def timed(self, operation):
+        """Record the latency of the block under ``operation``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._latencies[operation].append(time.perf_counter() - start)
+
+    def latency_stats(self):
+        """Count, mean, p50 and p95 latency (ms) of recent calls per operation.
+
+        ``add_note`` latency runs from queueing to commit and also reports the
+        mean number of inserts per committed batch.
+        """
+        import numpy as np
+
+        stats = {}
+        for operation, samples in list(self._latencies.items()):
+            values = np.array(samples) * 1000
+            if values.size:
+                stats[operation] = {
+                    "count": int(values.size),
+                    "mean_ms": float(values.mean()),
+                    "p50_ms": float(np.percentile(values, 50)),
+                    "p95_ms": float(np.percentile(values, 95)),
+                }
+        if "add_note" in stats and self._batch_sizes:
+            stats["add_note"]["mean_batch_size"] = float(np.mean(self._batch_sizes))
+        return stats
+
+    def init_db(self):
+        with self.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS notes
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 email TEXT,
+                 notes TEXT,
+                 timestamp DATETIME)
+            ''')
+            # Serves newest-first listing and keyset pagination without a sort
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_timestamp_id ON notes (timestamp DESC, id DESC)')
+            # Serves duplicate detection on import and the email filter of search
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_email_timestamp ON notes (email, timestamp)')
+            conn.commit()
+        self.search_enabled = self._init_search()
+
+    def _init_search(self):
+        """Create the FTS5 index over note text, kept in sync with ``notes`` by triggers.
+
+        Returns False when this SQLite build has no FTS5 support.
+        """
+        with self.connection() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'").fetchone()
+            if exists:
+                return True
+            try:
+                with conn:
+                    conn.execute('''
+                        CREATE VIRTUAL TABLE notes_fts
+                        USING fts5(notes, content='notes', content_rowid='id')
+                    ''')
+                    conn.executescript('''
+                        CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+                            INSERT INTO notes_fts (rowid, notes) VALUES (new.id, new.notes);
+                        END;
+                        CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+                            INSERT INTO notes_fts (notes_fts, rowid, notes) VALUES ('delete', old.id, old.notes);
+                        END;
+                        CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE ON notes BEGIN
+                            INSERT INTO notes_fts (notes_fts, rowid, notes) VALUES ('delete', old.id, old.notes);
+                            INSERT INTO notes_fts (rowid, notes) VALUES (new.id, new.notes);
+                        END;
+                    ''')
+                    # Index the notes written before search existed
+                    conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError:
+                return False
+        return True
+
+    def get_all_notes(self):
+        with self.timed("get_all_notes"), self.connection() as conn:
+            return conn.execute('SELECT * FROM notes ORDER BY timestamp DESC').fetchall()
+
+    def get_notes_page(self, limit=20, before=None):
+        """Return up to ``limit`` notes, newest first, strictly older than the ``before`` cursor.
+
+        A cursor is the (timestamp, id) of the last note of the previous page,
+        see page_cursor. Each page is an index range scan, so its cost does not
+        depend on how many notes the table holds.
+        """
+        with self.timed("get_notes_page"), self.connection() as conn:
+            if before is None:
+                return conn.execute(
+                    'SELECT * FROM notes ORDER BY timestamp DESC, id DESC LIMIT ?', (limit,)).fetchall()
+            return conn.execute(
+                'SELECT * FROM notes WHERE (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (*before, limit)).fetchall()
+
+    def search_notes(self, text, email=None, start=None, end=None, limit=20):
+        """Full-text search over note text, best matches first.
+
+        Returns (id, email, notes, timestamp, snippet) rows where the snippet
+        highlights matches in **bold**. ``start``/``end`` bound the timestamp
+        (inclusive start, exclusive end) as dates or ISO strings.
+
+        Matches are ordered by the FTS5 bm25 rank, whose term statistics cover
+        the whole store, but only the SEARCH_CANDIDATES most recently added
+        matches are ranked: scoring every note that holds a common term costs
+        hundreds of milliseconds on a large store. Past that many matches, an
+        older note that matches better is not returned. When the last word
+        alone already has that many matches, it is not expanded as a prefix
+        either, which would merge the postings of every word it starts.
+        """
+        query = fts_query(text)
+        if not query or not self.search_enabled:
+            return []
+
+        filters, params = '', []
+        if email:
+            filters += ' AND n.email = ?'
+            params.append(email)
+        if start is not None:
+            filters += ' AND n.timestamp >= ?'
+            params.append(str(start))
+        if end is not None:
+            filters += ' AND n.timestamp < ?'
+            params.append(str(end))
+        matches = f'''
+            FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid
+            WHERE notes_fts MATCH ?{filters} AND notes_fts.rowid BETWEEN ? AND ?
+        '''
+
+        with self.timed("search_notes"), self.connection() as conn:
+            low, high = 0, 2 ** 63 - 1
+            if start is not None or end is not None:
+                # The id range of the dates, found on the timestamp index, bounds the full-text scan
+                bounds = [(bound, value) for bound, value in (('timestamp >= ?', start), ('timestamp < ?', end))
+                          if value is not None]
+                low, high = conn.execute(
+                    f'SELECT min(id), max(id) FROM notes WHERE {" AND ".join(bound for bound, _ in bounds)}',
+                    [str(value) for _, value in bounds]).fetchone()
+                if low is None:
+                    return []
+
+            def oldest_candidate(fts):
+                # The full-text index yields matches newest first, so this is a bounded scan
+                row = conn.execute(
+                    f'SELECT notes_fts.rowid {matches} ORDER BY notes_fts.rowid DESC LIMIT 1 OFFSET ?',
+                    [fts, *params, low, high, SEARCH_CANDIDATES - 1]).fetchone()
+                return row[0] if row else low
+
+            exact = fts_query(text, prefix=False)
+            oldest = oldest_candidate(exact)
+            if exact != query and oldest == low:
+                # Fewer exact matches than candidates: expanding the prefix is affordable
+                oldest = oldest_candidate(query)
+            else:
+                query = exact
+            return conn.execute(
+                f'''SELECT n.id, n.email, n.notes, n.timestamp,
+                           snippet(notes_fts, 0, '**', '**', '…', {SNIPPET_TOKENS})
+                    {matches} ORDER BY notes_fts.rank LIMIT ?''',
+                [query, *params, oldest, high, limit]).fetchall()
+
+    @staticmethod
+    def page_cursor(page):
+        """Cursor that continues after the last note of ``page``"""
+        note_id, _, _, timestamp = page[-1]
+        return (timestamp, note_id)
+
+    def count_notes(self):
+        """Total number of notes, cached and kept current by the writer"""
+        with self._count_lock:
+            if self._count is None or time.monotonic() - self._count_read_at > COUNT_CACHE_TTL:
+                with self.timed("count_notes"), self.connection() as conn:
+                    self._count = conn.execute('SELECT COUNT(*) FROM notes').fetchone()[0]
+                self._count_read_at = time.monotonic()
+            return self._count
+
+    def add_note(self, email, notes, wait=True):
+        """Queue a note for the batching writer.
+
+        Returns the row id once the batch is committed, or the pending Future
+        when ``wait`` is False.
+        """
+        future = Future()
+        self._writes.put(((email, notes, datetime.now().isoformat(sep=" ")), future, time.perf_counter()))
+        return future.result() if wait else future
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.perf_counter() + WRITE_BATCH_WINDOW
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    item = self._writes.get(timeout=max(0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._writes.put(None)
+                    break
+                batch.append(item)
+            self._commit_batch(conn, batch)
+        conn.close()
+
+    def _commit_batch(self, conn, batch):
+        try:
+            with conn:
+                ids = [conn.execute('INSERT INTO notes (email, notes, timestamp) VALUES (?, ?, ?)', row).lastrowid
+                       for row, _, _ in batch]
+        except sqlite3.Error as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        with self._count_lock:
+            if self._count is not None:
+                self._count += len(batch)
+
+        now = time.perf_counter()
+        for row_id, (_, future, queued_at) in zip(ids, batch):
+            self._latencies["add_note"].append(now - queued_at)
+            future.set_result(row_id)
+        self._batch_sizes.append(len(batch))
+
+    def export_notes(self, file, fmt="jsonl", chunk_size=BULK_CHUNK_SIZE):
+        """Stream every note, oldest first, to an open text file as JSONL or CSV.
+
+        Rows are fetched ``chunk_size`` at a time, so memory stays flat
+        regardless of the table size. Returns the number of notes written.
+        """
+        if fmt == "csv":
+            writer = csv.writer(file)
+            writer.writerow(NOTE_FIELDS)
+            write_rows = writer.writerows
+        else:
+            def write_rows(rows):
+                file.writelines(json.dumps(dict(zip(NOTE_FIELDS, row)), ensure_ascii=False) + "\n"
+                                for row in rows)
+
+        written = 0
+        with self.timed("export_notes"), self.connection() as conn:
+            cursor = conn.execute('SELECT email, notes, timestamp FROM notes ORDER BY timestamp, id')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                write_rows(rows)
+                written += len(rows)
+        return written
+
+    def import_notes(self, file, fmt="jsonl", chunk_size=BULK_CHUNK_SIZE):
+        """Bulk load notes from an open JSONL or CSV file in a single transaction.
+
+        Rows are staged ``chunk_size`` at a time with ``executemany`` and copied
+        into ``notes`` unless a note with the same email, timestamp and content
+        already exists, in the table or earlier in the file. Returns
+        ``(imported, skipped)``.
+        """
+        if fmt == "csv":
+            records = csv.DictReader(file)
+        else:
+            records = (json.loads(line) for line in file if line.strip())
+        rows = ((record.get("email"), record.get("notes"), record.get("timestamp")) for record in records)
+
+        imported = read = 0
+        with self.timed("import_notes"), self.connection() as conn:
+            cache_size = conn.execute('PRAGMA cache_size').fetchone()[0]
+            conn.execute(f'PRAGMA cache_size = -{BULK_CACHE_KIB}')
+            try:
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS notes_import (email TEXT, notes TEXT, timestamp DATETIME)')
+                with conn:
+                    while True:
+                        chunk = list(itertools.islice(rows, chunk_size))
+                        if not chunk:
+                            break
+                        read += len(chunk)
+                        conn.execute('DELETE FROM notes_import')
+                        conn.executemany('INSERT INTO notes_import VALUES (?, ?, ?)', chunk)
+                        # The (email, timestamp) index narrows each check to a handful of rows
+                        imported += conn.execute('''
+                            INSERT INTO notes (email, notes, timestamp)
+                            SELECT DISTINCT email, notes, timestamp FROM notes_import AS i
+                            WHERE NOT EXISTS (
+                                SELECT 1 FROM notes AS n
+                                WHERE n.email IS i.email AND n.timestamp IS i.timestamp AND n.notes IS i.notes)
+                        ''').rowcount
+            finally:
+                conn.execute('DROP TABLE IF EXISTS temp.notes_import')
+                conn.execute(f'PRAGMA cache_size = {cache_size}')
+
+        with self._count_lock:
+            self._count = None
+        return imported, read - imported
+
+    def close(self):
+        """Flush pending writes and close every connection"""
+        if self._writer.is_alive():
+            self._writes.put(None)
+            self._writer.join()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def bulk_format(path, fmt=None):
+    """Format given explicitly or taken from the file extension, JSONL by default"""
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return "csv" if extension == "csv" else "jsonl"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk export and import of notes")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="JSONL or CSV file to write or read")
+    parser.add_argument("--db", default="notes.db", help="SQLite database (default: notes.db)")
+    parser.add_argument("--format", choices=BULK_FORMATS, help="File format (default: from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    fmt = bulk_format(args.path, args.format)
+
+    repository = NotesRepository(args.db)
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            with open(args.path, "w", encoding="utf-8", newline="") as file:
+                count = repository.export_notes(file, fmt, args.chunk_size)
+            summary = f"Exported {count} notes to {args.path}"
+        else:
+            with open(args.path, encoding="utf-8", newline="") as file:
+                count, skipped = repository.import_notes(file, fmt, args.chunk_size)
+            summary = f"Imported {count} notes from {args.path} ({skipped} duplicates skipped)"
+    finally:
+        repository.close()
+    print(f"{summary} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Portfolio of teams, each with its own calculator inputs and optional SDLC graph.
+
+A team added with a graph derives its AI percentage and savings inputs from
+the graph's leaf AI percentages, like the calculator's graph-driven mode.
+Results are cached per team and only the teams whose inputs or graph changed
+since the last refresh are recomputed, in a single batched call to the
+impact engine. Aggregates use grouped DataFrame operations.
+"""
+import numpy as np
+import pandas as pd
+
+from graph_rollup import SAVINGS_DRIVERS, RollupMatrix, driver_weights, graph_driven_inputs
+from impact_engine import INPUT_DEFAULTS, INPUT_NAMES, RESULT_NAMES, compute_impact
+from scenario_store import canonical_inputs
+
+# Results shown per team in the portfolio table
+TEAM_METRICS = ["Total AI Cost", "Total Savings", "Net Savings", "NPV", "IRR", "ROI", "Discounted Payback Period"]
+# Percentiles of the payback distribution
+PAYBACK_QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+class Portfolio:
+    def __init__(self):
+        # name -> {"group": str, "inputs": dict of canonical inputs, "graph": GraphState or None}
+        self.teams = {}
+        self._results = pd.DataFrame(columns=RESULT_NAMES, dtype=float)
+        self._computed = {}
+        self.last_recomputed = 0
+
+    def __len__(self):
+        return len(self.teams)
+
+    def set_team(self, name, inputs, group="", graph=None):
+        """Add or update a team.
+
+        With a ``graph``, the team's savings driver inputs are derived from
+        its leaf AI percentages and ``inputs`` hold the gains at full adoption.
+        """
+        self.teams[name] = {"group": group or "", "inputs": canonical_inputs(inputs), "graph": graph}
+
+    def remove_team(self, name):
+        self.teams.pop(name, None)
+
+    def inputs_frame(self):
+        """One row per team with its group and every calculator input"""
+        return pd.DataFrame(
+            [{"Team": name, "Group": team["group"], **team["inputs"]} for name, team in self.teams.items()],
+            columns=["Team", "Group"] + INPUT_NAMES)
+
+    def update_from_frame(self, frame):
+        """Sync the teams with an edited inputs_frame: rows are added or updated, missing teams removed.
+
+        Missing input columns and blank cells take the calculator defaults.
+        """
+        frame = frame.dropna(subset=["Team"])
+        frame = frame[frame["Team"].astype(str).str.strip() != ""]
+        names = set()
+        for row in frame.to_dict("records"):
+            name = str(row["Team"]).strip()
+            names.add(name)
+            inputs = {input_name: row[input_name] for input_name in INPUT_NAMES
+                      if input_name in row and pd.notna(row[input_name])}
+            group = row.get("Group")
+            team = self.teams.get(name)
+            if (team is None or team["inputs"] != canonical_inputs(inputs)
+                    or team["group"] != ("" if pd.isna(group) else str(group))):
+                self.set_team(name, inputs, "" if pd.isna(group) else str(group),
+                              team["graph"] if team else None)
+        for name in list(self.teams):
+            if name not in names:
+                self.remove_team(name)
+
+    def effective_inputs(self, name, weights_cache=None):
+        """Calculator inputs of a team, with the savings drivers taken from its graph if it has one"""
+        team = self.teams[name]
+        graph = team["graph"]
+        if graph is None:
+            return team["inputs"]
+        # Teams copied from the same graph share their rollup weights
+        key = (graph.fingerprint(include_percentages=False), graph.effort_share.tobytes())
+        weights_cache = {} if weights_cache is None else weights_cache
+        if key not in weights_cache:
+            rollup = RollupMatrix(graph)
+            weights_cache[key] = (rollup, driver_weights(rollup, graph))
+        rollup, weights = weights_cache[key]
+        derived = graph_driven_inputs(team["inputs"], weights, rollup.leaf_values(graph))
+        return {**team["inputs"], **{driver: float(derived[driver]) for driver in SAVINGS_DRIVERS}}
+
+    def results(self):
+        """Per-team results, recomputing only the teams whose inputs or graph changed since the last call"""
+        keys = {name: (team["inputs"], None if team["graph"] is None else team["graph"].fingerprint())
+                for name, team in self.teams.items()}
+        stale = [name for name in self.teams if self._computed.get(name) != keys[name]]
+        if stale:
+            weights_cache = {}
+            effective = [self.effective_inputs(name, weights_cache) for name in stale]
+            batch = {name: [inputs[name] for inputs in effective] for name in INPUT_DEFAULTS}
+            fresh = pd.DataFrame(compute_impact(batch), columns=RESULT_NAMES, index=stale)
+            kept = self._results.drop(index=stale, errors="ignore")
+            self._results = fresh if kept.empty else pd.concat([kept, fresh])
+            for name in stale:
+                self._computed[name] = keys[name]
+        self.last_recomputed = len(stale)
+
+        names = list(self.teams)
+        results = self._results.reindex(names)
+        results.insert(0, "Group", [self.teams[name]["group"] for name in names])
+        results["Initial Investment"] = (results["Total Initial Cost"] + results["Total Training Cost"] +
+                                         results["Total Indirect Cost"])
+        results.index.name = "Team"
+        # Forget teams that were removed
+        self._results = self._results.reindex(names)
+        self._computed = {name: self._computed[name] for name in names}
+        return results
+
+
+def weighted_irr(results):
+    """IRR averaged over teams weighted by their initial investment, ignoring teams without an IRR"""
+    valid = results["IRR"].notna()
+    weights = results.loc[valid, "Initial Investment"]
+    if not valid.any() or weights.sum() == 0:
+        return np.nan
+    return float(np.average(results.loc[valid, "IRR"], weights=weights))
+
+
+def portfolio_totals(results):
+    return {
+        "Teams": len(results),
+        "Total AI Cost": results["Total AI Cost"].sum(),
+        "Total Savings": results["Total Savings"].sum(),
+        "Net Savings": results["Net Savings"].sum(),
+        "NPV": results["NPV"].sum(),
+        "Weighted IRR": weighted_irr(results),
+        "Median Discounted Payback": results["Discounted Payback Period"].median(),
+    }
+
+
+def group_summary(results):
+    """Totals, investment-weighted IRR and median payback per group"""
+    has_irr = results["IRR"].notna()
+    frame = results.assign(
+        _weight=results["Initial Investment"].where(has_irr, 0.0),
+        _weighted_irr=(results["IRR"] * results["Initial Investment"]).where(has_irr, 0.0))
+    grouped = frame.groupby("Group", sort=True)
+    summary = grouped.agg(
+        Teams=("NPV", "size"),
+        **{"Total AI Cost": ("Total AI Cost", "sum"),
+           "Net Savings": ("Net Savings", "sum"),
+           "NPV": ("NPV", "sum"),
+           "Median Discounted Payback": ("Discounted Payback Period", "median")},
+        _weighted_irr=("_weighted_irr", "sum"),
+        _weight=("_weight", "sum"))
+    summary.insert(4, "Weighted IRR", summary["_weighted_irr"] / summary["_weight"].replace(0, np.nan))
+    return summary.drop(columns=["_weighted_irr", "_weight"])
+
+
+def payback_distribution(results):
+    """Percentiles of the discounted payback period overall and per group"""
+    overall = results["Discounted Payback Period"].quantile(PAYBACK_QUANTILES).rename("All Teams")
+    by_group = results.groupby("Group")["Discounted Payback Period"].quantile(PAYBACK_QUANTILES).unstack(0)
+    distribution = pd.concat([overall, by_group], axis=1)
+    distribution.index = [f"P{int(q * 100)}" for q in PAYBACK_QUANTILES]
+    return distribution
+
+
+def example_teams(portfolio, count=150, seed=0):
+    """Fill a portfolio with randomized teams around the calculator defaults"""
+    rng = np.random.default_rng(seed)
+    groups = ["Platform", "Product", "Data", "Infrastructure", "Mobile"]
+    for i in range(count):
+        portfolio.set_team(f"Team {i + 1:03d}", {
+            "team_size": int(rng.integers(4, 40)),
+            "avg_salary": round(float(rng.normal(130_000, 20_000)), -3),
+            "efficiency_gain": float(rng.integers(5, 45)),
+            "time_savings": float(rng.integers(5, 35)),
+            "annual_ai_maintenance": float(rng.integers(5, 60) * 1000),
+            "project_duration": int(rng.integers(2, 8)),
+        }, group=groups[i % len(groups)])
@@ -0,0 +1,86 @@
+"""Lightweight per-rerun phase timing and opt-in cProfile capture"""
+import cProfile
+import io
+import marshal
+import pickle
+import pstats
+import time
+from collections import deque
+
+import numpy as np
+
+# Reruns kept for the timing percentiles
+TIMING_HISTORY = 200
+# Functions listed in the text profile report
+PROFILE_TOP_FUNCTIONS = 40
+
+
+class PhaseTimer:
+    """Split one rerun into consecutive phases with ``lap``.
+
+    Each call to ``lap(name)`` attributes the time since the previous lap
+    (or since the timer was created) to ``name``. A disabled timer does
+    nothing, so instrumentation can stay in place at no measurable cost.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.phases = {}
+        self._last = time.perf_counter() if enabled else 0.0
+
+    def lap(self, name):
+        if self.enabled:
+            now = time.perf_counter()
+            self.phases[name] = self.phases.get(name, 0.0) + now - self._last
+            self._last = now
+
+    def total(self):
+        return sum(self.phases.values())
+
+
+class TimingHistory:
+    """Phase timings of recent reruns"""
+
+    def __init__(self, maxlen=TIMING_HISTORY):
+        self.reruns = deque(maxlen=maxlen)
+
+    def record(self, timer):
+        if timer.enabled and timer.phases:
+            self.reruns.append(dict(timer.phases, Total=timer.total()))
+
+    def summary(self):
+        """Last, p50 and p95 milliseconds per phase over the recorded reruns"""
+        phases = list(dict.fromkeys(name for rerun in self.reruns for name in rerun))
+        rows = []
+        for name in phases:
+            values = np.array([rerun.get(name, 0.0) for rerun in self.reruns]) * 1000
+            rows.append({"Phase": name, "Last (ms)": values[-1],
+                         "p50 (ms)": np.percentile(values, 50), "p95 (ms)": np.percentile(values, 95)})
+        return rows
+
+
+def session_state_sizes(state):
+    """Approximate pickled size in bytes of every session state entry, largest first"""
+    sizes = {}
+    for key, value in state.items():
+        try:
+            sizes[str(key)] = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            # Widgets callbacks, locks and the like cannot be pickled
+            sizes[str(key)] = None
+    return dict(sorted(sizes.items(), key=lambda item: -(item[1] or 0)))
+
+
+def profile_report(profiler):
+    """Return (text summary, binary .prof bytes readable by pstats/snakeviz) of a finished profile"""
+    stats = pstats.Stats(profiler)
+    text = io.StringIO()
+    stats.stream = text
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    return text.getvalue(), marshal.dumps(stats.stats)
+
+
+def start_profile():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
@@ -0,0 +1,119 @@
+"""Persistent store of calculator scenarios keyed by a hash of their inputs"""
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+from datetime import datetime
+
+from impact_engine import INPUT_DEFAULTS, compute_scenario
+
+# Bump whenever the calculator math changes so stored results are recomputed
+RESULTS_VERSION = 1
+
+
+def canonical_inputs(inputs):
+    """Every calculator input as a float, in a fixed order, with defaults filled in"""
+    return {name: float(inputs.get(name, default)) for name, default in INPUT_DEFAULTS.items()}
+
+
+def scenario_key(inputs):
+    """Stable hash of the calculator inputs and the results version"""
+    payload = json.dumps([RESULTS_VERSION, canonical_inputs(inputs)], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def dump_results(results):
+    """JSON of the results with NaN and infinities (e.g. a missing IRR) stored as null"""
+    return json.dumps({name: None if isinstance(value, float) and not math.isfinite(value) else value
+                       for name, value in results.items()})
+
+
+def load_results(text):
+    """Results stored by dump_results, with null read back as NaN"""
+    return {name: float("nan") if value is None else value for name, value in json.loads(text).items()}
+
+
+class ScenarioStore:
+    """Calculator inputs and results saved in the ``scenarios`` table.
+
+    Identical inputs map to the same row through a unique index on their
+    hash, so recalculating a known configuration is a single indexed lookup
+    instead of a recomputation.
+    """
+
+    def __init__(self, path="notes.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def init_db(self):
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS scenarios
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 input_hash TEXT NOT NULL UNIQUE,
+                 name TEXT,
+                 inputs TEXT NOT NULL,
+                 results TEXT NOT NULL,
+                 created_at DATETIME)
+            ''')
+
+    def get_or_compute(self, inputs):
+        """Return ``(scenario_id, results, cached)`` for the inputs.
+
+        Stored results are returned when these inputs were calculated before;
+        otherwise the scenario is computed and saved.
+        """
+        key = scenario_key(inputs)
+        with self._lock:
+            row = self._conn.execute('SELECT id, results FROM scenarios WHERE input_hash = ?', (key,)).fetchone()
+        if row:
+            return row[0], load_results(row[1]), True
+
+        results = compute_scenario(inputs)
+        with self._lock, self._conn:
+            # Another session may have saved the same inputs in the meantime
+            self._conn.execute(
+                'INSERT OR IGNORE INTO scenarios (input_hash, inputs, results, created_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(canonical_inputs(inputs)), dump_results(results),
+                 datetime.now().isoformat(sep=" ", timespec="seconds")))
+            scenario_id = self._conn.execute(
+                'SELECT id FROM scenarios WHERE input_hash = ?', (key,)).fetchone()[0]
+        return scenario_id, results, False
+
+    def list_scenarios(self, limit=50):
+        """Most recent scenarios as dicts with id, name, created_at and results"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, name, created_at, results FROM scenarios ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [{"id": scenario_id, "name": name, "created_at": created_at, "results": load_results(results)}
+                for scenario_id, name, created_at, results in rows]
+
+    def get_scenarios(self, scenario_ids):
+        """Full records (id, name, created_at, inputs, results) of the given scenarios, in the given order"""
+        scenario_ids = list(scenario_ids)
+        if not scenario_ids:
+            return []
+        placeholders = ", ".join("?" * len(scenario_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT id, name, created_at, inputs, results FROM scenarios WHERE id IN ({placeholders})',
+                scenario_ids).fetchall()
+        records = {scenario_id: {"id": scenario_id, "name": name, "created_at": created_at,
+                                 "inputs": json.loads(inputs), "results": load_results(results)}
+                   for scenario_id, name, created_at, inputs, results in rows}
+        return [records[i] for i in scenario_ids if i in records]
+
+    def rename_scenario(self, scenario_id, name):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE scenarios SET name = ? WHERE id = ?', (name or None, scenario_id))
+
+    @staticmethod
+    def label(scenario):
+        """Unique display label of a scenario record"""
+        if scenario["name"]:
+            return f"{scenario['name']} (#{scenario['id']})"
+        return f"Scenario {scenario['id']}"
@@ -0,0 +1,186 @@
+"""SDLC process graph model and AI percentage rollups"""
+import base64
+import pickle
+
+import networkx as nx
+
+def create_sdlc_graph():
+    # Create a directed graph
+    G = nx.DiGraph()
+    
+    # Add nodes with their levels
+    nodes = [
+        ("SDLC Process", 0),
+        ("Planning", 1),
+        ("Requirements Gathering", 2),
+        ("Stakeholder Analysis", 3),
+        ("Identify Key Stakeholders", 4),
+        ("Internal Stakeholders", 5),
+        ("External Stakeholders", 5),
+        ("Requirements Documentation", 4),
+        ("Functional Requirements", 5),
+        ("Non-Functional Requirements", 5),
+        ("Feasibility Study", 3),
+        ("Technical Feasibility", 4),
+        ("Technology Assessment", 5),
+        ("Resource Evaluation", 5),
+        ("Design", 1),
+        ("System Architecture", 2),
+        ("High-Level Design", 3),
+        ("Component Design", 4),
+        ("Module Specification", 5),
+        ("Interface Design", 5),
+        ("Implementation", 1),
+        ("Coding", 2),
+        ("Development", 3),
+        ("Code Implementation", 4),
+        ("Unit Testing", 5),
+        ("Code Review", 5),
+        ("Testing", 1),
+        ("Quality Assurance", 2),
+        ("Testing Phases", 3),
+        ("Test Planning", 4),
+        ("Test Cases", 5),
+        ("Test Environment", 5),
+        ("Deployment", 1),
+        ("Release Management", 2),
+        ("Deployment Planning", 3),
+        ("Release Strategy", 4),
+        ("Rollout Plan", 5),
+        ("Rollback Plan", 5),
+        ("Maintenance", 1),
+        ("Operations", 2),
+        ("Support", 3),
+        ("Monitoring", 4),
+        ("Performance Tracking", 5),
+        ("Issue Resolution", 5)
+    ]
+    
+    # Add nodes to graph
+    for node, level in nodes:
+        # AI percentage starts at 0; effort_share is the node's weight among its siblings
+        G.add_node(node, level=level, ai_percentage=0, effort_share=1.0)
+    
+    # Add edges
+    edges = [
+        ("SDLC Process", "Planning"),
+        ("Planning", "Requirements Gathering"),
+        ("Requirements Gathering", "Stakeholder Analysis"),
+        ("Stakeholder Analysis", "Identify Key Stakeholders"),
+        ("Identify Key Stakeholders", "Internal Stakeholders"),
+        ("Identify Key Stakeholders", "External Stakeholders"),
+        ("Stakeholder Analysis", "Requirements Documentation"),
+        ("Requirements Documentation", "Functional Requirements"),
+        ("Requirements Documentation", "Non-Functional Requirements"),
+        ("Requirements Gathering", "Feasibility Study"),
+        ("Feasibility Study", "Technical Feasibility"),
+        ("Technical Feasibility", "Technology Assessment"),
+        ("Technical Feasibility", "Resource Evaluation"),
+        ("SDLC Process", "Design"),
+        ("Design", "System Architecture"),
+        ("System Architecture", "High-Level Design"),
+        ("High-Level Design", "Component Design"),
+        ("Component Design", "Module Specification"),
+        ("Component Design", "Interface Design"),
+        ("SDLC Process", "Implementation"),
+        ("Implementation", "Coding"),
+        ("Coding", "Development"),
+        ("Development", "Code Implementation"),
+        ("Code Implementation", "Unit Testing"),
+        ("Code Implementation", "Code Review"),
+        ("SDLC Process", "Testing"),
+        ("Testing", "Quality Assurance"),
+        ("Quality Assurance", "Testing Phases"),
+        ("Testing Phases", "Test Planning"),
+        ("Test Planning", "Test Cases"),
+        ("Test Planning", "Test Environment"),
+        ("SDLC Process", "Deployment"),
+        ("Deployment", "Release Management"),
+        ("Release Management", "Deployment Planning"),
+        ("Deployment Planning", "Release Strategy"),
+        ("Release Strategy", "Rollout Plan"),
+        ("Release Strategy", "Rollback Plan"),
+        ("SDLC Process", "Maintenance"),
+        ("Maintenance", "Operations"),
+        ("Operations", "Support"),
+        ("Support", "Monitoring"),
+        ("Monitoring", "Performance Tracking"),
+        ("Monitoring", "Issue Resolution")
+    ]
+    
+    G.add_edges_from(edges)
+    
+    return G
+
+def calculate_parent_ai_percentage(G, node):
+    children = list(G.successors(node))
+    if not children:
+        return G.nodes[node]['ai_percentage']
+    
+    # Children are weighted by their effort share (1.0 when not set)
+    shares = [G.nodes[child].get('effort_share', 1.0) for child in children]
+    total_share = sum(shares)
+    if total_share <= 0:
+        return sum(G.nodes[child]['ai_percentage'] for child in children) / len(children)
+    total_percentage = sum(share * G.nodes[child]['ai_percentage'] for share, child in zip(shares, children))
+    return total_percentage / total_share
+
+def children_first(G, nodes):
+    """Order ``nodes`` so that every node comes after all of its descendants among them"""
+    subgraph = G.subgraph(nodes)
+    try:
+        return list(reversed(list(nx.topological_sort(subgraph))))
+    except nx.NetworkXUnfeasible:
+        # Cycles introduced through "Add Edge": fall back to the deepest level first
+        return sorted(subgraph.nodes(), key=lambda x: G.nodes[x]['level'], reverse=True)
+
+def update_parent_ai_percentages(G):
+    """Recompute the AI percentage of every non-leaf node from scratch"""
+    parents = [node for node in G.nodes() if G.out_degree(node) > 0]
+    for node in children_first(G, parents):
+        G.nodes[node]['ai_percentage'] = calculate_parent_ai_percentage(G, node)
+
+def propagate_ai_percentages(G, changed):
+    """Recompute only the rollups affected by a change to the given nodes.
+
+    ``changed`` holds nodes whose own percentage or set of children changed.
+    Those nodes (when they have children) and all of their ancestors are
+    recomputed, children before parents, so an edit costs time proportional
+    to the ancestors it touches rather than to the size of the graph. Nodes
+    with several parents propagate to every one of them.
+    """
+    changed = [node for node in changed if node in G]
+    dirty = set(changed)
+    for node in changed:
+        dirty |= nx.ancestors(G, node)
+
+    for node in children_first(G, dirty):
+        if G.out_degree(node) > 0:
+            G.nodes[node]['ai_percentage'] = calculate_parent_ai_percentage(G, node)
+
+def serialize_graph(G):
+    """Serialize a NetworkX graph to a base64 string"""
+    return base64.b64encode(pickle.dumps(G)).decode('utf-8')
+
+def deserialize_graph(graph_str):
+    """Deserialize a base64 string back to a NetworkX graph"""
+    if isinstance(graph_str, str):
+        return pickle.loads(base64.b64decode(graph_str.encode('utf-8')))
+    elif isinstance(graph_str, dict):
+        # If it's already a dict, convert it back to a NetworkX graph
+        G = nx.DiGraph()
+        G.add_nodes_from(graph_str.get('nodes', {}).items())
+        G.add_edges_from((source, target) for source, targets in graph_str.get('edges', {}).items()
+                         for target in targets)
+        return G
+    elif isinstance(graph_str, list):
+        # If it's a list, try to reconstruct the graph from the list data: node items, then edge items
+        items = [item for item in graph_str if isinstance(item, dict)]
+        G = nx.DiGraph()
+        G.add_nodes_from((item['id'], {k: v for k, v in item.items() if k != 'id'})
+                         for item in items if 'id' in item)
+        G.add_edges_from((item['source'], item['target']) for item in items
+                         if 'id' not in item and 'source' in item and 'target' in item)
+        return G
+    else:
+        raise ValueError("Invalid graph data format")
@@ -0,0 +1,51 @@
+"""One-at-a-time sensitivity analysis of the calculator inputs"""
+import numpy as np
+
+from impact_engine import INPUT_DEFAULTS, compute_impact
+
+# Metrics ranked in the tornado chart
+SENSITIVITY_METRICS = ["NPV", "IRR", "Discounted Payback Period"]
+
+
+def sensitivity_analysis(base_inputs, changes=(-0.2, -0.1, 0.1, 0.2), metrics=SENSITIVITY_METRICS):
+    """Perturb every input by each relative change and evaluate all of them in one batch.
+
+    Returns a long DataFrame with one row per (input, change, metric) holding
+    the perturbed value of the metric and its delta from the base scenario.
+    """
+    import pandas as pd
+
+    base = {name: float(base_inputs.get(name, default)) for name, default in INPUT_DEFAULTS.items()}
+    names = list(base)
+    changes = np.asarray(changes, dtype=float)
+
+    # Row 0 is the base scenario, followed by len(changes) rows per input
+    batch = {name: np.full(1 + len(names) * len(changes), value) for name, value in base.items()}
+    for i, name in enumerate(names):
+        rows = slice(1 + i * len(changes), 1 + (i + 1) * len(changes))
+        batch[name][rows] = base[name] * (1 + changes)
+    batch["project_duration"] = np.maximum(np.rint(batch["project_duration"]), 1)
+
+    results = compute_impact(batch)
+
+    frames = []
+    for metric in metrics:
+        values = results[metric]
+        perturbed = values[1:].reshape(len(names), len(changes))
+        frames.append(pd.DataFrame({
+            "Input": np.repeat(names, len(changes)),
+            "Change": np.tile(changes, len(names)),
+            "Metric": metric,
+            "Value": perturbed.ravel(),
+            "Delta": (perturbed - values[0]).ravel(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def tornado_data(analysis, metric, change):
+    """Select the -change/+change deltas for one metric, largest swing first"""
+    rows = analysis[(analysis["Metric"] == metric) & np.isclose(analysis["Change"].abs(), abs(change))]
+    swing = rows.groupby("Input")["Delta"].agg(lambda deltas: deltas.max() - deltas.min())
+    order = swing.sort_values(ascending=False).index
+    rows = rows.assign(Change=rows["Change"].map(lambda c: f"{c:+.0%}"))
+    return rows.set_index("Input").loc[order].reset_index()